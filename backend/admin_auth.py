@@ -0,0 +1,26 @@
+# backend/admin_auth.py - Shared-secret guard for admin-only endpoints (profiling, config pushes)
+import hmac
+import os
+
+from fastapi import Header, HTTPException
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def get_admin_token():
+    return os.getenv("ADMIN_API_TOKEN")
+
+
+def is_admin(token):
+    expected = get_admin_token()
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token, expected)
+
+
+def require_admin(x_admin_token: str = Header(None)):
+    """FastAPI dependency: admin routes 404 unless ADMIN_API_TOKEN is set, 403 on a bad token."""
+    if not get_admin_token():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
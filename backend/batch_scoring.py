@@ -0,0 +1,261 @@
+# backend/batch_scoring.py - Score every user in Firestore in a process pool (nightly digests, notifications)
+#
+# Usage (from backend/):
+#   python batch_scoring.py --workers 8
+#   python batch_scoring.py --resume                 # continue after a crash, retrying failed users
+#   python batch_scoring.py --source firestore       # score stored transactions, no Plaid calls
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from score_store import ScoreStore, scored_rows
+from scoring_config import load_category_config, compute_context_features
+from transaction_scorer import TransactionScorer
+
+ROOT_DIR = Path(__file__).resolve().parent
+CATEGORY_CFG_PATH = ROOT_DIR / "data" / "category_scoring_config.xlsx"
+DEFAULT_CHECKPOINT_PATH = ROOT_DIR / "batch_scoring.checkpoint.json"
+
+# Users submitted to the pool at a time; results are written and checkpointed per chunk
+DEFAULT_CHUNK_SIZE = 64
+
+# Per-process state, built once by _init_worker
+_SCORING_CFG = None
+_SCORER = None
+_PF_MAP = None
+_DB = None
+
+
+def _init_worker(cfg_path, source):
+    """
+    Process pool initializer: every worker loads and compiles the config once,
+    and opens its own Firestore client when reading stored transactions.
+    """
+    global _SCORING_CFG, _SCORER, _PF_MAP, _DB
+    from plaid_service import load_pf_taxonomy_map
+
+    load_dotenv()
+    _SCORING_CFG = load_category_config(cfg_path)
+    _SCORER = TransactionScorer(_SCORING_CFG)
+    _PF_MAP = load_pf_taxonomy_map()
+    if source == "firestore":
+        from firebase_config import get_firestore_client
+
+        _DB = get_firestore_client()
+
+
+def _score_user(job):
+    """
+    Worker entry point. job = (uid, items, start, end). The worker reads the
+    window from users/{uid}/transactions (--source firestore) or fetches it
+    from every linked Plaid item itself (linked_items.py).
+    Returns (uid, rows, summary, error).
+    """
+    from job_queue import BACKGROUND
+    from linked_items import check_item_errors, fetch_items, merge_transactions
+    from plaid_governor import plaid_priority
+    from plaid_service import fetch_plaid_transactions, plaid_to_txns_df
+    from transaction_sync import read_stored_window
+
+    uid, items, start_date, end_date = job
+    try:
+        if _DB is not None:
+            plaid_txns = read_stored_window(_DB, uid, start_date, end_date)
+        else:
+            # Behind any dashboard traffic sharing the Plaid budget
+            with plaid_priority(BACKGROUND):
+                results, errors = fetch_items(items, fetch_plaid_transactions, start_date, end_date, 500)
+            check_item_errors(results, errors)
+            plaid_txns = merge_transactions(results.values())
+        if not plaid_txns:
+            return uid, [], None, None
+
+        txns_df = plaid_to_txns_df(plaid_txns, _PF_MAP)
+        if txns_df.empty:
+            return uid, [], None, None
+
+        context_features = compute_context_features(
+            txns_df, _SCORING_CFG, pd.Timestamp(start_date), pd.Timestamp(end_date)
+        )
+        scored_df = _SCORER.score_all_transactions(txns_df, context_features, details=False)
+        summary = _SCORER.get_score_summary(scored_df)
+
+        rows = scored_rows(scored_df)
+        return uid, rows, summary, None
+    except Exception as e:
+        return uid, [], None, str(e)
+
+
+def stream_users(db, start_after_uid=None):
+    """Yield (uid, user_dict) for every user document, ordered by document id."""
+    from google.cloud.firestore_v1.field_path import FieldPath
+
+    users = db.collection("users")
+    query = users.order_by(FieldPath.document_id())
+    if start_after_uid:
+        query = query.start_after({FieldPath.document_id(): users.document(start_after_uid)})
+
+    for doc in query.stream():
+        yield doc.id, doc.to_dict() or {}
+
+
+def read_users(db, uids):
+    """Yield (uid, user_dict) for the given user ids that still exist."""
+    users = db.collection("users")
+    for uid in uids:
+        doc = users.document(uid).get()
+        if doc.exists:
+            yield uid, doc.to_dict() or {}
+
+
+def load_checkpoint(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_checkpoint(path, checkpoint):
+    # Write-then-rename so a crash mid-write never leaves a torn checkpoint
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(checkpoint))
+    os.replace(tmp, path)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(db, workers=None, range_weeks=10, source="plaid", chunk_size=DEFAULT_CHUNK_SIZE,
+              checkpoint_path=DEFAULT_CHECKPOINT_PATH, resume=False, cfg_path=CATEGORY_CFG_PATH):
+    checkpoint = load_checkpoint(checkpoint_path) if resume else {}
+    last_uid = checkpoint.get("last_uid")
+    users_done = checkpoint.get("users_done", 0)
+    # Users that failed in the previous run are retried before the stream continues
+    retry_uids = checkpoint.get("failed_uids", [])
+    if last_uid or retry_uids:
+        print(f"[batch] Resuming after {last_uid} ({users_done} users already done, "
+              f"{len(retry_uids)} failed users to retry)")
+
+    end_date = date.today()
+    start_date = end_date - timedelta(weeks=range_weeks)
+
+    store = ScoreStore(db)
+    started = time.perf_counter()
+    scored_users = 0
+    failed_users = 0
+
+    # Every worker gets its share of the client-wide Plaid budget (plaid_governor.py)
+    os.environ.setdefault("PLAID_GOVERNOR_PROCESSES", str(workers or os.cpu_count() or 1))
+    # Imported after that: linked_items pulls in plaid_governor, which reads it at import
+    from linked_items import user_items
+
+    # Workers are spawned, not forked: the pool starts them while stream_users'
+    # gRPC stream is open, and gRPC doesn't support fork with a live channel.
+    # _init_worker rebuilds their state either way.
+    mp_context = multiprocessing.get_context("spawn")
+
+    retrying = set(retry_uids)
+    failed_uids = []
+    users = itertools.chain(read_users(db, retry_uids), stream_users(db, start_after_uid=last_uid))
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context,
+                             initializer=_init_worker, initargs=(str(cfg_path), source)) as pool:
+        for chunk in _chunks(users, chunk_size):
+            jobs = []
+            for uid, user in chunk:
+                items = user_items(user)
+                if source == "firestore" or items:
+                    jobs.append((uid, items, start_date, end_date))
+
+            results = []
+            for uid, rows, summary, error in pool.map(_score_user, jobs):
+                if error:
+                    failed_users += 1
+                    failed_uids.append(uid)
+                    print(f"[ERROR] Scoring failed for {uid}: {error}")
+                    continue
+                results.append((uid, rows, summary))
+
+            store.persist_many(results)
+            scored_users += len(results)
+
+            # The checkpoint moves past the chunk once its results are committed;
+            # the users that failed are kept in it for --resume to retry
+            streamed = [uid for uid, _ in chunk if uid not in retrying]
+            if streamed:
+                last_uid = streamed[-1]
+                users_done += len(streamed)
+            retrying.difference_update(uid for uid, _ in chunk)
+            save_checkpoint(checkpoint_path, {
+                "last_uid": last_uid,
+                "users_done": users_done,
+                "failed_uids": [uid for uid in retry_uids if uid in retrying] + failed_uids,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            })
+
+            elapsed = time.perf_counter() - started
+            print(f"[batch] {users_done} users ({scored_users} scored, {failed_users} failed) "
+                  f"- {scored_users / max(elapsed, 1e-9):.1f} users/sec")
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "users_scored": scored_users,
+        "users_failed": failed_users,
+        "elapsed_sec": round(elapsed, 2),
+        "users_per_sec": round(scored_users / max(elapsed, 1e-9), 2),
+    }
+    print(f"[batch] Done: {stats}")
+
+    # A finished run starts from scratch next time, unless --resume should retry failed users
+    if failed_uids:
+        print(f"[batch] {len(failed_uids)} users failed; run with --resume to retry them")
+    else:
+        Path(checkpoint_path).unlink(missing_ok=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every user's transactions in a process pool.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--range-weeks", type=int, default=10, help="Scoring window in weeks")
+    parser.add_argument("--source", choices=("plaid", "firestore"), default="plaid",
+                        help="Fetch from Plaid or read users/{uid}/transactions")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT_PATH))
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    args = parser.parse_args()
+
+    load_dotenv()
+    from firebase_config import get_firestore_client
+
+    run_batch(
+        get_firestore_client(),
+        workers=args.workers,
+        range_weeks=args.range_weeks,
+        source=args.source,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+    )
+
+
+if __name__ == "__main__":
+    main()
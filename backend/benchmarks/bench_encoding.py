@@ -0,0 +1,106 @@
+# backend/benchmarks/bench_encoding.py - Size and encode time of the /plaid/transactions/{uid} body per response format
+#
+# Usage (from backend/):
+#   python benchmarks/bench_encoding.py                       # JSON into benchmarks/results/
+#   python benchmarks/bench_encoding.py --sizes 250 1000 --repeat 20 --output out.json
+#
+# "fastapi" is what the endpoint used to do (jsonable_encoder + JSONResponse);
+# every other format goes through response_encoding, with and without the
+# "dashboard" field projection. Times include compression.
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import response_encoding
+from response_encoding import compress, encode_json, encode_msgpack, parse_fields, project
+from synthetic_users import generate_plaid_transactions, load_taxonomy
+
+DEFAULT_SIZES = (250, 1000, 5000)
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+def scored_transactions(size, seed=0):
+    """Plaid dicts shaped like get_scored_window's output (a score per transaction)."""
+    rng = np.random.default_rng(seed)
+    txns = generate_plaid_transactions(size, seed=seed, taxonomy=load_taxonomy())
+    for t in txns:
+        t["score"] = round(float(rng.uniform(0, 100)), 2)
+    return txns
+
+
+def formats():
+    # name -> (fields preset, encoder, content encoding)
+    out = {"fastapi": (None, lambda payload: JSONResponse(jsonable_encoder(payload)).body, None)}
+    encoders = {"json": encode_json}
+    if response_encoding.msgpack is not None:
+        encoders["msgpack"] = encode_msgpack
+    encodings = [None, "gzip"] + (["br"] if response_encoding.brotli is not None else [])
+    for fields in (None, "dashboard"):
+        for fmt, encoder in encoders.items():
+            for encoding in encodings:
+                name = "+".join(p for p in (fmt, encoding, fields) if p)
+                out[name] = (fields, encoder, encoding)
+    return out
+
+
+def run(sizes, repeat, seed=0):
+    results = []
+    for size in sizes:
+        txns = scored_transactions(size, seed)
+        baseline = None
+        for name, (fields, encoder, encoding) in formats().items():
+            def encode():
+                body = encoder({"transactions": project(txns, parse_fields(fields))})
+                return compress(body, encoding) if encoding else body
+
+            times = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                body = encode()
+                times.append(time.perf_counter() - started)
+            row = {"size": size, "format": name, "bytes": len(body), "median_ms": statistics.median(times) * 1000}
+            baseline = baseline or row
+            results.append(row)
+            print(f"  {size:>5} {name:<28} {row['bytes']:>10} B ({row['bytes'] / baseline['bytes']:>6.1%})"
+                  f"  {row['median_ms']:>8.2f} ms ({row['median_ms'] / baseline['median_ms']:>6.1%})")
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "orjson": response_encoding.orjson is not None,
+        "msgpack": response_encoding.msgpack is not None,
+        "brotli": response_encoding.brotli is not None,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transaction list response encodings.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    output = args.output or RESULTS_DIR / f"encoding_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
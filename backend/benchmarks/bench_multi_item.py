@@ -0,0 +1,103 @@
+# backend/benchmarks/bench_multi_item.py - Window fetch latency for users with several linked items: serial vs concurrent
+#
+# Usage (from backend/):
+#   python benchmarks/bench_multi_item.py                     # JSON into benchmarks/results/
+#   python benchmarks/bench_multi_item.py --items 1 2 4 --latency-ms 300 --output out.json
+#
+# Starts loadtest/fake_plaid.py with its simulated (jittered) latency and fetches a
+# 10-week window from N items, one after another (what a single-token user
+# document forced) and through linked_items.fetch_items, then merges them.
+# Concurrent wall time should stay near one item's latency as N grows.
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / "loadtest"), str(BENCH_DIR)]
+
+from bench_plaid_fetch import _free_port, start_fake_plaid
+from users import access_token, item_id
+
+PAGE_SIZE = 500
+RANGE_WEEKS = 10
+
+
+def run(item_counts, repeat):
+    from linked_items import check_item_errors, fetch_items, merge_transactions
+    from plaid_service import fetch_plaid_transactions
+
+    end_date = date.today()
+    start_date = end_date - timedelta(weeks=RANGE_WEEKS)
+
+    def serial(items):
+        return [fetch_plaid_transactions(item["access_token"], start_date, end_date, PAGE_SIZE) for item in items]
+
+    def concurrent(items):
+        results, errors = fetch_items(items, fetch_plaid_transactions, start_date, end_date, PAGE_SIZE)
+        check_item_errors(results, errors)
+        return list(results.values())
+
+    results = []
+    for n in item_counts:
+        # One user's items: the load-test user 0 with n - 1 extra institutions
+        items = [{"item_id": item_id(0, k), "access_token": access_token(0, k)} for k in range(n)]
+        serial(items)  # warm the connection pool
+        row = {"items": n}
+        for name, fetch in (("serial", serial), ("concurrent", concurrent)):
+            walls = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                merged = merge_transactions(fetch(items))
+                walls.append(time.perf_counter() - start)
+            row[f"{name}_ms"] = statistics.median(walls) * 1000
+            row["transactions"] = len(merged)
+        results.append(row)
+        print(f"  {n} items  {row['transactions']:>5} txns  serial {row['serial_ms']:>7.1f} ms  "
+              f"concurrent {row['concurrent_ms']:>7.1f} ms")
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs concurrent multi-item window fetches.")
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    port = _free_port()
+    os.environ["PLAID_HOST"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("PLAID_CLIENT_ID", "bench-client")
+    os.environ.setdefault("PLAID_SANDBOX_SECRET", "bench-secret")
+    # Keep the rate governor out of the measurement
+    for name in ("PLAID_CLIENT_RATE", "PLAID_CLIENT_BURST", "PLAID_ITEM_RATE", "PLAID_ITEM_BURST"):
+        os.environ[name] = "100000"
+
+    process = start_fake_plaid(port, args.latency_ms)
+    try:
+        results = run(args.items, args.repeat)
+    finally:
+        process.terminate()
+        process.wait()
+
+    output = args.output or RESULTS_DIR / f"multi_item_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# backend/benchmarks/bench_plaid_fetch.py - Client CPU per transactions_get: typed plaid-python models vs raw JSON
+#
+# Usage (from backend/):
+#   python benchmarks/bench_plaid_fetch.py                    # JSON into benchmarks/results/
+#   python benchmarks/bench_plaid_fetch.py --repeat 50 --output out.json
+#
+# Starts loadtest/fake_plaid.py with no simulated latency and fetches the same
+# 500-transaction page through fetch_plaid_transactions on both paths, then
+# converts it with plaid_to_txns_df. CPU is this process's time
+# (time.process_time), so the fake server's own work is not counted.
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / "loadtest")]
+
+from users import HEAVY_EVERY, access_token
+
+# Plaid's largest transactions_get page
+PAGE_SIZE = 500
+
+PATHS = {"typed": False, "raw": True}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_plaid(port, latency_ms=0):
+    process = subprocess.Popen(
+        [sys.executable, str(BACKEND_DIR / "loadtest" / "fake_plaid.py"), "--port", str(port),
+         "--latency-ms", str(latency_ms)],
+        cwd=BACKEND_DIR,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("fake_plaid.py did not start")
+
+
+def _normalized(txns):
+    # The typed path returns datetime.date objects where the raw path keeps ISO strings
+    return json.dumps(txns, sort_keys=True, default=str)
+
+
+def run(repeat):
+    from plaid_service import fetch_plaid_transactions, load_pf_taxonomy_map, plaid_to_txns_df
+
+    pf_map = load_pf_taxonomy_map()
+    # A heavy load-test user: more than a full page over two years
+    token = access_token(HEAVY_EVERY - 1)
+    end_date = date.today()
+    start_date = end_date - timedelta(days=730)
+
+    def fetch(raw):
+        return fetch_plaid_transactions(token, start_date, end_date, PAGE_SIZE, raw=raw)
+
+    results, pages = [], {}
+    for name, raw in PATHS.items():
+        fetch(raw)  # warm the connection pool and imports
+        fetch_cpu, fetch_wall, convert_cpu = [], [], []
+        for _ in range(repeat):
+            wall, cpu = time.perf_counter(), time.process_time()
+            txns = fetch(raw)
+            fetch_cpu.append(time.process_time() - cpu)
+            fetch_wall.append(time.perf_counter() - wall)
+
+            cpu = time.process_time()
+            plaid_to_txns_df(txns, pf_map)
+            convert_cpu.append(time.process_time() - cpu)
+        pages[name] = txns
+
+        row = {
+            "path": name,
+            "transactions": len(txns),
+            "fetch_cpu_ms": statistics.median(fetch_cpu) * 1000,
+            "fetch_wall_ms": statistics.median(fetch_wall) * 1000,
+            "to_dataframe_cpu_ms": statistics.median(convert_cpu) * 1000,
+        }
+        results.append(row)
+        print(f"  {name:<6} {row['transactions']:>4} txns  fetch {row['fetch_cpu_ms']:>7.2f} ms CPU "
+              f"({row['fetch_wall_ms']:>7.2f} ms wall)  to_dataframe {row['to_dataframe_cpu_ms']:>6.2f} ms CPU")
+
+    same = _normalized(pages["typed"]) == _normalized(pages["raw"])
+    print(f"  raw vs typed payload: {'identical' if same else 'MISMATCH'}")
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": results,
+        "identical": same,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark typed vs raw-JSON Plaid transactions_get.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    port = _free_port()
+    os.environ["PLAID_HOST"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("PLAID_CLIENT_ID", "bench-client")
+    os.environ.setdefault("PLAID_SANDBOX_SECRET", "bench-secret")
+    # Keep the rate governor out of the measurement
+    for name in ("PLAID_CLIENT_RATE", "PLAID_CLIENT_BURST", "PLAID_ITEM_RATE", "PLAID_ITEM_BURST"):
+        os.environ[name] = "100000"
+
+    process = start_fake_plaid(port)
+    try:
+        results = run(args.repeat)
+    finally:
+        process.terminate()
+        process.wait()
+
+    output = args.output or RESULTS_DIR / f"plaid_fetch_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+    if not results["identical"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# backend/benchmarks/bench_scoring.py - Timing + peak memory for the scoring pipeline on synthetic users
+#
+# Usage (from backend/):
+#   python benchmarks/bench_scoring.py                        # all sizes, JSON into benchmarks/results/
+#   python benchmarks/bench_scoring.py --sizes 50 500 --repeat 3 --output out.json
+#   python benchmarks/bench_scoring.py --compare results/old.json results/new.json
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from plaid_service import load_pf_taxonomy_map, plaid_to_txns_df
+from scoring_config import load_category_config, compute_context_features
+from transaction_scorer import TransactionScorer
+import scoring_kernels
+from synthetic_users import generate_plaid_transactions, load_taxonomy
+
+DEFAULT_SIZES = (50, 500, 5000, 50000)
+RESULTS_DIR = BENCH_DIR / "results"
+
+# The reference scorer is O(n^2); above this size it is skipped (and so is the
+# equivalence check)
+REFERENCE_MAX_ROWS = 5000
+
+# Scores are rounded to 2 decimals, so fast paths may differ by one unit there
+SCORE_TOLERANCE = 0.011
+
+# Scoring implementations benchmarked side by side. "reference" is the
+# row-by-row implementation every other path is checked against; "numba" is
+# the vectorized path with the compiled per-row kernel (only when installed).
+SCORER_PATHS = {
+    "reference": lambda scorer, txns, ctx: scorer.score_all_transactions_reference(txns, ctx),
+    "vectorized": lambda scorer, txns, ctx: scorer.score_all_transactions(txns, ctx, details=False, kernel="numpy"),
+}
+if scoring_kernels.numba_installed():
+    SCORER_PATHS["numba"] = lambda scorer, txns, ctx: scorer.score_all_transactions(
+        txns, ctx, details=False, kernel="numba"
+    )
+
+
+def kernel_inputs(size, seed=0):
+    """Synthetic score_rows arguments for `size` rows, every profile present, in distress."""
+    rng = np.random.default_rng(seed)
+    return (
+        rng.integers(0, 5, size).astype(np.int8),      # profile (4 = other)
+        rng.random(size) < 0.3,                         # is_harmful
+        rng.gamma(2.0, 40.0, size),                     # txn_amount
+        rng.integers(1, 12, size),                      # same_cat_count
+        rng.gamma(2.0, 300.0, size),                    # same_cat_total
+        rng.gamma(2.0, 200.0, size),                    # window_savings
+        3, 4200.0, 900.0, 0.2, 0.1, True, 0.02, 0.05, 0.15, 4,
+    )
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def measure(fn, repeat):
+    """Run fn `repeat` times for wall time, then once under tracemalloc for peak memory."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_sec": statistics.median(times),
+        "min_sec": min(times),
+        "peak_kb": round(peak / 1024, 1),
+    }, result
+
+
+def compare_scores(reference_df, candidate_df):
+    ref = pd.to_numeric(reference_df["score"]).to_numpy(dtype=float)
+    cand = pd.to_numeric(candidate_df["score"]).to_numpy(dtype=float)
+
+    both_nan = np.isnan(ref) & np.isnan(cand)
+    diff = np.where(both_nan, 0.0, np.abs(ref - cand))
+    diff = np.where(np.isnan(diff), np.inf, diff)
+
+    return {
+        "max_abs_diff": float(diff.max()) if len(diff) else 0.0,
+        "score_mismatches": int((diff > SCORE_TOLERANCE).sum()),
+        "severity_mismatches": int(
+            (reference_df["severity"].to_numpy() != candidate_df["severity"].to_numpy()).sum()
+        ),
+        "is_scored_mismatches": int(
+            (reference_df["is_scored"].to_numpy(dtype=bool) != candidate_df["is_scored"].to_numpy(dtype=bool)).sum()
+        ),
+    }
+
+
+def run(sizes, repeat, reference_max=REFERENCE_MAX_ROWS, seed=0):
+    cfg = load_category_config(BACKEND_DIR / "data" / "category_scoring_config.xlsx")
+    pf_map = load_pf_taxonomy_map()
+    scorer = TransactionScorer(cfg)
+    taxonomy = load_taxonomy()
+    # Keep JIT compilation out of the first timed call
+    scoring_kernels.compile_kernels()
+
+    timings = []
+    equivalence = []
+
+    for size in sizes:
+        plaid_txns = generate_plaid_transactions(size, seed=seed, stressed=bool(size % 2), taxonomy=taxonomy)
+        txns = plaid_to_txns_df(plaid_txns, pf_map)
+        start, end = txns["date"].min(), txns["date"].max()
+
+        def record(stage, fn):
+            stats, result = measure(fn, repeat)
+            timings.append({"size": size, "rows": int(len(txns)), "stage": stage, **stats})
+            print(f"  {size:>6} {stage:<34} {stats['median_sec'] * 1000:>10.2f} ms  {stats['peak_kb']:>10.1f} KB")
+            return result
+
+        record("plaid_to_txns_df", lambda: plaid_to_txns_df(plaid_txns, pf_map))
+        ctx = record("compute_context_features", lambda: compute_context_features(txns, cfg, start, end))
+
+        scored = {}
+        for name, path in SCORER_PATHS.items():
+            if name == "reference" and size > reference_max:
+                continue
+            scored[name] = record(f"score_all_transactions[{name}]", lambda: path(scorer, txns, ctx))
+
+        # The per-row formulas on their own, without the frame-level preparation
+        args = kernel_inputs(size, seed)
+        for kernel in scoring_kernels.available_kernels():
+            record(f"score_rows[{kernel}]", lambda: scoring_kernels.score_rows(kernel, *args))
+
+        fastest = scored.get("vectorized", next(iter(scored.values())))
+        record("get_score_summary", lambda: scorer.get_score_summary(fastest))
+
+        if "reference" in scored:
+            for name, df in scored.items():
+                if name == "reference":
+                    continue
+                check = {"size": size, "path": name, **compare_scores(scored["reference"], df)}
+                equivalence.append(check)
+                ok = not (check["score_mismatches"] or check["severity_mismatches"] or check["is_scored_mismatches"])
+                print(f"  {size:>6} {name} vs reference: {'OK' if ok else 'MISMATCH'} "
+                      f"(max |diff| {check['max_abs_diff']:.4f})")
+
+    return {
+        "git_commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "timings": timings,
+        "equivalence": equivalence,
+    }
+
+
+def compare_results(old_path, new_path):
+    """Print per-stage speed-ups between two result files."""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    old_by_key = {(t["size"], t["stage"]): t for t in old["timings"]}
+
+    print(f"{old['git_commit']} -> {new['git_commit']}")
+    print(f"{'size':>6} {'stage':<34} {'old ms':>10} {'new ms':>10} {'speed-up':>9}")
+    for t in new["timings"]:
+        before = old_by_key.get((t["size"], t["stage"]))
+        if before is None:
+            continue
+        speedup = before["median_sec"] / max(t["median_sec"], 1e-12)
+        print(f"{t['size']:>6} {t['stage']:<34} {before['median_sec'] * 1000:>10.2f} "
+              f"{t['median_sec'] * 1000:>10.2f} {speedup:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transaction scoring pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reference-max", type=int, default=REFERENCE_MAX_ROWS)
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/scoring-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    results = run(args.sizes, args.repeat, reference_max=args.reference_max)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"scoring-{results['git_commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if any(c["score_mismatches"] or c["severity_mismatches"] or c["is_scored_mismatches"]
+           for c in results["equivalence"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
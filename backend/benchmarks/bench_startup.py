@@ -0,0 +1,113 @@
+# backend/benchmarks/bench_startup.py - Cold start of backend.main in fresh interpreters
+#
+# Usage (from backend/):
+#   python benchmarks/bench_startup.py                       # JSON into benchmarks/results/
+#   python benchmarks/bench_startup.py --repeat 10 --output out.json
+#
+# Each run starts a new interpreter, imports backend.main (Firestore swapped
+# for the in-memory load-test fake so no credentials are needed) and, when the
+# app exposes warm_up(), times building every lazy resource as well.
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+REPO_DIR = BACKEND_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+# Heavy modules whose presence after import shows what is still on the import path
+TRACKED_MODULES = ("pandas", "numpy", "numba", "plaid.api.plaid_api", "firebase_admin", "google.cloud.firestore", "openpyxl")
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+sys.path[:0] = [{backend!r}, {repo!r}, {loadtest!r}]
+import firebase_config
+from fake_firestore import FakeFirestoreClient
+firebase_config.get_firestore_client = lambda: FakeFirestoreClient()
+
+t0 = time.perf_counter()
+import backend.main as main
+import_sec = time.perf_counter() - t0
+loaded = [m for m in {tracked!r} if m in sys.modules]
+
+warm_sec = None
+if hasattr(main, "warm_up"):
+    t0 = time.perf_counter()
+    main.warm_up()
+    warm_sec = time.perf_counter() - t0
+
+print(json.dumps({{"import_sec": import_sec, "warm_sec": warm_sec, "heavy_modules_on_import": loaded}}))
+"""
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def run_once():
+    code = CHILD.format(
+        backend=str(BACKEND_DIR),
+        repo=str(REPO_DIR),
+        loadtest=str(BACKEND_DIR / "loadtest"),
+        tracked=TRACKED_MODULES,
+    )
+    env = {
+        **os.environ,
+        "PLAID_CLIENT_ID": os.getenv("PLAID_CLIENT_ID", "bench-client"),
+        "PLAID_SANDBOX_SECRET": os.getenv("PLAID_SANDBOX_SECRET", "bench-secret"),
+        # Measure the import itself, not a background warm-up racing it
+        "WARMUP_MODE": "off",
+    }
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend.main cold start.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="JSON results path (default: benchmarks/results/startup-<commit>.json)")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.repeat)]
+    import_secs = [r["import_sec"] for r in runs]
+    warm_secs = [r["warm_sec"] for r in runs if r["warm_sec"] is not None]
+
+    results = {
+        "git_commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": args.repeat,
+        "import_median_sec": statistics.median(import_secs),
+        "warm_up_median_sec": statistics.median(warm_secs) if warm_secs else None,
+        "heavy_modules_on_import": runs[-1]["heavy_modules_on_import"],
+        "runs": runs,
+    }
+
+    print(f"import backend.main: {results['import_median_sec'] * 1000:.0f} ms (median of {args.repeat})")
+    if warm_secs:
+        print(f"warm_up():           {results['warm_up_median_sec'] * 1000:.0f} ms")
+    print(f"heavy modules loaded by import: {', '.join(results['heavy_modules_on_import']) or 'none'}")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"startup-{results['git_commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
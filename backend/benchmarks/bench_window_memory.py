@@ -0,0 +1,177 @@
+# backend/benchmarks/bench_window_memory.py - Memory held per scored window: Plaid dicts with merged scores vs TransactionTable
+#
+# Usage (from backend/):
+#   python benchmarks/bench_window_memory.py                  # JSON into benchmarks/results/
+#   python benchmarks/bench_window_memory.py --windows 20 --output out.json
+#
+# Builds the same scored windows for heavy load-test users both ways and
+# measures, with tracemalloc, what a cached window keeps alive (retained) and
+# the high-water mark while building it (peak). The scored frame is the same
+# on both paths and is left out. Also times records() for the dashboard
+# field set against projecting the dicts, and checks both give the same rows.
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+sys.path[:0] = [str(BACKEND_DIR), str(BACKEND_DIR / "loadtest")]
+
+import pandas as pd
+
+from fake_plaid import PayloadStore, to_plaid_json
+from plaid_service import load_pf_taxonomy_map, plaid_to_txns_df
+from response_encoding import FIELD_PRESETS, project
+from scoring_config import compute_context_features, load_category_config
+from transaction_scorer import TransactionScorer
+from transaction_table import TransactionTable
+from users import HEAVY_EVERY, access_token
+
+# Plaid's largest transactions_get page, as fetched per dashboard window
+PAGE_SIZE = 500
+CONFIG_VERSION = "bench"
+
+
+def plaid_pages(windows):
+    """One raw-JSON page per heavy user, as fetch_plaid_transactions returns it."""
+    store = PayloadStore()
+    pages = []
+    for i in range(windows):
+        txns = store.transactions(access_token((i + 1) * HEAVY_EVERY - 1))[:PAGE_SIZE]
+        pages.append(json.loads(json.dumps([to_plaid_json(t) for t in txns])))
+    return pages
+
+
+def score(txns_df, scorer, cfg):
+    end = txns_df["date"].max()
+    start = txns_df["date"].min()
+    context_features = compute_context_features(txns_df, cfg, start, end)
+    return scorer.score_all_transactions(txns_df, context_features, details=False)
+
+
+def dict_window(page, pf_map, scorer, cfg):
+    # What get_scored_window used to keep: every Plaid dict, with scores merged in
+    plaid_txns = json.loads(json.dumps(page))
+    scored_df = score(plaid_to_txns_df(plaid_txns, pf_map), scorer, cfg)
+    score_by_tid = dict(zip(scored_df["transaction_id"], scored_df["score"]))
+    profile_by_tid = dict(zip(scored_df["transaction_id"], scored_df["profile"]))
+    severity_by_tid = dict(zip(scored_df["transaction_id"], scored_df["severity"]))
+    for t in plaid_txns:
+        tid = t["transaction_id"]
+        s = score_by_tid.get(tid)
+        if s is not None and not pd.isna(s):
+            t["score"], t["profile"], t["severity"] = float(s), profile_by_tid.get(tid), severity_by_tid.get(tid)
+        else:
+            t["score"] = t["profile"] = t["severity"] = None
+        t["config_version"] = CONFIG_VERSION
+    return plaid_txns, scored_df
+
+
+def table_window(page, pf_map, scorer, cfg):
+    plaid_txns = json.loads(json.dumps(page))
+    table = TransactionTable.from_plaid(plaid_txns, pf_map)
+    del plaid_txns
+    scored_df = score(table.to_txns_df(), scorer, cfg)
+    table.attach_scores(scored_df, CONFIG_VERSION)
+    return table, scored_df
+
+
+def measure(build, pages):
+    """(retained bytes per window, peak bytes per window, kept windows)."""
+    kept = []
+    tracemalloc.start()
+    retained, peaks = [], []
+    for page in pages:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        window, scored_df = build(page)
+        del scored_df
+        current, peak = tracemalloc.get_traced_memory()
+        retained.append(current - before)
+        peaks.append(peak - before)
+        kept.append(window)
+    tracemalloc.stop()
+    return statistics.median(retained), statistics.median(peaks), kept
+
+
+def time_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def run(windows, repeat):
+    cfg = load_category_config(BACKEND_DIR / "data" / "category_scoring_config.xlsx")
+    scorer = TransactionScorer(cfg)
+    pf_map = load_pf_taxonomy_map()
+    pages = plaid_pages(windows)
+    fields = FIELD_PRESETS["dashboard"]
+
+    dict_retained, dict_peak, dict_windows = measure(lambda p: dict_window(p, pf_map, scorer, cfg), pages)
+    table_retained, table_peak, tables = measure(lambda p: table_window(p, pf_map, scorer, cfg), pages)
+
+    same = all(
+        json.dumps(sorted(d, key=lambda t: t["transaction_id"]), sort_keys=True)
+        == json.dumps(sorted(t.records(), key=lambda t: t["transaction_id"]), sort_keys=True)
+        for d, t in zip(dict_windows, tables)
+    )
+    results = [
+        {
+            "path": "dicts",
+            "retained_kib": dict_retained / 1024,
+            "peak_kib": dict_peak / 1024,
+            "dashboard_fields_ms": time_ms(lambda: project(dict_windows[0], fields), repeat),
+            "all_fields_ms": time_ms(lambda: list(dict_windows[0]), repeat),
+        },
+        {
+            "path": "table",
+            "retained_kib": table_retained / 1024,
+            "peak_kib": table_peak / 1024,
+            "dashboard_fields_ms": time_ms(lambda: tables[0].records(fields), repeat),
+            "all_fields_ms": time_ms(lambda: tables[0].records(), repeat),
+        },
+    ]
+    for row in results:
+        print(f"  {row['path']:<6} retained {row['retained_kib']:>7.1f} KiB  peak {row['peak_kib']:>7.1f} KiB  "
+              f"dashboard fields {row['dashboard_fields_ms']:>6.2f} ms  all fields {row['all_fields_ms']:>6.2f} ms")
+    print(f"  {PAGE_SIZE}-transaction windows, median of {windows}; records vs dicts: "
+          f"{'identical' if same else 'MISMATCH'}")
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "windows": windows,
+        "transactions_per_window": PAGE_SIZE,
+        "results": results,
+        "identical": same,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory per scored window: dicts vs TransactionTable.")
+    parser.add_argument("--windows", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = run(args.windows, args.repeat)
+
+    output = args.output or RESULTS_DIR / f"window_memory_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+    if not results["identical"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# backend/benchmarks/synthetic_users.py - Synthetic Plaid users drawn from the real CAT_ID taxonomy
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TAXONOMY_PATH = BACKEND_DIR / "data" / "transactions-personal-finance-category-taxonomy.csv"
+
+# Relative purchase frequency per PRIMARY category (anything unlisted gets 1)
+PRIMARY_WEIGHTS = {
+    "FOOD_AND_DRINK": 30,
+    "GENERAL_MERCHANDISE": 18,
+    "TRANSPORTATION": 10,
+    "ENTERTAINMENT": 7,
+    "PERSONAL_CARE": 4,
+    "RENT_AND_UTILITIES": 4,
+    "MEDICAL": 3,
+    "GENERAL_SERVICES": 3,
+    "TRAVEL": 2,
+    "HOME_IMPROVEMENT": 2,
+    "TRANSFER_OUT": 2,
+    "LOAN_PAYMENTS": 2,
+    "BANK_FEES": 1,
+    "GOVERNMENT_AND_NON_PROFIT": 1,
+    "INCOME": 0,
+    "TRANSFER_IN": 0,
+}
+
+# Median outflow per PRIMARY category (lognormal around it)
+PRIMARY_MEDIAN_AMOUNT = {
+    "FOOD_AND_DRINK": 18.0,
+    "GENERAL_MERCHANDISE": 35.0,
+    "TRANSPORTATION": 25.0,
+    "ENTERTAINMENT": 20.0,
+    "RENT_AND_UTILITIES": 150.0,
+    "TRAVEL": 220.0,
+    "LOAN_PAYMENTS": 300.0,
+    "TRANSFER_OUT": 200.0,
+    "BANK_FEES": 15.0,
+    "MEDICAL": 60.0,
+    "HOME_IMPROVEMENT": 80.0,
+}
+
+# Roughly how many transactions a user makes per day; sets the history length
+TXNS_PER_DAY = 4
+
+
+def load_taxonomy():
+    taxonomy = pd.read_csv(TAXONOMY_PATH)
+    taxonomy["CAT_ID"] = taxonomy["CAT_ID"].astype(int)
+    return taxonomy
+
+
+def generate_plaid_transactions(n_txns, seed=0, stressed=False, end_date=None, taxonomy=None):
+    """
+    Plaid-shaped transaction dicts (as returned by transactions_get().to_dict())
+    for one synthetic user: biweekly paychecks plus n_txns outflows spread over
+    enough history to keep TXNS_PER_DAY. stressed users earn less and pay
+    more fees / cash advances.
+    """
+    rng = np.random.default_rng(seed)
+    taxonomy = load_taxonomy() if taxonomy is None else taxonomy
+    end_date = end_date or date.today()
+    span_days = max(70, n_txns // TXNS_PER_DAY)
+
+    weights = taxonomy["PRIMARY"].map(lambda p: PRIMARY_WEIGHTS.get(p, 1)).to_numpy(dtype=float)
+    if stressed:
+        weights[taxonomy["PRIMARY"].to_numpy() == "BANK_FEES"] *= 6
+    weights /= weights.sum()
+
+    n_paychecks = max(1, span_days // 14)
+    n_outflows = max(0, n_txns - n_paychecks)
+
+    rows = rng.choice(len(taxonomy), size=n_outflows, p=weights)
+    primary = taxonomy["PRIMARY"].to_numpy()[rows]
+    detailed = taxonomy["DETAILED"].to_numpy()[rows]
+    medians = np.array([PRIMARY_MEDIAN_AMOUNT.get(p, 30.0) for p in primary])
+    amounts = np.round(medians * rng.lognormal(0.0, 0.6, size=n_outflows), 2)
+    offsets = rng.integers(0, span_days, size=n_outflows)
+
+    paycheck = 1400.0 if stressed else 3200.0
+    txns = []
+
+    for i in range(n_paychecks):
+        txns.append(_plaid_txn(
+            f"pay-{seed}-{i}",
+            end_date - timedelta(days=span_days - 1 - i * 14),
+            -paycheck,
+            "INCOME",
+            "INCOME_WAGES",
+            "ACME PAYROLL",
+        ))
+
+    for i in range(n_outflows):
+        txns.append(_plaid_txn(
+            f"txn-{seed}-{i}",
+            end_date - timedelta(days=int(offsets[i])),
+            float(amounts[i]),
+            primary[i],
+            detailed[i],
+            f"{detailed[i].split('_')[-1].title()} Merchant {i % 97}",
+        ))
+
+    return txns
+
+
+def _plaid_txn(transaction_id, txn_date, amount, primary, detailed, merchant):
+    # Extra fields mirror a real payload so conversion / serialization costs are realistic
+    return {
+        "transaction_id": transaction_id,
+        "account_id": "acc-synthetic-checking",
+        "date": txn_date,
+        "authorized_date": txn_date,
+        "amount": amount,
+        "iso_currency_code": "USD",
+        "name": merchant.upper(),
+        "merchant_name": merchant,
+        "pending": False,
+        "payment_channel": "in store",
+        "category": [primary.replace("_", " ").title()],
+        "personal_finance_category": {
+            "primary": primary,
+            "detailed": detailed,
+            "confidence_level": "VERY_HIGH",
+        },
+        "location": {
+            "address": None,
+            "city": "College Park",
+            "region": "MD",
+            "postal_code": "20742",
+            "country": "US",
+            "lat": None,
+            "lon": None,
+        },
+        "payment_meta": {
+            "by_order_of": None,
+            "payee": None,
+            "payer": None,
+            "payment_method": None,
+            "reference_number": None,
+        },
+        "counterparties": [
+            {"name": merchant, "type": "merchant", "confidence_level": "HIGH"}
+        ],
+    }
@@ -0,0 +1,173 @@
+# backend/config_registry.py - Hot-reloadable scoring config: compile off the request path, swap atomically
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+# Seconds between checks of the config file for changes (0 disables watching)
+DEFAULT_POLL_SECONDS = float(os.getenv("SCORING_CONFIG_POLL_SECONDS", "10"))
+
+# Recent swaps kept for the admin endpoint
+MAX_HISTORY = 20
+
+
+@dataclass(frozen=True)
+class ScoringSnapshot:
+    """
+    One compiled config and the scorer built from it. Requests take a snapshot
+    once and use it throughout, so a swap mid-request never mixes configs.
+    """
+    cfg: object
+    scorer: object
+    version: str
+    source: str
+    loaded_at: str
+
+
+def _build_snapshot(cfg, source):
+    from transaction_scorer import TransactionScorer
+
+    scorer = TransactionScorer(cfg)
+    return ScoringSnapshot(
+        cfg=cfg,
+        scorer=scorer,
+        version=scorer.config_version,
+        source=source,
+        loaded_at=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ConfigRegistry:
+    """
+    Holds the active ScoringSnapshot. New configs (file change or admin push)
+    are compiled by the caller's thread, then published with a single reference
+    swap; listeners (cache invalidation, worker state) run after the swap.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._swap_lock = threading.Lock()
+        self._listeners = []
+        self._history = []
+        self._signature = None
+        self._watcher = None
+        self._stop = threading.Event()
+        self._current = self.load_from_path()
+
+    def current(self):
+        return self._current
+
+    def add_listener(self, fn):
+        """fn(old_snapshot, new_snapshot), called after every version change."""
+        self._listeners.append(fn)
+
+    def history(self):
+        return list(self._history)
+
+    def _swap(self, snapshot):
+        with self._swap_lock:
+            old = getattr(self, "_current", None)
+            if old is not None and old.version == snapshot.version:
+                return old
+            self._current = snapshot
+            self._history.append({
+                "version": snapshot.version,
+                "previous_version": old.version if old is not None else None,
+                "source": snapshot.source,
+                "loaded_at": snapshot.loaded_at,
+            })
+            del self._history[:-MAX_HISTORY]
+
+        if old is not None:
+            for listener in self._listeners:
+                try:
+                    listener(old, snapshot)
+                except Exception as e:
+                    print(f"[ERROR] Config swap listener failed: {e}")
+        return snapshot
+
+    def load_from_path(self, path=None):
+        """Compile the config file and make it active. Returns the active snapshot."""
+        from scoring_config import load_category_config
+
+        path = str(path or self.path)
+        signature = _file_signature(path)
+        snapshot = _build_snapshot(load_category_config(path), source=f"file:{os.path.basename(path)}")
+        self._signature = signature
+        return self._swap(snapshot)
+
+    def load_from_bytes(self, data, source="admin-push", persist=True):
+        """
+        Compile an uploaded xlsx and make it active. With persist, the file on
+        disk is replaced too (atomically) so the other workers' watchers pick
+        it up. Invalid workbooks raise before anything is swapped.
+        """
+        from scoring_config import load_category_config
+
+        cfg = load_category_config(io.BytesIO(data))
+        snapshot = _build_snapshot(cfg, source=source)
+
+        if persist:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+            self._signature = _file_signature(self.path)
+
+        return self._swap(snapshot)
+
+    def check_for_changes(self):
+        """Reload if the file changed since the last load. Returns True when a reload happened."""
+        try:
+            signature = _file_signature(self.path)
+        except OSError as e:
+            print(f"[ERROR] Scoring config not readable: {e}")
+            return False
+        if signature == self._signature:
+            return False
+
+        try:
+            self.load_from_path()
+        except Exception as e:
+            # Keep serving the old config; a half-written file gets picked up on the next poll
+            print(f"[ERROR] Scoring config reload failed, keeping {self._current.version}: {e}")
+            return False
+        return True
+
+    def start_watching(self, poll_seconds=DEFAULT_POLL_SECONDS):
+        """Poll the config file from a daemon thread (one per process; threads don't survive fork)."""
+        if poll_seconds <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(poll_seconds):
+                self.check_for_changes()
+
+        self._watcher = threading.Thread(target=watch, name="scoring-config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def status(self):
+        snapshot = self._current
+        return {
+            "version": snapshot.version,
+            "source": snapshot.source,
+            "loaded_at": snapshot.loaded_at,
+            "path": self.path,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "checked_at": time.time(),
+            "history": self.history(),
+        }
@@ -1,12 +1,37 @@
-# # backend/firebase_config.py
-# import os
-# import firebase_admin
-# from firebase_admin import credentials, auth, firestore
+# backend/firebase_config.py
+import os
 
-# FIREBASE_CRED_PATH = os.getenv("FIREBASE_CRED_JSON")
+from resolve_env import get_firebase_creds
 
-# if not firebase_admin._apps:
-#     cred = credentials.Certificate(FIREBASE_CRED_PATH)
-#     firebase_admin.initialize_app(cred)
+# firebase_admin / google.cloud are imported inside the functions: they are
+# slow to import and only needed once Firestore is actually used
 
-# db = firestore.client()
+
+def init_firebase_app():
+    """Initialize the default Firebase app from env credentials (once per process)."""
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if not firebase_admin._apps:
+        cred_dict = get_firebase_creds()
+        private_key = cred_dict.get("private_key")
+        if not private_key:
+            raise ValueError("Firebase private key missing from credentials")
+        cred_dict["private_key"] = private_key.replace("\\n", "\n")
+        cred = credentials.Certificate(cred_dict)
+        firebase_admin.initialize_app(cred)
+    return firebase_admin.get_app()
+
+
+def get_firestore_client():
+    # Local runs / tests against the Firestore emulator need no service account
+    if os.getenv("FIRESTORE_EMULATOR_HOST"):
+        from google.cloud import firestore as gcloud_firestore
+
+        project = os.getenv("FIREBASE_PROJECT_ID") or "demo-clarity-cash"
+        return gcloud_firestore.Client(project=project)
+
+    from firebase_admin import firestore
+
+    init_firebase_app()
+    return firestore.client()
@@ -0,0 +1,62 @@
+# backend/gunicorn.conf.py - Preforked production entrypoint with shared read-only scoring state
+#
+# Usage (from the repo root):
+#   gunicorn -c backend/gunicorn.conf.py backend.main:app
+#   WEB_CONCURRENCY=8 BIND=0.0.0.0:8000 gunicorn -c backend/gunicorn.conf.py backend.main:app
+#
+# The master imports the app once, builds the scoring config / taxonomy map /
+# scorer (main.preload_shared_state) and freezes the GC before forking, so the
+# workers share those pages copy-on-write instead of each building a copy.
+# Each worker then builds its own Firestore and Plaid clients after the fork.
+# GET /health/workers checks that every worker reports the same config version;
+# a scoring-config reload (config_registry.py) moves them all off the preloaded one.
+import gc
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+# backend.main imports its siblings both relatively and by bare module name
+sys.path[:0] = [str(BACKEND_DIR.parent), str(BACKEND_DIR)]
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+
+# Scratch space shared by the master and its workers for this run. Both must
+# be set before the app (and prometheus_client) is imported.
+_run_dir = tempfile.mkdtemp(prefix="clarity-gunicorn-")
+os.environ.setdefault("WORKER_STATE_DIR", os.path.join(_run_dir, "workers"))
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(_run_dir, "prometheus"))
+# Job status shared by the workers, so GET /jobs/{id} works whichever one answers
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(_run_dir, "jobs.sqlite3"))
+# The client-wide Plaid budget is split between the workers (plaid_governor.py)
+os.environ.setdefault("PLAID_GOVERNOR_PROCESSES", str(workers))
+os.makedirs(os.environ["WORKER_STATE_DIR"], exist_ok=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded, before any worker forks
+    from backend import main
+    from worker_state import publish_master_state
+
+    version = main.preload_shared_state()
+    publish_master_state(config_version=version)
+
+    # Move everything allocated so far into the permanent generation: GC passes
+    # in the workers would otherwise write to these objects' headers and
+    # unshare the pages they live on
+    gc.freeze()
+    server.log.info(f"Preloaded scoring config {version}; forking {server.num_workers} workers")
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
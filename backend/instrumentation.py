@@ -0,0 +1,208 @@
+# backend/instrumentation.py - Per-stage timing, row counts and allocation counters (Prometheus + optional OpenTelemetry)
+#
+# Wrap a unit of work in `stage()`:
+#
+#     with stage("plaid_fetch", uid=uid) as s:
+#         txns = fetch(...)
+#         s.rows = len(txns)
+#
+# and it shows up on /metrics as clarity_stage_seconds{stage="plaid_fetch"} etc.
+# When opentelemetry is installed each stage is also a span (a no-op until an
+# SDK / exporter is configured); keyword attributes only go to the span, so
+# high-cardinality values like uid never become Prometheus labels.
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+try:
+    from opentelemetry import trace
+
+    _tracer = trace.get_tracer("clarity_cash.backend")
+except ImportError:  # OpenTelemetry is optional
+    _tracer = None
+
+# Seconds; spans from sub-millisecond lookups up to slow Plaid pulls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Rows handled by a stage (transactions fetched / scored / written)
+ROW_BUCKETS = (0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Response body sizes, 256 B .. 4 MB
+BYTE_BUCKETS = tuple(256 * 4 ** i for i in range(8))
+
+STAGE_SECONDS = Histogram(
+    "clarity_stage_seconds",
+    "Wall time spent in a pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_ROWS = Histogram(
+    "clarity_stage_rows",
+    "Rows processed by a pipeline stage",
+    ["stage"],
+    buckets=ROW_BUCKETS,
+)
+STAGE_ALLOCATED_BLOCKS = Counter(
+    "clarity_stage_allocated_blocks",
+    "Net memory blocks allocated while a stage ran (process-wide, approximate under concurrency)",
+    ["stage"],
+)
+STAGE_ERRORS = Counter(
+    "clarity_stage_errors",
+    "Exceptions raised inside a pipeline stage",
+    ["stage", "error"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "clarity_http_request_seconds",
+    "End-to-end request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "clarity_cache_lookups",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+BACKGROUND_JOBS = Counter(
+    "clarity_background_jobs",
+    "Background jobs by queue and outcome (queued, coalesced, rejected, succeeded, failed)",
+    ["queue", "outcome"],
+)
+PLAID_WAITING = Gauge(
+    "clarity_plaid_waiting",
+    "Plaid calls queued on the rate governor",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+PLAID_WAIT_SECONDS = Histogram(
+    "clarity_plaid_wait_seconds",
+    "Time a Plaid call waited on the rate governor before going out",
+    ["operation", "priority"],
+    buckets=LATENCY_BUCKETS,
+)
+PLAID_RATE_LIMITED = Counter(
+    "clarity_plaid_rate_limited",
+    "RATE_LIMIT_EXCEEDED responses from Plaid by the budget they hit (item or client)",
+    ["operation", "scope"],
+)
+PLAID_CLIENT_RATE = Gauge(
+    "clarity_plaid_client_rate",
+    "Current adaptive client-wide Plaid budget in calls/s (summed over workers)",
+    multiprocess_mode="livesum",
+)
+RESPONSE_BYTES = Histogram(
+    "clarity_response_bytes",
+    "Encoded response body size before (raw) and after (sent) compression",
+    ["route", "format", "encoding", "size"],
+    buckets=BYTE_BUCKETS,
+)
+
+
+class StageTimer:
+    """Handle yielded by stage(); set `rows` to record how much work was done."""
+
+    __slots__ = ("name", "rows", "span")
+
+    def __init__(self, name, span=None):
+        self.name = name
+        self.rows = None
+        self.span = span
+
+    def set_attribute(self, key, value):
+        if self.span is not None:
+            self.span.set_attribute(key, value)
+
+
+@contextmanager
+def _span(name, attributes):
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+@contextmanager
+def stage(name, **attributes):
+    """Time a pipeline stage; exceptions are counted and re-raised."""
+    attributes = {k: v for k, v in attributes.items() if v is not None}
+    with _span(name, attributes) as span:
+        timer = StageTimer(name, span)
+        blocks_before = sys.getallocatedblocks()
+        started = time.perf_counter()
+        try:
+            yield timer
+        except Exception as e:
+            STAGE_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            STAGE_SECONDS.labels(name).observe(time.perf_counter() - started)
+            allocated = sys.getallocatedblocks() - blocks_before
+            if allocated > 0:
+                STAGE_ALLOCATED_BLOCKS.labels(name).inc(allocated)
+            if timer.rows is not None:
+                STAGE_ROWS.labels(name).observe(timer.rows)
+                timer.set_attribute("rows", timer.rows)
+
+
+def record_error(stage_name, error):
+    """Count an error that was handled (and printed) instead of raised."""
+    STAGE_ERRORS.labels(stage_name, type(error).__name__).inc()
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_job(queue, outcome):
+    BACKGROUND_JOBS.labels(queue, outcome).inc()
+
+
+def track_plaid_waiter(priority, delta):
+    PLAID_WAITING.labels(priority).inc(delta)
+
+
+def observe_plaid_wait(operation, priority, seconds):
+    PLAID_WAIT_SECONDS.labels(operation, priority).observe(seconds)
+
+
+def record_plaid_rate_limit(operation, scope):
+    PLAID_RATE_LIMITED.labels(operation, scope).inc()
+
+
+def set_plaid_client_rate(rate):
+    PLAID_CLIENT_RATE.set(rate)
+
+
+def observe_response_size(route, fmt, encoding, raw_bytes, sent_bytes):
+    RESPONSE_BYTES.labels(route, fmt, encoding, "raw").observe(raw_bytes)
+    RESPONSE_BYTES.labels(route, fmt, encoding, "sent").observe(sent_bytes)
+
+
+def observe_request(method, route, status, seconds):
+    HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def render_metrics():
+    """(body, content_type) for a Prometheus scrape of this process (or all workers)."""
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        # Multi-worker deployments: aggregate every worker's metric files
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=multiproc_dir)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,453 @@
+# backend/job_queue.py - In-process priority job queue with global / per-user concurrency caps, cancellation and status
+#
+# Heavy work (webhook syncs, LLM descriptions, score persistence) is submitted
+# here instead of running on request threads:
+#
+#     job = JOBS.submit("plaid_sync", sync_plaid_item, item_id, user=uid, key=f"plaid_sync:{item_id}")
+#     job.wait(5.0)          # optional; poll GET /jobs/{job.id} otherwise
+#
+# An asyncio dispatcher on the app's event loop starts queued jobs, best
+# priority first, whenever a slot is free: at most max_concurrency jobs in
+# total, per_user_concurrency per user and one per key, with
+# interactive_reserve slots that only INTERACTIVE jobs may take. Sync job
+# functions run on the queue's own thread pool, never the request threadpool.
+#
+# Job state lives in the process. With JOB_STORE_PATH set, status is also
+# written to a SQLite file so any worker can answer a poll or pass on a cancel.
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import record_error, record_job, stage
+
+# Priorities, lowest first
+INTERACTIVE = 0  # a request is waiting on the result
+NORMAL = 5  # webhook syncs
+BACKGROUND = 10  # post-sync persistence, LLM descriptions
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("JOB_MAX_CONCURRENCY", "4"))
+DEFAULT_PER_USER_CONCURRENCY = int(os.getenv("JOB_PER_USER_CONCURRENCY", "2"))
+DEFAULT_INTERACTIVE_RESERVE = int(os.getenv("JOB_INTERACTIVE_RESERVE", "1"))
+DEFAULT_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+
+# Finished jobs kept in memory for status polling
+MAX_FINISHED_JOBS = 1000
+
+# Finished jobs kept in the SQLite store
+STORE_RETENTION_SECONDS = 24 * 3600
+
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+
+
+class QueueFull(Exception):
+    pass
+
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+def cancellation_requested():
+    """True when the job running in this thread was asked to stop; long loops check it between steps."""
+    job = _current_job.get()
+    return job is not None and job.cancel_requested()
+
+
+def current_priority():
+    """Priority of the job running in this thread; INTERACTIVE outside jobs, where a request is waiting."""
+    job = _current_job.get()
+    return INTERACTIVE if job is None else job.priority
+
+
+class SqliteJobStore:
+    """Job status rows shared by every worker process (one connection per process)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    def _connection(self):
+        # Connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, state TEXT NOT NULL,"
+                " cancel_requested INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def save(self, status):
+        data = json.dumps(status, default=str)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO jobs (id, status, state, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET status = excluded.status, state = excluded.state,"
+                " updated_at = excluded.updated_at",
+                (status["id"], data, status["state"], time.time()),
+            )
+            self._saves += 1
+            if self._saves % 500 == 0:
+                conn.execute(
+                    "DELETE FROM jobs WHERE state IN ('succeeded', 'failed', 'cancelled') AND updated_at < ?",
+                    (time.time() - STORE_RETENTION_SECONDS,),
+                )
+
+    def load(self, job_id):
+        with self._lock:
+            row = self._connection().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def request_cancel(self, job_id):
+        """Flag a job owned by another worker. Returns its last known status, or None."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND state NOT IN ('succeeded', 'failed', 'cancelled')",
+                (job_id,),
+            )
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def cancel_requested(self, job_id):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return bool(row and row[0])
+
+
+class Job:
+    def __init__(self, kind, fn, args, kwargs, user, priority, key, store):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.user = user
+        self.priority = priority
+        self.key = key
+        self.state = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.exception = None
+        self._store = store
+        self._cancel = False
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self.state in TERMINAL_STATES
+
+    def cancel_requested(self):
+        if self._cancel:
+            return True
+        # A cancel sent to another worker arrives through the shared store
+        return self._store is not None and self._store.cancel_requested(self.id)
+
+    def wait(self, timeout=None):
+        """Block until the job finishes. Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def status(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "user": self.user,
+            "priority": self.priority,
+            "state": self.state,
+            "cancel_requested": self._cancel,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result if self.state == "succeeded" else None,
+            "error": self.error,
+            "pid": os.getpid(),
+        }
+
+
+class JobQueue:
+    def __init__(self, name="jobs", max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 per_user_concurrency=DEFAULT_PER_USER_CONCURRENCY,
+                 interactive_reserve=DEFAULT_INTERACTIVE_RESERVE,
+                 max_queued=DEFAULT_MAX_QUEUED, store=None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.per_user_concurrency = per_user_concurrency
+        self.interactive_reserve = min(interactive_reserve, max_concurrency - 1)
+        self.max_queued = max_queued
+        self.store = store
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._pending = []  # heap of (priority, seq, job)
+        self._jobs = {}  # queued + running, by id
+        self._queued_by_key = {}
+        self._running_keys = set()
+        self._running_by_user = {}
+        self._finished = OrderedDict()
+        self._tasks = {}
+        self.counts = {outcome: 0 for outcome in ("queued", "coalesced", "rejected", "succeeded", "failed", "cancelled")}
+
+        self._loop = None
+        self._wake = None
+        self._dispatcher = None
+        self._executor = None
+
+    # ---- lifecycle (called from the app's lifespan) ----
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix=self.name)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        # Jobs submitted before startup
+        self._wake.set()
+
+    async def stop(self):
+        """Stop dispatching; queued jobs are cancelled, running ones are asked to stop."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self.cancel(job.id)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._loop = None
+
+    def _notify(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    # ---- submission / lookup (thread-safe) ----
+
+    def _count(self, outcome):
+        self.counts[outcome] += 1
+        record_job(self.name, outcome)
+
+    def submit(self, kind, fn, *args, user=None, priority=NORMAL, key=None, **kwargs):
+        """
+        Queue fn(*args, **kwargs). A job with the same key that is still queued
+        absorbs the submission (it runs once, with the newest arguments) and is
+        returned instead. Raises QueueFull when max_queued jobs are waiting.
+        """
+        with self._lock:
+            existing = self._queued_by_key.get(key) if key is not None else None
+            if existing is not None:
+                existing.args, existing.kwargs = args, kwargs
+                if priority < existing.priority:
+                    # Re-queue at the better priority; the old heap entry is skipped
+                    existing.priority = priority
+                    heapq.heappush(self._pending, (priority, next(self._seq), existing))
+                self._count("coalesced")
+                return existing
+
+            if sum(1 for j in self._jobs.values() if j.state == "queued") >= self.max_queued:
+                self._count("rejected")
+                raise QueueFull(f"{self.max_queued} jobs already queued")
+
+            job = Job(kind, fn, args, kwargs, user, priority, key, self.store)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._queued_by_key[key] = job
+            heapq.heappush(self._pending, (priority, next(self._seq), job))
+            self._count("queued")
+
+        self._save(job)
+        self._notify()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id) or self._finished.get(job_id)
+
+    def status(self, job_id):
+        """Status of a job from this worker or, with a store, any worker. None if unknown."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.status()
+        return self.store.load(job_id) if self.store is not None else None
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: queued jobs never start, running ones are flagged (sync
+        jobs stop at their next cancellation_requested() check, async ones are
+        cancelled outright). Returns the job's status, or None if unknown.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return self.store.request_cancel(job_id) if self.store is not None else None
+
+        task = None
+        with self._lock:
+            if job.state == "queued":
+                self._finish_locked(job, "cancelled")
+            elif job.state == "running":
+                job._cancel = True
+                task = self._tasks.get(job.id)
+        if task is not None and asyncio.iscoroutinefunction(job.fn):
+            self._loop.call_soon_threadsafe(task.cancel)
+        if job.done:
+            self._after_finish(job)
+        return job.status()
+
+    def stats(self):
+        with self._lock:
+            by_kind = {}
+            for job in self._jobs.values():
+                kind = by_kind.setdefault(job.kind, {"queued": 0, "running": 0})
+                kind[job.state] += 1
+            return {
+                "max_concurrency": self.max_concurrency,
+                "per_user_concurrency": self.per_user_concurrency,
+                "interactive_reserve": self.interactive_reserve,
+                "max_queued": self.max_queued,
+                "queued": sum(k["queued"] for k in by_kind.values()),
+                "running": sum(k["running"] for k in by_kind.values()),
+                "by_kind": by_kind,
+                "counts": dict(self.counts),
+            }
+
+    def recent(self, limit=50):
+        with self._lock:
+            active = [job.status() for job in self._jobs.values()]
+            finished = [job.status() for job in reversed(self._finished.values())][:limit]
+        return active + finished
+
+    # ---- dispatching ----
+
+    def _can_start(self, job, running):
+        limit = self.max_concurrency if job.priority <= INTERACTIVE else self.max_concurrency - self.interactive_reserve
+        if running >= limit:
+            return False
+        if job.user is not None and self._running_by_user.get(job.user, 0) >= self.per_user_concurrency:
+            return False
+        return job.key is None or job.key not in self._running_keys
+
+    def _take_runnable(self):
+        runnable, skipped, cancelled = [], [], []
+        with self._lock:
+            running = sum(1 for j in self._jobs.values() if j.state == "running")
+            while self._pending and running < self.max_concurrency:
+                entry = heapq.heappop(self._pending)
+                job = entry[2]
+                if job.state != "queued" or entry[0] != job.priority:
+                    continue  # cancelled, or re-queued at a better priority
+                if not self._can_start(job, running):
+                    skipped.append(entry)
+                    continue
+                if job.cancel_requested():
+                    self._finish_locked(job, "cancelled")
+                    cancelled.append(job)
+                    continue
+
+                job.state = "running"
+                job.started_at = time.time()
+                if job.key is not None:
+                    self._queued_by_key.pop(job.key, None)
+                    self._running_keys.add(job.key)
+                if job.user is not None:
+                    self._running_by_user[job.user] = self._running_by_user.get(job.user, 0) + 1
+                running += 1
+                runnable.append(job)
+            for entry in skipped:
+                heapq.heappush(self._pending, entry)
+        for job in cancelled:
+            self._after_finish(job)
+        return runnable
+
+    async def _dispatch(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            for job in self._take_runnable():
+                self._save(job)
+                self._tasks[job.id] = asyncio.create_task(self._run(job))
+
+    async def _run(self, job):
+        # Each task has its own context, so this only marks this job's code
+        _current_job.set(job)
+        state, result, error = "succeeded", None, None
+        try:
+            with stage(f"job_{job.kind}"):
+                if asyncio.iscoroutinefunction(job.fn):
+                    result = await job.fn(*job.args, **job.kwargs)
+                else:
+                    call = functools.partial(contextvars.copy_context().run, job.fn, *job.args, **job.kwargs)
+                    result = await self._loop.run_in_executor(self._executor, call)
+        except asyncio.CancelledError:
+            state = "cancelled"
+        except Exception as e:
+            state, error = "failed", e
+            record_error(f"job_{job.kind}", e)
+            print(f"[ERROR] Job {job.kind} {job.id} failed: {e}")
+        else:
+            # Returned early after seeing cancellation_requested()
+            if job.cancel_requested():
+                state = "cancelled"
+
+        with self._lock:
+            self._tasks.pop(job.id, None)
+            self._finish_locked(job, state, result, error)
+        self._after_finish(job)
+        self._wake.set()
+
+    def _finish_locked(self, job, state, result=None, error=None):
+        was_running = job.state == "running"
+        job.state = state
+        job.finished_at = time.time()
+        job.result = result
+        job.exception = error
+        job.error = f"{type(error).__name__}: {error}" if error is not None else None
+
+        self._jobs.pop(job.id, None)
+        if job.key is not None:
+            if self._queued_by_key.get(job.key) is job:
+                del self._queued_by_key[job.key]
+            if was_running:
+                self._running_keys.discard(job.key)
+        if was_running and job.user is not None:
+            remaining = self._running_by_user.get(job.user, 1) - 1
+            if remaining:
+                self._running_by_user[job.user] = remaining
+            else:
+                self._running_by_user.pop(job.user, None)
+
+        self._finished[job.id] = job
+        while len(self._finished) > MAX_FINISHED_JOBS:
+            self._finished.popitem(last=False)
+        self._count(state)
+
+    def _after_finish(self, job):
+        # Outside the lock: wake waiters and persist the final state
+        job._done.set()
+        self._save(job)
+
+    def _save(self, job):
+        if self.store is None:
+            return
+        try:
+            self.store.save(job.status())
+        except Exception as e:
+            record_error("job_store", e)
+            print(f"[ERROR] Job store write failed for {job.id}: {e}")
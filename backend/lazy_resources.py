@@ -0,0 +1,74 @@
+# backend/lazy_resources.py - Clients and configs built on first use, with warm-up state for readiness checks
+import threading
+import time
+
+
+class LazyResource:
+    """
+    Builds `factory()` once, on the first get() (or warm-up), and reuses it.
+    A failed build is recorded and retried on the next get() instead of
+    taking the whole process down at import time.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+        self.state = "pending"
+        self.error = None
+        self.load_seconds = None
+        REGISTRY.append(self)
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def get(self):
+        if self.state == "ready":
+            return self._value
+        with self._lock:
+            if self.state == "ready":
+                return self._value
+
+            self.state = "loading"
+            started = time.perf_counter()
+            try:
+                value = self._factory()
+            except Exception as e:
+                self.state = "error"
+                self.error = f"{type(e).__name__}: {e}"
+                self.load_seconds = time.perf_counter() - started
+                raise
+
+            self._value = value
+            self.error = None
+            self.load_seconds = time.perf_counter() - started
+            self.state = "ready"
+            return value
+
+    def status(self):
+        return {
+            "state": self.state,
+            "load_ms": round(self.load_seconds * 1000.0, 1) if self.load_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+# Every LazyResource, in creation order (dependencies are created first)
+REGISTRY = []
+
+
+def warm_up(resources=None):
+    """Build every resource now. Failures are recorded, not raised. Returns True if all are ready."""
+    for resource in resources or REGISTRY:
+        try:
+            resource.get()
+        except Exception as e:
+            print(f"[ERROR] Warm-up failed for {resource.name}: {e}")
+    return all(r.ready for r in resources or REGISTRY)
+
+
+def readiness(resources=None):
+    resources = resources or REGISTRY
+    return all(r.ready for r in resources), {r.name: r.status() for r in resources}
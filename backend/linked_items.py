@@ -0,0 +1,115 @@
+# backend/linked_items.py - A user's linked Plaid items, fetched concurrently and merged into one window
+#
+# users/{uid} keeps every linked item in a map, so a user can link several
+# institutions:
+#
+#   plaid_items: {item_id: {"access_token": ..., "linked_at": ...}}
+#
+# Documents written before that hold a single top-level access_token / item_id,
+# which user_items() still reads. Per-item Plaid calls run concurrently on a
+# shared pool of PLAID_ITEM_FETCH_CONCURRENCY threads, so a window costs the
+# slowest item's latency rather than the sum; each item still has its own
+# plaid_governor budget (keyed by access token).
+#
+#   items = user_items(user_doc)
+#   results, errors = fetch_items(items, fetch_plaid_transactions, start_date, end_date, 500)
+#   check_item_errors(results, errors)      # raises unless some item answered
+#   plaid_txns = merge_transactions(results.values())
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from instrumentation import record_error
+from plaid_governor import PlaidThrottled
+from transaction_sync import register_item
+
+ITEMS_FIELD = "plaid_items"
+
+# Per-item Plaid calls in flight at once across the process
+ITEM_FETCH_CONCURRENCY = int(os.getenv("PLAID_ITEM_FETCH_CONCURRENCY", "8"))
+
+_POOL = ThreadPoolExecutor(ITEM_FETCH_CONCURRENCY, thread_name_prefix="plaid-items")
+
+
+def user_items(user_data):
+    """[{"item_id", "access_token"}, ...] for a users/{uid} document, legacy single-token field included."""
+    items = {}
+    for item_id, item in (user_data.get(ITEMS_FIELD) or {}).items():
+        if item and item.get("access_token"):
+            items[item_id] = item["access_token"]
+
+    legacy_token = user_data.get("access_token")
+    if legacy_token and legacy_token not in items.values():
+        items[user_data.get("item_id") or legacy_token] = legacy_token
+    return [{"item_id": item_id, "access_token": token} for item_id, token in items.items()]
+
+
+def link_item(db, uid, item_id, access_token):
+    """Add an item to the user's linked items and route its webhooks to the user."""
+    db.collection("users").document(uid).set({
+        "uid": uid,
+        ITEMS_FIELD: {item_id: {"access_token": access_token, "linked_at": datetime.now(timezone.utc)}},
+    }, merge=True)
+    register_item(db, item_id, uid, access_token)
+
+
+def fetch_items(items, fetch, *args, **kwargs):
+    """
+    Call fetch(access_token, *args, **kwargs) for every item, concurrently.
+    Returns ({item_id: result}, {item_id: exception}) in item order; a failing
+    item doesn't stop the others. A single item is fetched on the caller's thread.
+    """
+    if len(items) == 1:
+        item = items[0]
+        try:
+            return {item["item_id"]: fetch(item["access_token"], *args, **kwargs)}, {}
+        except Exception as e:
+            return {}, {item["item_id"]: e}
+
+    # A copy of the caller's context per call keeps its Plaid priority and profile capture
+    futures = {
+        item["item_id"]: _POOL.submit(contextvars.copy_context().run, fetch, item["access_token"], *args, **kwargs)
+        for item in items
+    }
+    results, errors = {}, {}
+    for item_id, future in futures.items():
+        try:
+            results[item_id] = future.result()
+        except Exception as e:
+            errors[item_id] = e
+    return results, errors
+
+
+def merge_transactions(per_item):
+    """
+    One newest-first list from several items' Plaid transactions. A
+    transaction_id seen twice (an item linked twice) is kept once, and a
+    pending transaction is dropped once its posted version has arrived.
+    """
+    by_tid = {}
+    for txns in per_item:
+        for t in txns:
+            by_tid.setdefault(t["transaction_id"], t)
+
+    posted = {t.get("pending_transaction_id") for t in by_tid.values() if not t.get("pending")}
+    merged = [t for tid, t in by_tid.items() if tid not in posted]
+    merged.sort(key=lambda t: str(t["date"]), reverse=True)
+    return merged
+
+
+def check_item_errors(results, errors):
+    """
+    Raise when fetch_items() can't give a usable answer: an item was throttled
+    (the caller answers 503 so the client retries the whole request) or every
+    item failed. Otherwise log the failed items and return their ids.
+    """
+    for e in errors.values():
+        if isinstance(e, PlaidThrottled):
+            raise e
+    if errors and not results:
+        raise next(iter(errors.values()))
+    for item_id, e in errors.items():
+        record_error("plaid_fetch_item", e)
+        print(f"[ERROR] Plaid fetch failed for item {item_id}: {e}")
+    return list(errors)
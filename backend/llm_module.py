@@ -2,6 +2,8 @@
 import os
 import requests
 
+from prompt_builder import build_gemini_prompt, DEFAULT_PROMPT_TOKEN_BUDGET
+
 # -----------------------------
 # Hugging Face model config
 # -----------------------------
@@ -40,26 +42,21 @@ def generate_gemini_suggestion(
     transaction_amount: float,
     category: str,
     user_context: dict = None,
-    max_tokens: int = 150
+    max_tokens: int = 150,
+    max_prompt_tokens: int = DEFAULT_PROMPT_TOKEN_BUDGET
 ) -> str:
     """
     Generate up to 3 cheaper alternatives and 1 micro-action for a transaction.
+    user_context is projected down to the scoring fields and the prompt is kept
+    within max_prompt_tokens (see prompt_builder).
     """
-    prompt = f"""
-You are Clarity Cash AI, a friendly budgeting assistant.
-
-Transaction:
-- Name: {transaction_name}
-- Amount: ${transaction_amount}
-- Category: {category}
-
-User context: {user_context}
-
-Generate:
-1. Up to 3 cheaper alternatives (Gemini options) with price and short explanation.
-2. One micro-action to optimize user's spending related to this transaction.
-3. Keep the tone friendly, concise, and playful. Include emoji if appropriate.
-"""
+    prompt, _ = build_gemini_prompt(
+        transaction_name,
+        transaction_amount,
+        category,
+        user_context=user_context,
+        max_prompt_tokens=max_prompt_tokens,
+    )
     payload = {"inputs": prompt, "parameters": {"max_new_tokens": max_tokens}}
     response = requests.post(
         f"https://api-inference.huggingface.co/models/{HF_MODEL}",
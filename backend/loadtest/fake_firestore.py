@@ -0,0 +1,257 @@
+# backend/loadtest/fake_firestore.py - In-memory stand-in for the Firestore client (load tests, local runs)
+#
+# Covers the subset of google.cloud.firestore the backend uses: documents,
+# subcollections, merge writes, batched writes, get_all and simple queries
+# (where / order_by / start_after / limit / select). Data lives in process
+# memory, so each app worker gets its own copy.
+import copy
+import threading
+
+# What FieldPath.document_id() renders to
+DOCUMENT_ID = "__name__"
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+def _field_value(doc_id, data, field):
+    if field == DOCUMENT_ID:
+        return doc_id
+    value = data
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _merge(target, updates):
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return _field_value(self.id, self._data or {}, field)
+
+
+class FakeDocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self._path = path
+        self.id = path[-1]
+
+    @property
+    def path(self):
+        return "/".join(self._path)
+
+    def collection(self, name):
+        return FakeCollectionReference(self._client, self._path + (name,))
+
+    def get(self):
+        return FakeDocumentSnapshot(self, self._client._read(self._path))
+
+    def set(self, data, merge=False):
+        self._client._write(self._path, data, merge)
+
+    def update(self, data):
+        if self._client._read(self._path) is None:
+            raise KeyError(f"No document to update: {self.path}")
+        self._client._write(self._path, data, merge=True)
+
+    def delete(self):
+        self._client._delete(self._path)
+
+
+class FakeQuery:
+    def __init__(self, collection, filters=(), orders=(), limit=None, cursor=None):
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._cursor = cursor
+
+    def _copy(self, **changes):
+        state = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit": self._limit,
+            "cursor": self._cursor,
+        }
+        state.update(changes)
+        return FakeQuery(self._collection, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(cursor=document_fields_or_snapshot)
+
+    def select(self, field_paths):
+        # Projection only saves bandwidth on the real client; return full docs
+        return self
+
+    def _cursor_values(self):
+        cursor = self._cursor
+        if isinstance(cursor, FakeDocumentSnapshot):
+            return tuple(cursor.get(field) for field, _ in self._orders)
+        values = []
+        for field, _ in self._orders:
+            value = cursor.get(field)
+            if isinstance(value, FakeDocumentReference):
+                value = value.id
+            values.append(value)
+        return tuple(values)
+
+    def stream(self):
+        docs = self._collection._documents()
+        for field, op, value in self._filters:
+            docs = [(i, d) for i, d in docs if _OPERATORS[op](_field_value(i, d, field), value)]
+
+        # Firestore always breaks ties on the document id
+        orders = self._orders or ((DOCUMENT_ID, ASCENDING),)
+        for field, direction in reversed(orders):
+            docs.sort(key=lambda item: _field_value(item[0], item[1], field), reverse=direction == DESCENDING)
+
+        if self._cursor is not None:
+            after = self._cursor_values()
+            keys = [field for field, _ in self._orders]
+            directions = [direction for _, direction in self._orders]
+            docs = [
+                (i, d) for i, d in docs
+                if _is_after(tuple(_field_value(i, d, k) for k in keys), after, directions)
+            ]
+
+        if self._limit is not None:
+            docs = docs[:self._limit]
+
+        for doc_id, data in docs:
+            yield FakeDocumentSnapshot(self._collection.document(doc_id), data)
+
+    def get(self):
+        return list(self.stream())
+
+
+def _is_after(values, cursor, directions):
+    for value, bound, direction in zip(values, cursor, directions):
+        if value == bound:
+            continue
+        if direction == DESCENDING:
+            return value < bound
+        return value > bound
+    return False
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client, path):
+        super().__init__(self)
+        self._client = client
+        self._path = path
+        self.id = path[-1]
+
+    def document(self, document_id):
+        return FakeDocumentReference(self._client, self._path + (document_id,))
+
+    def _documents(self):
+        return self._client._list(self._path)
+
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append(("set", reference, data, merge))
+
+    def update(self, reference, data):
+        self._ops.append(("update", reference, data, True))
+
+    def delete(self, reference):
+        self._ops.append(("delete", reference, None, False))
+
+    def commit(self):
+        if len(self._ops) > self._client.batch_limit:
+            raise ValueError(f"Batch of {len(self._ops)} writes exceeds {self._client.batch_limit}")
+        with self._client._lock:
+            for op, reference, data, merge in self._ops:
+                if op == "delete":
+                    self._client._delete(reference._path)
+                else:
+                    self._client._write(reference._path, data, merge)
+            self._client.commits += 1
+        self._ops = []
+
+
+class FakeFirestoreClient:
+    """Thread-safe in-memory Firestore. `commits` counts committed batches."""
+
+    def __init__(self, batch_limit=500):
+        self.batch_limit = batch_limit
+        self.commits = 0
+        self._lock = threading.RLock()
+        # {collection path tuple: {document id: data}}
+        self._collections = {}
+
+    def collection(self, name):
+        return FakeCollectionReference(self, (name,))
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def get_all(self, references, field_paths=None):
+        for reference in references:
+            yield reference.get()
+
+    def _read(self, path):
+        with self._lock:
+            data = self._collections.get(path[:-1], {}).get(path[-1])
+            return copy.deepcopy(data)
+
+    def _write(self, path, data, merge):
+        with self._lock:
+            docs = self._collections.setdefault(path[:-1], {})
+            if merge and path[-1] in docs:
+                _merge(docs[path[-1]], data)
+            else:
+                docs[path[-1]] = copy.deepcopy(data)
+
+    def _delete(self, path):
+        with self._lock:
+            self._collections.get(path[:-1], {}).pop(path[-1], None)
+
+    def _list(self, path):
+        with self._lock:
+            return [(doc_id, copy.deepcopy(data)) for doc_id, data in self._collections.get(path, {}).items()]
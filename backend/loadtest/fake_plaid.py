@@ -0,0 +1,452 @@
+# backend/loadtest/fake_plaid.py - Local stand-in for the Plaid API, serving recorded or synthetic transactions_get payloads
+#
+# Usage (from backend/):
+#   python loadtest/fake_plaid.py --port 8011                          # synthetic users
+#   python loadtest/fake_plaid.py --payload-dir loadtest/payloads      # recorded payloads
+#
+# Point the backend at it with PLAID_HOST=http://127.0.0.1:8011.
+#
+# /transactions/sync serves each item's history as "added" events, followed by
+# whatever /sandbox/item/fire_webhook simulated since (new pending purchases,
+# pendings that posted, amended amounts). With --webhook-url, fire_webhook also
+# POSTs the SYNC_UPDATES_AVAILABLE webhook there, like Plaid does.
+#
+# --item-rate-limit / --client-rate-limit (calls per minute) make it answer 429
+# RATE_LIMIT_EXCEEDED like Plaid, to exercise the backend's rate governor.
+#
+# Recorded payloads are transactions_get responses saved as JSON, e.g.
+#   json.dump(client.transactions_get(request).to_dict(), f, default=str)
+# Load-test users are assigned to them round-robin, with dates shifted so the
+# newest transaction lands on today.
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LOADTEST_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(LOADTEST_DIR.parent / "benchmarks"))
+sys.path.insert(0, str(LOADTEST_DIR))
+
+from synthetic_users import generate_plaid_transactions, load_taxonomy
+from users import access_token, is_stressed, item_id, token_item, transaction_count, user_index
+
+ACCOUNT_ID = "acc-synthetic-checking"
+
+# A user's further items are generated from seeds this far apart, so their
+# transaction ids never collide with another user's
+ITEM_SEED_STRIDE = 1_000_000
+
+# Fields Plaid always sends; the client library refuses payloads without them
+TRANSACTION_DEFAULTS = {
+    "account_owner": None,
+    "authorized_datetime": None,
+    "category_id": None,
+    "check_number": None,
+    "counterparties": [],
+    "datetime": None,
+    "logo_url": None,
+    "merchant_entity_id": None,
+    "pending_transaction_id": None,
+    "transaction_code": None,
+    "unofficial_currency_code": None,
+    "website": None,
+}
+LOCATION_DEFAULTS = {"store_number": None}
+PAYMENT_META_DEFAULTS = {"payment_processor": None, "ppd_id": None, "reason": None}
+COUNTERPARTY_DEFAULTS = {"entity_id": None, "logo_url": None, "website": None, "phone_number": None}
+
+ACCOUNT = {
+    "account_id": ACCOUNT_ID,
+    "balances": {
+        "available": 1250.0,
+        "current": 1310.0,
+        "limit": None,
+        "iso_currency_code": "USD",
+        "unofficial_currency_code": None,
+    },
+    "mask": "0000",
+    "name": "Plaid Checking",
+    "official_name": "Plaid Gold Standard 0% Interest Checking",
+    "type": "depository",
+    "subtype": "checking",
+}
+
+
+def _json_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _json_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_json_value(v) for v in value]
+    return value
+
+
+def to_plaid_json(txn):
+    """A Plaid-shaped dict (date objects allowed) as the JSON Plaid would send."""
+    out = {**TRANSACTION_DEFAULTS, **_json_value(txn)}
+    out["location"] = {**LOCATION_DEFAULTS, **(out.get("location") or {})}
+    out["payment_meta"] = {**PAYMENT_META_DEFAULTS, **(out.get("payment_meta") or {})}
+    out["counterparties"] = [{**COUNTERPARTY_DEFAULTS, **c} for c in out["counterparties"]]
+    return out
+
+
+def _item(item_id):
+    return {
+        "item_id": item_id,
+        "institution_id": "ins_109508",
+        "webhook": None,
+        "error": None,
+        "available_products": [],
+        "billed_products": ["transactions"],
+        "consent_expiration_time": None,
+        "update_type": "background",
+    }
+
+
+def _plaid_error(status, error_type, error_code, message):
+    return JSONResponse(status_code=status, content={
+        "error_type": error_type,
+        "error_code": error_code,
+        "error_message": message,
+        "display_message": None,
+        "request_id": uuid.uuid4().hex,
+    })
+
+
+class RateLimiter:
+    """Plaid-style sliding one-minute call limits per item (access token) and for the whole client."""
+
+    def __init__(self, item_per_minute=None, client_per_minute=None):
+        self.item_per_minute = item_per_minute
+        self.client_per_minute = client_per_minute
+        self._item_calls = {}
+        self._client_calls = deque()
+        self.rejected = 0
+
+    @staticmethod
+    def _admit(calls, limit, now):
+        while calls and calls[0] <= now - 60.0:
+            calls.popleft()
+        if len(calls) >= limit:
+            return False
+        calls.append(now)
+        return True
+
+    def check(self, access_token, item_error_code):
+        """None if the call may proceed, else the 429 error response."""
+        now = time.monotonic()
+        if self.client_per_minute and not self._admit(self._client_calls, self.client_per_minute, now):
+            self.rejected += 1
+            return _plaid_error(429, "RATE_LIMIT_EXCEEDED", "RATE_LIMIT", "rate limit exceeded for client")
+        if self.item_per_minute and access_token:
+            calls = self._item_calls.setdefault(access_token, deque())
+            if not self._admit(calls, self.item_per_minute, now):
+                self.rejected += 1
+                return _plaid_error(429, "RATE_LIMIT_EXCEEDED", item_error_code, "rate limit exceeded for item")
+        return None
+
+
+class PayloadStore:
+    """
+    Transactions per access token, newest first. Load-test tokens map to
+    recorded payloads round-robin, or to a synthetic user when there are none.
+    Items changed by fire_update() keep a live copy plus a sync event log.
+    """
+
+    def __init__(self, payload_dir=None, seed=0):
+        self.seed = seed
+        self._live = {}
+        self._events = {}
+        self._lock = threading.Lock()
+        self.recorded = []
+        if payload_dir:
+            for path in sorted(Path(payload_dir).glob("*.json")):
+                self.recorded.append(self._shift_to_today(json.loads(path.read_text())["transactions"]))
+            if not self.recorded:
+                raise ValueError(f"No *.json payloads in {payload_dir}")
+        self.taxonomy = None if self.recorded else load_taxonomy()
+
+    @staticmethod
+    def _shift_to_today(transactions):
+        newest = max(date.fromisoformat(str(t["date"])) for t in transactions)
+        shift = date.today() - newest
+        shifted = []
+        for t in transactions:
+            t = dict(t)
+            for field in ("date", "authorized_date"):
+                if t.get(field):
+                    t[field] = date.fromisoformat(str(t[field])) + shift
+            shifted.append(t)
+        return shifted
+
+    @lru_cache(maxsize=4096)
+    def transactions(self, access_token):
+        index = user_index(access_token)
+        if index is None:
+            return None
+
+        if self.recorded:
+            txns = self.recorded[(index + token_item(access_token)) % len(self.recorded)]
+        else:
+            txns = generate_plaid_transactions(
+                transaction_count(index),
+                seed=self.seed + index + token_item(access_token) * ITEM_SEED_STRIDE,
+                stressed=is_stressed(index),
+                taxonomy=self.taxonomy,
+            )
+
+        txns = [to_plaid_json(t) for t in txns]
+        txns.sort(key=lambda t: t["date"], reverse=True)
+        return txns
+
+    def current(self, access_token):
+        """Transactions as they stand now (including fired updates), newest first."""
+        with self._lock:
+            live = self._live.get(access_token)
+            if live is None:
+                return self.transactions(access_token)
+            return sorted(live.values(), key=lambda t: t["date"], reverse=True)
+
+    def _sync_events(self, access_token):
+        # The initial history is one "added" event per transaction, oldest first
+        events = self._events.get(access_token)
+        if events is None:
+            events = [("added", t) for t in reversed(self.transactions(access_token))]
+            self._events[access_token] = events
+        return events
+
+    def sync_page(self, access_token, cursor, count):
+        """(added, modified, removed, next_cursor, has_more) for the events after cursor."""
+        if self.transactions(access_token) is None:
+            return None
+        with self._lock:
+            events = self._sync_events(access_token)
+            start = int(cursor) if cursor else 0
+            page = events[start:start + count]
+            end = start + len(page)
+            has_more = end < len(events)
+
+        added = [t for kind, t in page if kind == "added"]
+        modified = [t for kind, t in page if kind == "modified"]
+        removed = [t for kind, t in page if kind == "removed"]
+        return added, modified, removed, str(end), has_more
+
+    def fire_update(self, access_token, rng, new_count=3):
+        """
+        Simulate fresh activity on an item: pendings from the last update post
+        under new ids, new_count new pending purchases arrive and one recent
+        purchase has its amount amended. Returns the number of sync events added.
+        """
+        if self.transactions(access_token) is None:
+            return None
+        with self._lock:
+            events = self._sync_events(access_token)
+            live = self._live.get(access_token)
+            if live is None:
+                live = {t["transaction_id"]: t for t in self.transactions(access_token)}
+                self._live[access_token] = live
+            before = len(events)
+            today = date.today().isoformat()
+
+            for pending in [t for t in live.values() if t["pending"]]:
+                del live[pending["transaction_id"]]
+                events.append(("removed", {"transaction_id": pending["transaction_id"], "account_id": ACCOUNT_ID}))
+                posted = {**pending, "transaction_id": f"txn-{uuid.uuid4().hex[:16]}", "pending": False,
+                          "pending_transaction_id": pending["transaction_id"]}
+                live[posted["transaction_id"]] = posted
+                events.append(("added", posted))
+
+            spending = [t for t in live.values() if t["amount"] > 0 and not t["pending"]]
+            for source in rng.sample(spending, min(new_count, len(spending))):
+                txn = {**source, "transaction_id": f"txn-{uuid.uuid4().hex[:16]}", "date": today,
+                       "authorized_date": today, "pending": True, "pending_transaction_id": None}
+                live[txn["transaction_id"]] = txn
+                events.append(("added", txn))
+
+            recent = sorted(spending, key=lambda t: t["date"], reverse=True)[:20]
+            if recent:
+                amended = dict(rng.choice(recent))
+                amended["amount"] = round(amended["amount"] * 1.2, 2)
+                live[amended["transaction_id"]] = amended
+                events.append(("modified", amended))
+
+            return len(events) - before
+
+
+def create_app(store, latency_ms=150.0, seed=0, webhook_url=None, limiter=None):
+    """
+    Fake Plaid API. Every call sleeps ~latency_ms (lognormal jitter) to stand
+    in for the network + Plaid's own processing time.
+    """
+    app = FastAPI(title="Fake Plaid")
+    limiter = limiter or RateLimiter()
+    rng = np.random.default_rng(seed)
+    update_rng = random.Random(seed)
+    webhook_tasks = set()
+
+    async def plaid_latency():
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms * float(rng.lognormal(0.0, 0.35)) / 1000.0)
+
+    @app.post("/transactions/get")
+    async def transactions_get(request: Request):
+        body = await request.json()
+        await plaid_latency()
+        limited = limiter.check(body.get("access_token"), "TRANSACTIONS_LIMIT")
+        if limited is not None:
+            return limited
+
+        txns = store.current(body.get("access_token", ""))
+        if txns is None:
+            return _plaid_error(400, "INVALID_INPUT", "INVALID_ACCESS_TOKEN", "provided access token is not valid")
+
+        start, end = body["start_date"], body["end_date"]
+        options = body.get("options") or {}
+        count = int(options.get("count", 100))
+        offset = int(options.get("offset", 0))
+
+        in_window = [t for t in txns if start <= t["date"] <= end]
+        return {
+            "accounts": [ACCOUNT],
+            "transactions": in_window[offset:offset + count],
+            "total_transactions": len(in_window),
+            "item": _item(item_id(user_index(body["access_token"]), token_item(body["access_token"]))),
+            "request_id": uuid.uuid4().hex,
+        }
+
+    @app.post("/transactions/sync")
+    async def transactions_sync(request: Request):
+        body = await request.json()
+        await plaid_latency()
+        limited = limiter.check(body.get("access_token"), "TRANSACTIONS_SYNC_LIMIT")
+        if limited is not None:
+            return limited
+
+        count = min(int(body.get("count", 100)), 500)
+        page = store.sync_page(body.get("access_token", ""), body.get("cursor"), count)
+        if page is None:
+            return _plaid_error(400, "INVALID_INPUT", "INVALID_ACCESS_TOKEN", "provided access token is not valid")
+
+        added, modified, removed, next_cursor, has_more = page
+        return {
+            "transactions_update_status": "HISTORICAL_UPDATE_COMPLETE",
+            "accounts": [ACCOUNT],
+            "added": added,
+            "modified": modified,
+            "removed": removed,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "request_id": uuid.uuid4().hex,
+        }
+
+    async def post_webhook(payload):
+        import httpx
+
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                await client.post(webhook_url, json=payload)
+        except httpx.HTTPError as e:
+            print(f"[ERROR] Webhook delivery to {webhook_url} failed: {e}")
+
+    @app.post("/sandbox/item/fire_webhook")
+    async def sandbox_item_fire_webhook(request: Request):
+        body = await request.json()
+        await plaid_latency()
+
+        token = body.get("access_token", "")
+        webhook_code = body.get("webhook_code", "SYNC_UPDATES_AVAILABLE")
+        if webhook_code in ("SYNC_UPDATES_AVAILABLE", "DEFAULT_UPDATE"):
+            if store.fire_update(token, update_rng, int(body.get("new_transactions", 3))) is None:
+                return _plaid_error(400, "INVALID_INPUT", "INVALID_ACCESS_TOKEN", "provided access token is not valid")
+
+        if webhook_url:
+            # Delivered after the response, as Plaid does
+            task = asyncio.create_task(post_webhook({
+                "webhook_type": body.get("webhook_type", "TRANSACTIONS"),
+                "webhook_code": webhook_code,
+                "item_id": item_id(user_index(token), token_item(token)),
+                "initial_update_complete": True,
+                "historical_update_complete": True,
+                "environment": "sandbox",
+            }))
+            webhook_tasks.add(task)
+            task.add_done_callback(webhook_tasks.discard)
+        return {"webhook_fired": True, "request_id": uuid.uuid4().hex}
+
+    @app.post("/accounts/get")
+    async def accounts_get(request: Request):
+        body = await request.json()
+        await plaid_latency()
+        limited = limiter.check(body.get("access_token"), "ACCOUNTS_LIMIT")
+        if limited is not None:
+            return limited
+        if user_index(body.get("access_token", "")) is None:
+            return _plaid_error(400, "INVALID_INPUT", "INVALID_ACCESS_TOKEN", "provided access token is not valid")
+        return {
+            "accounts": [ACCOUNT],
+            "item": _item(item_id(user_index(body["access_token"]), token_item(body["access_token"]))),
+            "request_id": uuid.uuid4().hex,
+        }
+
+    @app.post("/link/token/create")
+    async def link_token_create(request: Request):
+        await request.json()
+        await plaid_latency()
+        return {
+            "link_token": f"link-sandbox-{uuid.uuid4()}",
+            "expiration": (date.today() + timedelta(days=1)).isoformat() + "T00:00:00Z",
+            "request_id": uuid.uuid4().hex,
+        }
+
+    @app.post("/item/public_token/exchange")
+    async def item_public_token_exchange(request: Request):
+        body = await request.json()
+        await plaid_latency()
+        # public-loadtest-00042 exchanges for access-loadtest-00042
+        index = user_index(body.get("public_token", "").replace("public-", "access-", 1))
+        if index is None:
+            return _plaid_error(400, "INVALID_INPUT", "INVALID_PUBLIC_TOKEN", "provided public token is not valid")
+        return {
+            "access_token": access_token(index),
+            "item_id": item_id(index),
+            "request_id": uuid.uuid4().hex,
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Plaid API for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Mean simulated Plaid latency")
+    parser.add_argument("--payload-dir", help="Directory of recorded transactions_get JSON payloads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--webhook-url", help="Where fire_webhook delivers webhooks, e.g. http://127.0.0.1:8010/plaid/webhook")
+    parser.add_argument("--item-rate-limit", type=int, help="Calls per minute per item before answering 429")
+    parser.add_argument("--client-rate-limit", type=int, help="Calls per minute in total before answering 429")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    store = PayloadStore(args.payload_dir, seed=args.seed)
+    limiter = RateLimiter(args.item_rate_limit, args.client_rate_limit)
+    app = create_app(store, args.latency_ms, args.seed, args.webhook_url, limiter)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
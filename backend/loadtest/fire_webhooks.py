@@ -0,0 +1,106 @@
+# backend/loadtest/fire_webhooks.py - Trigger Plaid transactions webhooks against a backend running on the fakes
+#
+# Usage (from backend/, with fake_plaid.py --webhook-url http://127.0.0.1:8010/plaid/webhook
+# and serve_app.py running):
+#   python loadtest/fire_webhooks.py --users 50                     # new activity + webhook per item
+#   python loadtest/fire_webhooks.py --users 50 --repeat 5          # 5 webhooks per item, to exercise dedupe
+#   python loadtest/fire_webhooks.py --users 50 --direct            # POST webhooks straight to the backend
+#
+# By default each item first gets simulated activity through fake Plaid's
+# /sandbox/item/fire_webhook, which then delivers the webhook itself. --direct
+# skips fake Plaid and only posts the webhook bodies. With --admin-token the
+# script waits for the backend's sync jobs to drain and prints the job counters.
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from users import access_token, item_id
+
+WEBHOOK_CODES = ("SYNC_UPDATES_AVAILABLE", "DEFAULT_UPDATE")
+
+
+def webhook_body(index, webhook_code):
+    return {
+        "webhook_type": "TRANSACTIONS",
+        "webhook_code": webhook_code,
+        "item_id": item_id(index),
+        "initial_update_complete": True,
+        "historical_update_complete": True,
+        "environment": "sandbox",
+    }
+
+
+async def fire(args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    statuses = {}
+
+    async def one(client, index):
+        async with semaphore:
+            if args.direct:
+                response = await client.post(f"{args.base_url}/plaid/webhook", json=webhook_body(index, args.webhook_code))
+                key = response.json()["status"] if response.is_success else response.status_code
+            else:
+                response = await client.post(f"{args.plaid_url}/sandbox/item/fire_webhook", json={
+                    "access_token": access_token(index),
+                    "webhook_code": args.webhook_code,
+                    "new_transactions": args.new_transactions,
+                })
+                key = "fired" if response.is_success else response.status_code
+            statuses[key] = statuses.get(key, 0) + 1
+
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            one(client, index)
+            for _ in range(args.repeat)
+            for index in range(args.users)
+        ))
+        print(f"Sent {args.users * args.repeat} webhooks in {time.perf_counter() - started:.2f}s: {statuses}")
+
+        if args.admin_token:
+            await wait_for_syncs(client, args)
+
+
+async def wait_for_syncs(client, args):
+    headers = {"X-Admin-Token": args.admin_token}
+    started = time.perf_counter()
+    # Webhooks via fake Plaid arrive a moment after fire_webhook returns
+    await asyncio.sleep(0.5)
+    while True:
+        status = (await client.get(f"{args.base_url}/admin/jobs", headers=headers)).json()
+        syncs = status["by_kind"].get("plaid_sync", {"queued": 0, "running": 0})
+        if not syncs["queued"] and not syncs["running"]:
+            break
+        if time.perf_counter() - started > args.timeout:
+            print(f"Timed out waiting for the syncs: {status['by_kind']}")
+            return
+        await asyncio.sleep(0.25)
+    print(f"Syncs drained after {time.perf_counter() - started:.2f}s: {status['counts']}")
+    failed = [job for job in status["jobs"] if job["kind"] == "plaid_sync" and job["state"] == "failed"]
+    if failed:
+        print(f"Last failure: {failed[0]['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire Plaid transactions webhooks at the backend.")
+    parser.add_argument("--users", type=int, default=10, help="Load-test users / items 0..N-1")
+    parser.add_argument("--repeat", type=int, default=1, help="Webhooks per item")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--webhook-code", choices=WEBHOOK_CODES, default="SYNC_UPDATES_AVAILABLE")
+    parser.add_argument("--new-transactions", type=int, default=3, help="New pending purchases per fired update")
+    parser.add_argument("--direct", action="store_true", help="POST to the backend instead of going through fake Plaid")
+    parser.add_argument("--plaid-url", default="http://127.0.0.1:8011")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8010")
+    parser.add_argument("--admin-token", help="ADMIN_API_TOKEN of the backend; wait for its sync jobs to drain")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(fire(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
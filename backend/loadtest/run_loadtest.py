@@ -0,0 +1,326 @@
+# backend/loadtest/run_loadtest.py - Drive dashboard traffic at the backend and report per-endpoint latency
+#
+# Usage (from backend/):
+#   python loadtest/run_loadtest.py                                  # boots fake Plaid + the app, 30s run
+#   python loadtest/run_loadtest.py --users 500 --concurrency 64 --duration 60
+#   python loadtest/run_loadtest.py --mix dashboard=60,description=30,summary=10
+#   python loadtest/run_loadtest.py --base-url http://127.0.0.1:8010 # app already running (serve_app.py)
+#   python loadtest/run_loadtest.py --compare results/old.json results/new.json
+#
+# Each virtual user loops: pick a scenario from the mix, run it, think, repeat.
+# Latency is measured client-side over real HTTP, so it covers routing,
+# serialization, the Plaid round trip and scoring.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+LOADTEST_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = LOADTEST_DIR.parent
+RESULTS_DIR = LOADTEST_DIR / "results"
+sys.path.insert(0, str(LOADTEST_DIR))
+
+from users import user_id
+
+# Weighted scenarios; a dashboard load is what dashboard.tsx fires on mount
+DEFAULT_MIX = {
+    "dashboard": 60,
+    "bucket_switch": 15,
+    "description": 15,
+    "summary": 10,
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint, seconds, status):
+        self.samples[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+        if status >= 400:
+            self.errors[endpoint] += 1
+
+    def report(self, elapsed):
+        rows = []
+        for endpoint in sorted(self.samples):
+            latencies = np.asarray(self.samples[endpoint]) * 1000.0
+            row = {
+                "endpoint": endpoint,
+                "requests": int(len(latencies)),
+                "errors": self.errors[endpoint],
+                "rps": round(len(latencies) / elapsed, 2),
+                "mean_ms": round(float(latencies.mean()), 2),
+                "max_ms": round(float(latencies.max()), 2),
+                "statuses": {str(k): v for k, v in sorted(self.statuses[endpoint].items())},
+            }
+            for p in PERCENTILES:
+                row[f"p{p}_ms"] = round(float(np.percentile(latencies, p)), 2)
+            rows.append(row)
+        return rows
+
+
+class VirtualUser:
+    def __init__(self, client, recorder, rng, n_users, think_ms):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.n_users = n_users
+        self.think_ms = think_ms
+        # Transaction ids seen per uid, for description requests
+        self.known_txns = {}
+
+    async def get(self, endpoint, path, **params):
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(path, params=params or None)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 599
+        self.recorder.record(endpoint, time.perf_counter() - started, status)
+        return response
+
+    def pick_uid(self):
+        return user_id(self.rng.randrange(self.n_users))
+
+    async def dashboard(self):
+        uid = self.pick_uid()
+        # dashboard.tsx fires all three without waiting on each other
+        transactions, _, _ = await asyncio.gather(
+            self.get("GET /plaid/transactions/{uid}", f"/plaid/transactions/{uid}"),
+            self.get("GET /plaid/paycheck-spending/{uid}", f"/plaid/paycheck-spending/{uid}"),
+            self.get("GET /plaid/mean-spending-scores-month/{uid}", f"/plaid/mean-spending-scores-month/{uid}"),
+        )
+        if transactions is not None and transactions.status_code == 200:
+            ids = [t["transaction_id"] for t in transactions.json().get("transactions", [])]
+            if ids:
+                self.known_txns[uid] = ids
+
+    async def bucket_switch(self):
+        uid = self.pick_uid()
+        bucket = self.rng.choice(("day", "week", "month"))
+        await self.get(
+            "GET /plaid/mean-spending-scores-month/{uid}",
+            f"/plaid/mean-spending-scores-month/{uid}",
+            bucket=bucket,
+        )
+
+    async def description(self):
+        if not self.known_txns:
+            return await self.dashboard()
+        uid = self.rng.choice(list(self.known_txns))
+        tid = self.rng.choice(self.known_txns[uid])
+        await self.get(
+            "GET /plaid/transaction-description/{uid}/{transaction_id}",
+            f"/plaid/transaction-description/{uid}/{tid}",
+        )
+
+    async def summary(self):
+        uid = self.pick_uid()
+        await self.get("GET /plaid/score-summary/{uid}", f"/plaid/score-summary/{uid}")
+
+    async def run(self, mix, deadline):
+        scenarios = list(mix)
+        weights = [mix[s] for s in scenarios]
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(scenarios, weights=weights)[0]
+            await getattr(self, scenario)()
+            if self.think_ms:
+                await asyncio.sleep(self.rng.expovariate(1000.0 / self.think_ms))
+
+
+async def drive(base_url, n_users, concurrency, duration, mix, think_ms, seed, timeout):
+    recorder = LatencyRecorder()
+    limits = httpx.Limits(max_connections=concurrency * 3, max_keepalive_connections=concurrency * 3)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        vusers = [
+            VirtualUser(client, recorder, random.Random(seed + i), n_users, think_ms)
+            for i in range(concurrency)
+        ]
+        await asyncio.gather(*(v.run(mix, deadline) for v in vusers))
+        elapsed = time.perf_counter() - started
+    return recorder, elapsed
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if not hasattr(VirtualUser, name.strip()):
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def wait_until_healthy(url, proc, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {proc.returncode} before becoming ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+
+
+def start_stack(args):
+    """Start fake_plaid.py and serve_app.py as subprocesses; returns (procs, base_url)."""
+    env = {
+        **os.environ,
+        "PLAID_HOST": f"http://127.0.0.1:{args.plaid_port}",
+        "LOADTEST_USERS": str(args.users),
+        "LOADTEST_LLM_LATENCY_MS": str(args.llm_latency_ms),
+    }
+
+    plaid_cmd = [sys.executable, str(LOADTEST_DIR / "fake_plaid.py"),
+                 "--port", str(args.plaid_port), "--latency-ms", str(args.plaid_latency_ms)]
+    if args.payload_dir:
+        plaid_cmd += ["--payload-dir", args.payload_dir]
+    app_cmd = [sys.executable, str(LOADTEST_DIR / "serve_app.py"),
+               "--port", str(args.app_port), "--workers", str(args.app_workers), "--users", str(args.users)]
+
+    procs = [subprocess.Popen(plaid_cmd, cwd=BACKEND_DIR, env=env)]
+    # Plaid stand-in answers 405 on GET; anything below 500 means it is up
+    wait_until_healthy(f"http://127.0.0.1:{args.plaid_port}/transactions/get", procs[0])
+
+    procs.append(subprocess.Popen(app_cmd, cwd=BACKEND_DIR, env=env))
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    wait_until_healthy(f"{base_url}/health", procs[1])
+    return procs, base_url
+
+
+def stop_stack(procs):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def print_report(rows, elapsed):
+    total = sum(r["requests"] for r in rows)
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+    print(f"{'endpoint':<58} {'reqs':>6} {'err':>5} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in rows:
+        print(f"{r['endpoint']:<58} {r['requests']:>6} {r['errors']:>5} {r['rps']:>7.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+
+
+def compare_results(old_path, new_path):
+    """Print per-endpoint p50/p95/p99 changes between two result files."""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    old_by_endpoint = {r["endpoint"]: r for r in old["endpoints"]}
+
+    print(f"{old['git_commit']} -> {new['git_commit']}")
+    print(f"{'endpoint':<58} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17}")
+    for r in new["endpoints"]:
+        before = old_by_endpoint.get(r["endpoint"])
+        if before is None:
+            continue
+        cells = [f"{before[f'p{p}_ms']:>7.1f} -> {r[f'p{p}_ms']:>6.1f}" for p in PERCENTILES]
+        print(f"{r['endpoint']:<58} " + " ".join(f"{c:>17}" for c in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the backend with realistic dashboard traffic.")
+    parser.add_argument("--users", type=int, default=100, help="Distinct seeded users")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users running scenarios")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of traffic")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Scenario weights, e.g. dashboard=60,description=30,summary=10")
+    parser.add_argument("--think-ms", type=float, default=250.0, help="Mean pause between scenarios")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", help="Target an already running app instead of booting one")
+    parser.add_argument("--app-port", type=int, default=8010)
+    parser.add_argument("--app-workers", type=int, default=1)
+    parser.add_argument("--plaid-port", type=int, default=8011)
+    parser.add_argument("--plaid-latency-ms", type=float, default=150.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--payload-dir", help="Recorded transactions_get payloads for fake Plaid")
+    parser.add_argument("--output", help="JSON results path (default: loadtest/results/loadtest-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    procs = []
+    base_url = args.base_url
+    try:
+        if base_url is None:
+            procs, base_url = start_stack(args)
+
+        print(f"Driving {args.concurrency} virtual users over {args.users} users for {args.duration:.0f}s "
+              f"against {base_url} (mix {args.mix})")
+        recorder, elapsed = asyncio.run(drive(
+            base_url, args.users, args.concurrency, args.duration,
+            args.mix, args.think_ms, args.seed, args.timeout,
+        ))
+    finally:
+        stop_stack(procs)
+
+    rows = recorder.report(elapsed)
+    print_report(rows, elapsed)
+
+    results = {
+        "git_commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "duration_sec": args.duration,
+            "mix": args.mix,
+            "think_ms": args.think_ms,
+            "app_workers": args.app_workers,
+            "plaid_latency_ms": args.plaid_latency_ms,
+            "llm_latency_ms": args.llm_latency_ms,
+            "payload_dir": args.payload_dir,
+        },
+        "elapsed_sec": round(elapsed, 2),
+        "endpoints": rows,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"loadtest-{results['git_commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# backend/loadtest/serve_app.py - Boot backend.main against local stand-ins for Plaid, Firestore and the LLM
+#
+# Usage (from backend/, with fake_plaid.py already running):
+#   PLAID_HOST=http://127.0.0.1:8011 python loadtest/serve_app.py --users 200 --port 8010
+#
+# Firestore is an in-memory fake unless FIRESTORE_EMULATOR_HOST is set, in
+# which case the real client talks to the emulator. LLM calls are replaced by a
+# canned suggestion after LOADTEST_LLM_LATENCY_MS. Settings travel through
+# LOADTEST_* env vars so every uvicorn worker process sets itself up the same way.
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+LOADTEST_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = LOADTEST_DIR.parent
+# backend.main imports its siblings both relatively and by bare module name
+sys.path.insert(0, str(BACKEND_DIR.parent))
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(LOADTEST_DIR))
+
+from users import access_token, item_count, item_id, user_id
+
+CANNED_SUGGESTION = (
+    "This purchase is a large share of your discretionary budget this period.\n"
+    "1. Set a weekly limit for this category.\n"
+    "2. Wait a day before similar purchases.\n"
+    "3. Move the difference into savings after each paycheck."
+)
+
+
+def _install_stand_ins():
+    # Read by plaid_client when the Plaid client is first built
+    os.environ.setdefault("PLAID_CLIENT_ID", "loadtest-client")
+    os.environ.setdefault("PLAID_SANDBOX_SECRET", "loadtest-secret")
+    if not os.getenv("PLAID_HOST"):
+        raise SystemExit("PLAID_HOST must point at the fake Plaid server (see fake_plaid.py)")
+
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        import firebase_config
+        from fake_firestore import FakeFirestoreClient
+
+        fake_db = FakeFirestoreClient()
+        firebase_config.get_firestore_client = lambda: fake_db
+
+    import transaction_insights
+
+    llm_latency = float(os.getenv("LOADTEST_LLM_LATENCY_MS", "800")) / 1000.0
+
+    def fake_suggestion(*args, **kwargs):
+        time.sleep(llm_latency)
+        return CANNED_SUGGESTION
+
+    transaction_insights.generate_gemini_suggestion = fake_suggestion
+
+
+def seed_users(db, n_users):
+    """
+    users/{uid} documents carrying the access tokens fake_plaid.py recognises,
+    plus the plaid_items routing documents webhooks are resolved through.
+    """
+    from linked_items import ITEMS_FIELD
+    from transaction_sync import ITEMS_COLLECTION
+
+    users = db.collection("users")
+    items = db.collection(ITEMS_COLLECTION)
+    batch = db.batch()
+    for i in range(n_users):
+        linked = {item_id(i, k): {"access_token": access_token(i, k)} for k in range(item_count(i))}
+        batch.set(users.document(user_id(i)), {"uid": user_id(i), ITEMS_FIELD: linked}, merge=True)
+        for linked_item_id, item in linked.items():
+            batch.set(items.document(linked_item_id), {"uid": user_id(i), **item}, merge=True)
+        if (i + 1) % 250 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+
+
+def build_app():
+    _install_stand_ins()
+
+    from backend import main as backend_main
+
+    seed_users(backend_main.FIRESTORE.get(), int(os.getenv("LOADTEST_USERS", "100")))
+    return backend_main.app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the backend against load-test stand-ins.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=int(os.getenv("LOADTEST_USERS", "100")))
+    parser.add_argument("--llm-latency-ms", type=float,
+                        default=float(os.getenv("LOADTEST_LLM_LATENCY_MS", "800")))
+    args = parser.parse_args()
+
+    os.environ["LOADTEST_USERS"] = str(args.users)
+    os.environ["LOADTEST_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+
+    import uvicorn
+
+    uvicorn.run(
+        "serve_app:app",
+        app_dir=str(LOADTEST_DIR),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
+else:
+    # Imported by uvicorn (once per worker)
+    app = build_app()
@@ -0,0 +1,57 @@
+# backend/loadtest/users.py - Deterministic load-test users shared by the app launcher, fake Plaid and the driver
+
+# Every HEAVY_EVERY-th user has a long history; the rest a typical one
+HEAVY_EVERY = 5
+TYPICAL_TXNS = 250
+HEAVY_TXNS = 1500
+
+# Every STRESSED_EVERY-th user gets the low-income / fee-heavy synthetic profile
+STRESSED_EVERY = 4
+
+# Every MULTI_ITEM_EVERY-th user has linked a second institution
+MULTI_ITEM_EVERY = 3
+
+UID_PREFIX = "loadtest-user-"
+TOKEN_PREFIX = "access-loadtest-"
+
+
+def user_id(index):
+    return f"{UID_PREFIX}{index:05d}"
+
+
+def access_token(index, item=0):
+    # A user's first item keeps the plain token; further items get a -<item> suffix
+    token = f"{TOKEN_PREFIX}{index:05d}"
+    return token if item == 0 else f"{token}-{item}"
+
+
+def item_id(index, item=0):
+    # Same item id fake_plaid.py reports for the access token
+    return f"item-{access_token(index, item)}"
+
+
+def item_count(index):
+    return 2 if index % MULTI_ITEM_EVERY == MULTI_ITEM_EVERY - 1 else 1
+
+
+def user_index(token_or_uid):
+    """Index encoded in a load-test uid or access token, or None."""
+    for prefix in (TOKEN_PREFIX, UID_PREFIX):
+        if token_or_uid.startswith(prefix):
+            suffix = token_or_uid[len(prefix):].split("-", 1)[0]
+            return int(suffix) if suffix.isdigit() else None
+    return None
+
+
+def token_item(token):
+    """Item number encoded in a load-test access token (0 for a user's first item)."""
+    _, _, item = token.removeprefix(TOKEN_PREFIX).partition("-")
+    return int(item) if item.isdigit() else 0
+
+
+def transaction_count(index):
+    return HEAVY_TXNS if index % HEAVY_EVERY == HEAVY_EVERY - 1 else TYPICAL_TXNS
+
+
+def is_stressed(index):
+    return index % STRESSED_EVERY == STRESSED_EVERY - 1
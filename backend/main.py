@@ -7,38 +7,55 @@ from dotenv import load_dotenv
 # -----------------------------
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException, Body
-from fastapi.middleware.cors import CORSMiddleware
+import base64
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
 
-import firebase_admin
-from firebase_admin import credentials, auth, firestore
+from fastapi import FastAPI, HTTPException, Body, Depends, Query, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
 from .resolve_env import get_firebase_creds, get_plaid_secrets, get_hf_token
 from .llm_module import generate_gemini_suggestion, generate_suggestion
 
-import plaid
-from plaid.api import plaid_api
-from plaid.model.products import Products
-from plaid.model.link_token_create_request import LinkTokenCreateRequest
-from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
-from plaid.model.accounts_get_request import AccountsGetRequest
-from plaid.model.transactions_get_request import TransactionsGetRequest
-from plaid.model.country_code import CountryCode
-
 from pydantic import BaseModel
 from datetime import date, datetime, timedelta
-from collections import defaultdict
-
-import pandas as pd
-import numpy as np
-from scoring_config import load_category_config, compute_context_features
-from plaid_service import (
-    fetch_plaid_transactions,
-    load_pf_taxonomy_map,
-    plaid_to_txns_df,
+from pathlib import Path
+
+# pandas / numpy, plaid, firebase_admin and the scoring modules are heavy to
+# import, so they are imported where they are used (or in the resource
+# factories below) to keep worker boot and --reload cycles fast.
+from firebase_config import get_firestore_client
+from instrumentation import observe_request, record_cache_lookup, record_error, render_metrics, stage
+from admin_auth import require_admin
+from config_registry import ConfigRegistry
+from job_queue import BACKGROUND, INTERACTIVE, NORMAL, JobQueue, QueueFull, SqliteJobStore, cancellation_requested
+from lazy_resources import LazyResource, readiness, warm_up
+from linked_items import check_item_errors, fetch_items, link_item, merge_transactions, user_items
+from plaid_governor import GOVERNOR, PlaidThrottled
+from profiling import (
+    CAPTURES,
+    annotate_profile,
+    available_modes,
+    profile_request_middleware,
+    profiled,
+    sample_window,
 )
-
-from transaction_scorer import TransactionScorer
+from response_encoding import encoded_response, parse_fields, project
+from score_cache import ScoredWindowCache
+from score_store import MAX_IN_VALUES, SEVERITIES, ScoreStore
+from worker_state import check_config_consistency, publish_worker_state
+from transaction_insights import (
+    describe_transaction,
+    get_cached_description,
+    precompute_transaction_descriptions,
+    TRANSACTION_SNAPSHOT_FIELDS,
+)
+from transaction_sync import get_item, get_stored_transactions, sync_item
+from transaction_versions import VersionLog, diff_window, representation_version, window_version
 
 # -----------------------------
 # Hugging Face token check
@@ -47,51 +64,131 @@ from transaction_scorer import TransactionScorer
 # if not HF_API_TOKEN:
 #     raise ValueError("HF_API_TOKEN not set in environment variables. Add it to your .env file.")
 
-# --------- SCORING SETUP (GLOBAL SINGLETONS) ---------
+# --------- SCORING SETUP (LAZY SINGLETONS) ---------
 ROOT_DIR = Path(__file__).resolve().parent
 
 CATEGORY_CFG_PATH = ROOT_DIR / "data" / "category_scoring_config.xlsx"
 
-# Load the full category config (merges CAT_LABELS, PROFILE, CONTEXT, etc.)
-SCORING_CFG = load_category_config(CATEGORY_CFG_PATH)
+# Which TransactionScorer implementation the request path uses (metrics / profile tags)
+SCORER_PATH = "vectorized"
 
-# Load Plaid personal_finance_category → CAT_ID mapping
-PF_MAP = load_pf_taxonomy_map()
+# Same values as spending_analytics.BUCKET_SIZES, kept here so validating the
+# query parameter doesn't import pandas
+BUCKET_SIZES = ("day", "week", "month")
 
-# Create a single scorer instance
-SCORER = TransactionScorer(SCORING_CFG)
+# Longest dashboard window; Plaid keeps at most 24 months of transaction history
+MAX_RANGE_WEEKS = 104
 
-# -----------------------------
-# Firebase setup
-# -----------------------------
-if not firebase_admin._apps:
-    cred_dict = get_firebase_creds()
-    private_key = cred_dict.get("private_key")
-    if not private_key:
-        raise ValueError("Firebase private key missing from credentials")
-    cred_dict["private_key"] = private_key.replace("\\n", "\n")
-    cred = credentials.Certificate(cred_dict)
-    firebase_admin.initialize_app(cred)
+# The window /plaid/transactions serves, the only one versioned for `since=`
+TRANSACTIONS_RANGE_WEEKS = 10
+
+def _load_scoring():
+    # Full category config (merges CAT_LABELS, PROFILE, CONTEXT, etc.) plus the
+    # scorer compiled from it; reloaded in place when the file changes
+    registry = ConfigRegistry(CATEGORY_CFG_PATH)
+    registry.add_listener(_on_config_swap)
+    return registry
+
+def _load_pf_map():
+    from plaid_service import load_pf_taxonomy_map
+
+    # Load Plaid personal_finance_category → CAT_ID mapping
+    return load_pf_taxonomy_map()
+
+def _build_plaid_client():
+    from plaid_client import get_client
+
+    return get_client()
+
+SCORING = LazyResource("scoring_config", _load_scoring)
+PF_MAP = LazyResource("pf_taxonomy_map", _load_pf_map)
+
+# Firebase (credentials are only needed once Firestore is first used)
+FIRESTORE = LazyResource("firestore", get_firestore_client)
+
+# Persisted per-transaction scores + per-user summaries
+SCORE_STORE = LazyResource("score_store", lambda: ScoreStore(FIRESTORE.get()))
+
+# Recent content versions of each user's window (ETags + since= deltas)
+TRANSACTION_VERSIONS = LazyResource("transaction_versions", lambda: VersionLog(FIRESTORE.get()))
+
+# Plaid client (shared with plaid_service); every call is rate limited by plaid_governor
+PLAID_CLIENT = LazyResource("plaid_client", _build_plaid_client)
+
+# Scored windows shared by the dashboard endpoints (transactions, score series, ...)
+SCORED_WINDOWS = ScoredWindowCache()
+
+# Heavy work (webhook syncs, score persistence, LLM descriptions) runs here,
+# off the request threads. JOB_STORE_PATH shares job status between workers.
+JOBS = JobQueue(store=SqliteJobStore(os.environ["JOB_STORE_PATH"]) if os.getenv("JOB_STORE_PATH") else None)
+
+# Pure data, safe to build in a preforking master and share copy-on-write.
+# Clients (gRPC channels, HTTP pools) are not fork-safe and are built per worker.
+FORK_SAFE_RESOURCES = (SCORING, PF_MAP)
+
+def current_scoring():
+    """The active ScoringSnapshot; take it once per request and use it throughout."""
+    return SCORING.get().current()
+
+def _on_config_swap(old, new):
+    # Windows scored under the old config must not be served again
+    SCORED_WINDOWS.clear()
+    publish_worker_state(config_version=new.version)
+    print(f"[config] Scoring config reloaded: {old.version} -> {new.version} ({new.source})")
+
+def preload_shared_state():
+    """
+    Called once in the gunicorn master before workers fork (gunicorn.conf.py):
+    imports the heavy modules, builds the scoring config and compiles the
+    scoring kernel so every worker inherits them. Returns the config version the workers should report.
+    """
+    import paycheck_analyzer  # noqa: F401
+    import plaid_service  # noqa: F401
+    import spending_analytics  # noqa: F401
+
+    import scoring_kernels
+
+    warm_up(FORK_SAFE_RESOURCES)
+    scoring_kernels.compile_kernels()
+    return current_scoring().version
 
-db = firestore.client()
+def current_config_version():
+    return current_scoring().version if SCORING.ready else None
 
 # -----------------------------
-# Plaid client setup
+# Startup
 # -----------------------------
-plaid_secrets = get_plaid_secrets()
-configuration = plaid.Configuration(
-    host=plaid.Environment.Sandbox,
-    api_key={
-        "clientId": plaid_secrets["client_id"],
-        "secret": plaid_secrets["sandbox_secret"]
-    }
-)
-plaid_client = plaid_api.PlaidApi(plaid.ApiClient(configuration))
+# WARMUP_MODE: "background" (default) builds every resource in a thread after
+# startup so the first requests don't pay for it; "blocking" finishes warm-up
+# before serving; "off" leaves everything to first use.
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+
+def warm_up_worker():
+    warm_up()
+    # A no-op when the preforking master already compiled it (preload_shared_state)
+    import scoring_kernels
+
+    scoring_kernels.compile_kernels()
+    # Started per worker: a watcher thread in the preforking master would not survive the fork
+    if SCORING.ready:
+        SCORING.get().start_watching()
+    # Lets /health/workers compare this worker with the others
+    publish_worker_state(config_version=current_config_version())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_MODE == "blocking":
+        warm_up_worker()
+    elif WARMUP_MODE == "background":
+        threading.Thread(target=warm_up_worker, name="warm-up", daemon=True).start()
+    await JOBS.start()
+    yield
+    await JOBS.stop()
 
 # -----------------------------
 # FastAPI setup
 # -----------------------------
-app = FastAPI(title="Clarity Cash Backend")
+app = FastAPI(title="Clarity Cash Backend", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -102,77 +199,208 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Helper to get access token from uid from Firestore
-def get_access_token_from_uid(uid: str) -> str:
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template (/plaid/transactions/{uid}), never the raw path
+    route = request.scope.get("route")
+    observe_request(
+        request.method,
+        route.path if route is not None else "unmatched",
+        response.status_code,
+        time.perf_counter() - started,
+    )
+    return response
+
+# Admin-only per-request profiling (X-Profile header), see profiling.py
+app.middleware("http")(profile_request_middleware)
+
+# Helper to get the user's linked Plaid items ({"item_id", "access_token"} each) from Firestore;
+# None when there is no such user
+def get_user_items(uid: str):
     try:
-        user_ref = db.collection("users").document(uid)
-        user_doc = user_ref.get()
-        if user_doc.exists:
-            user_data = user_doc.to_dict()
-            return user_data.get("access_token", "")
-        else:
-            raise ValueError("User not found in Firestore")
+        with stage("firestore_get_user", uid=uid):
+            user_ref = FIRESTORE.get().collection("users").document(uid)
+            user_doc = user_ref.get()
     except Exception as e:
         raise ValueError(f"Error fetching access token: {str(e)}")
+    if not user_doc.exists:
+        return None
+    return user_items(user_doc.to_dict())
     
 # Helper to get date ranges in standardized format
 def get_time_date_range(range_weeks: int = 10):
+    """
+    Returns (end_date, start_date) as datetime.date objects.
+    end_date = today, start_date = end_date - range_weeks
+    """
     end_date = date.today()
     start_date = end_date - timedelta(weeks=range_weeks)
-    return end_date.strftime("%Y-%m-%d"), start_date.strftime("%Y-%m-%d")
-
-def get_scored_plaid_transactions(access_token: str, start_date, end_date, count: int = 500):
-    # 1) Fetch raw Plaid transactions for the window
-    plaid_txns = fetch_plaid_transactions(
-        access_token=access_token,
-        start_date=start_date,
-        end_date=end_date,
-        count=count,
-    )
+    return end_date, start_date
 
-    if not plaid_txns:
-        return []
+def get_scored_window(items: list, start_date, end_date, count: int = 500, scoring=None):
+    """
+    Fetch one window of Plaid transactions from every linked item (see
+    linked_items.py) and score it as a whole with one config snapshot (the
+    current one unless given), so context features cover all of the user's
+    accounts.
+    count is Plaid's page size; every page of the window is fetched.
+    Returns the window's transactions and their scores as a TransactionTable
+    plus the scored frame and context features they were computed from
+    (scored_df is None when nothing could be scored), and the ids of items
+    whose fetch failed ("failed_items").
+    """
+    import pandas as pd
+    from plaid_service import fetch_plaid_transactions
+    from scoring_config import compute_context_features
+    from transaction_table import TransactionTable
+
+    scoring = scoring or current_scoring()
+    window = {
+        "table": TransactionTable(),
+        "scored_df": None,
+        "context_features": None,
+        "start_date": start_date,
+        "end_date": end_date,
+        "scoring": scoring,
+        "failed_items": [],
+    }
 
-    # 2) Convert Plaid → internal txns DataFrame with CAT_IDs
-    txns_df = plaid_to_txns_df(plaid_txns, PF_MAP)
+    # 1) Fetch raw Plaid transactions for the window, every item concurrently
+    with stage("plaid_fetch", items=len(items)) as s:
+        results, errors = fetch_items(items, fetch_plaid_transactions, start_date, end_date, count)
+        window["failed_items"] = check_item_errors(results, errors)
+        plaid_txns = merge_transactions(results.values())
+        s.rows = len(plaid_txns)
+    annotate_profile(txn_count=len(plaid_txns), scorer_path=SCORER_PATH)
+
+    # 2) Convert Plaid → columnar table (CAT_IDs mapped); the Plaid dicts are dropped here
+    with stage("to_table") as s:
+        table = TransactionTable.from_plaid(plaid_txns, PF_MAP.get())
+        del plaid_txns
+        s.rows = len(table)
+    window["table"] = table
+    table.config_version = scoring.version
+
+    with stage("to_dataframe") as s:
+        txns_df = table.to_txns_df()
+        s.rows = len(txns_df)
     if txns_df.empty:
-        # Nothing we can score, just return original with no scores
-        for t in plaid_txns:
-            t["score"] = None
-            t["profile"] = None
-            t["severity"] = None
-        return plaid_txns
+        # Nothing we can score; every transaction keeps a None score
+        return window
 
     # 3) Compute context features from actual transaction mix
     #    Uses your CONTEXT_BUCKET logic: EFFECTIVE_INCOME, FEES_CONTEXT, etc.
-    context_features = compute_context_features(
-        txns_df,
-        SCORING_CFG,
-        start_date,
-        end_date,
-    )
+    with stage("context_features") as s:
+        context_features = compute_context_features(
+            txns_df,
+            scoring.cfg,
+            pd.Timestamp(start_date),
+            pd.Timestamp(end_date),
+        )
+        s.rows = len(txns_df)
 
     # 4) Run the scorer
-    scored_df = SCORER.score_all_transactions(txns_df, context_features)
-
-    # 5) Build lookup tables by transaction_id
-    score_by_tid = dict(zip(scored_df["transaction_id"], scored_df["score"]))
-    profile_by_tid = dict(zip(scored_df["transaction_id"], scored_df["profile"]))
-    severity_by_tid = dict(zip(scored_df["transaction_id"], scored_df["severity"]))
-
-    # 6) Attach scores back to the original Plaid transaction dicts
-    for t in plaid_txns:
-        tid = t["transaction_id"]
-        if tid in score_by_tid:
-            t["score"] = float(score_by_tid[tid])  # 0..100
-            t["profile"] = profile_by_tid.get(tid)  # DISCRETIONARY_WANT, etc.
-            t["severity"] = severity_by_tid.get(tid)  # very_low..very_high
-        else:
-            t["score"] = None
-            t["profile"] = None
-            t["severity"] = None
+    with stage("scoring", scorer_path=SCORER_PATH) as s:
+        scored_df = scoring.scorer.score_all_transactions(txns_df, context_features, details=False)
+        s.rows = len(scored_df)
 
-    return plaid_txns
+    # 5) Attach score / profile / severity to the table's rows (0..100, DISCRETIONARY_WANT, very_low..very_high)
+    with stage("attach_scores") as s:
+        table.attach_scores(scored_df, scoring.version)
+        s.rows = len(table)
+
+    window["scored_df"] = scored_df
+    window["context_features"] = context_features
+    return window
+
+def get_scored_plaid_transactions(access_token: str, start_date, end_date, count: int = 500):
+    items = [{"item_id": access_token, "access_token": access_token}]
+    return get_scored_window(items, start_date, end_date, count)["table"].records()
+
+def persist_window_scores(uid: str, window: dict):
+    """Background task: write changed scores + the summary for a freshly scored window."""
+    try:
+        scored_df = window["scored_df"]
+        scorer = window["scoring"].scorer
+        with stage("firestore_persist_scores", uid=uid) as s:
+            s.rows = SCORE_STORE.get().persist(uid, scored_df, scorer.get_score_summary(scored_df))
+    except Exception as e:
+        record_error("persist_window_scores", e)
+        print(f"[ERROR] Score persistence failed for {uid}: {e}")
+
+def generate_window_descriptions(uid: str, window: dict, plaid_txns=None):
+    """Job: LLM descriptions for the window's low-score transactions (or only plaid_txns among them)."""
+    return precompute_transaction_descriptions(
+        FIRESTORE.get(),
+        window["scoring"].scorer,
+        uid,
+        window["table"].records(fields=TRANSACTION_SNAPSHOT_FIELDS) if plaid_txns is None else plaid_txns,
+        window["scored_df"],
+        window["context_features"],
+        should_stop=cancellation_requested,
+    )
+
+def sync_plaid_item(item_id: str):
+    """Webhook job: pull an item's new transactions, store and rescore them."""
+    scoring = current_scoring()
+    result = sync_item(FIRESTORE.get(), item_id, scoring, PF_MAP.get(), SCORE_STORE.get())
+    # The next dashboard load refetches instead of serving the pre-webhook window
+    SCORED_WINDOWS.invalidate(result["uid"])
+
+    # Descriptions only for the transactions this sync added or changed
+    if result["affected"] and result["scored_df"] is not None:
+        window = {**result, "scoring": scoring}
+        JOBS.submit("descriptions", generate_window_descriptions, result["uid"], window, result["affected"],
+                    user=result["uid"], priority=BACKGROUND)
+    return {k: result[k] for k in ("item_id", "uid", "added", "modified", "removed", "scores_written")}
+
+def get_user_scored_window(uid: str, range_weeks: int = 10, count: int = 500):
+    """
+    Scored window for a user, shared between the dashboard endpoints.
+    Reuses the cached window when it is still fresh and was scored with the
+    current config instead of calling Plaid again. Only the
+    TRANSACTIONS_RANGE_WEEKS window gets a "version" / "row_digests" and is
+    recorded in the version log; other ranges would evict the versions
+    `since=` needs.
+    """
+    scoring = current_scoring()
+    window = SCORED_WINDOWS.get(uid, range_weeks)
+    if window is not None and window["scoring"].version != scoring.version:
+        window = None
+    record_cache_lookup("scored_window", window is not None)
+    if window is not None:
+        return {**window, "from_cache": True}
+
+    items = get_user_items(uid)
+    if items is None:
+        raise HTTPException(status_code=404, detail="User not found in Firestore")
+    if not items:
+        raise HTTPException(status_code=404, detail="Access token not found for user")
+
+    end_date_today, start_date = get_time_date_range(range_weeks=range_weeks)
+    try:
+        window = get_scored_window(
+            items=items,
+            start_date=start_date,
+            end_date=end_date_today,
+            count=count,
+            scoring=scoring,
+        )
+    except PlaidThrottled as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if range_weeks == TRANSACTIONS_RANGE_WEEKS:
+        with stage("window_version", uid=uid) as s:
+            window["row_digests"] = window["table"].row_digests()
+            window["version"] = window_version(window["row_digests"])
+            TRANSACTION_VERSIONS.get().record(uid, window["version"], window["row_digests"])
+            s.rows = len(window["table"])
+    # A reload while this request was scoring already cleared the cache; don't refill it with stale scores.
+    # A window missing a failed item isn't cached either, so the next load retries that item.
+    if current_scoring().version == scoring.version and not window["failed_items"]:
+        SCORED_WINDOWS.put(uid, range_weeks, window)
+    return window
 
 
 # -----------------------------
@@ -186,12 +414,38 @@ def root():
 def health_check():
     return {"status": "ok"}
 
+@app.get("/health/workers")
+def worker_health_check():
+    """503 unless every live worker reports the config version the master preloaded."""
+    report = check_config_consistency(current_config_version())
+    if not report["consistent"]:
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 200 once every lazy client / config is built, 503 while warming up."""
+    ready, resources = readiness()
+    body = {"ready": ready, "warmup_mode": WARMUP_MODE, "resources": resources}
+    if not ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint (stage timings, request latency, cache hits)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # -----------------------------
 # Firebase user endpoint
 # -----------------------------
 @app.get("/users/{uid}")
 def get_user(uid: str):
     try:
+        from firebase_admin import auth
+
+        FIRESTORE.get()  # initializes the Firebase app
         user = auth.get_user(uid)
         return {"uid": user.uid, "email": user.email, "display_name": user.display_name}
     except Exception as e:
@@ -202,6 +456,10 @@ def get_user(uid: str):
 # -----------------------------
 @app.get("/plaid/link-token")
 def create_sandbox_link_token():
+    from plaid.model.country_code import CountryCode
+    from plaid.model.link_token_create_request import LinkTokenCreateRequest
+    from plaid.model.products import Products
+
     try:
         request = LinkTokenCreateRequest(
             user={"client_user_id": "test_user"},
@@ -210,8 +468,10 @@ def create_sandbox_link_token():
             country_codes=[CountryCode("US")],
             language="en"
         )
-        response = plaid_client.link_token_create(request)
+        response = PLAID_CLIENT.get().link_token_create(request)
         return {"link_token": response.link_token}
+    except PlaidThrottled as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -221,31 +481,100 @@ class TokenExchangeRequest(BaseModel):
 
 @app.post("/plaid/sandbox-exchange-token")
 def exchange_sandbox_public_token(req: TokenExchangeRequest = Body(...)):
+    from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
+
     try:
         request = ItemPublicTokenExchangeRequest(public_token=req.public_token)
-        response_as_dict = plaid_client.item_public_token_exchange(request).to_dict()
+        response_as_dict = PLAID_CLIENT.get().item_public_token_exchange(request).to_dict()
         access_token = response_as_dict.get("access_token")
+        item_id = response_as_dict.get("item_id")
 
-        # Store in Firestore
+        # Store in Firestore, next to any items the user already linked; this
+        # also lets /plaid/webhook route the item's updates to the user
         try:
-            user_ref = db.collection("users").document(req.uid)
-            user_ref.set({"uid": req.uid, "access_token": access_token}, merge=True)
+            link_item(FIRESTORE.get(), req.uid, item_id, access_token)
+            SCORED_WINDOWS.invalidate(req.uid)
         except Exception as firestore_error:
             print(f"[ERROR] Firestore write failed: {firestore_error}")
 
         return {"success": True, "access_token": access_token}
+    except PlaidThrottled as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/plaid/accounts/{access_token}")
 def get_plaid_accounts(access_token: str):
+    from plaid.model.accounts_get_request import AccountsGetRequest
+
     try:
         request = AccountsGetRequest(access_token=access_token)
-        response = plaid_client.accounts_get(request)
+        response = PLAID_CLIENT.get().accounts_get(request)
         return response.to_dict()
+    except PlaidThrottled as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/plaid/user-accounts/{uid}")
+@profiled
+def get_user_accounts(uid: str):
+    """Accounts across every item the user linked, fetched concurrently; each account names its item_id."""
+    from plaid_service import fetch_plaid_accounts
+
+    try:
+        items = get_user_items(uid)
+        if items is None:
+            raise HTTPException(status_code=404, detail="User not found in Firestore")
+        if not items:
+            raise HTTPException(status_code=404, detail="Access token not found for user")
+
+        with stage("plaid_accounts", items=len(items)) as s:
+            results, errors = fetch_items(items, fetch_plaid_accounts)
+            failed_items = check_item_errors(results, errors)
+            accounts = [{**account, "item_id": item_id} for item_id, found in results.items() for account in found]
+            s.rows = len(accounts)
+        return {"accounts": accounts, "failed_items": failed_items}
+    except HTTPException:
+        raise
+    except PlaidThrottled as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class PlaidWebhook(BaseModel):
+    webhook_type: str
+    webhook_code: str
+    item_id: str = None
+
+# Transactions webhooks that mean new data can be pulled with /transactions/sync
+SYNC_WEBHOOK_CODES = ("SYNC_UPDATES_AVAILABLE", "DEFAULT_UPDATE")
+
+@app.post("/plaid/webhook")
+def plaid_webhook(webhook: PlaidWebhook):
+    """
+    Plaid calls this when an item has new transactions. The sync runs on the
+    job queue; repeated webhooks for the same item collapse into one run.
+    """
+    if (webhook.webhook_type != "TRANSACTIONS"
+            or webhook.webhook_code not in SYNC_WEBHOOK_CODES
+            or not webhook.item_id):
+        return {"status": "ignored"}
+
+    item = get_item(FIRESTORE.get(), webhook.item_id)
+    if item is None:
+        print(f"[ERROR] Webhook for unknown Plaid item {webhook.item_id}")
+        return {"status": "ignored"}
+
+    try:
+        # One sync per item at a time; a webhook arriving mid-sync queues one more
+        job = JOBS.submit("plaid_sync", sync_plaid_item, webhook.item_id,
+                          user=item["uid"], priority=NORMAL, key=f"plaid_sync:{webhook.item_id}")
+    except QueueFull:
+        # Plaid retries webhooks that don't get a 200
+        raise HTTPException(status_code=503, detail="Sync queue is full")
+    return {"status": job.state, "job_id": job.id, "item_id": webhook.item_id}
+
 # -----------------------------
 # Gemini endpoint
 # -----------------------------
@@ -289,47 +618,33 @@ class paycheckSpending(BaseModel):
     transactions: list
     
 @app.get("/plaid/paycheck-spending/{uid}")
-def get_paycheck_spending(uid: str):
-    """Fetch paycheck spending data for a user."""
+@profiled
+def get_paycheck_spending(uid: str, range_weeks: int = Query(10, ge=1, le=MAX_RANGE_WEEKS)):
+    """
+    Fetch paycheck spending data (last pay period + full pay period history) for a user.
+    404 when the user doesn't exist or has no linked Plaid item.
+    """
     try:
-        # Fetch user's access token from Firestore
-        user_ref = db.collection("users").document(uid)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
-            raise HTTPException(status_code=404, detail="User not found in Firestore")
-        
-        access_token = user_doc.to_dict().get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=404, detail="Access token not found for user")
-        
-        # Observe the last 6 weeks of transactions
-        end_date_today, start_date = get_time_date_range(range_weeks=6)
-        
-        # Fetch transactions from Plaid
-        request = TransactionsGetRequest(
-            access_token=access_token,
-            start_date=start_date,
-            end_date=end_date_today
-        )
-        response = plaid_client.transactions_get(request)
-        transactions = response.to_dict().get("transactions", [])
-        
-        # Retreive the last deposit made to the account as the last paycheck
-        sorted_transactions = sorted(transactions, key=lambda x: x['date'], reverse=True)
-        last_paycheck = None
-        for tx in sorted_transactions:
-            if tx['amount'] < 0:  # Assuming negative amount means deposit/inflow
-                last_paycheck = tx
-                break  # Break at first instance
-        
-        # Calculate spent since last paycheck
-        if last_paycheck:
-            last_paycheck_amount = abs(last_paycheck['amount'])
-            last_paycheck_date = last_paycheck['date']
-            # Calculate spent since paycheck (sum of outflows since that date)
-            spent_since_paycheck = sum(tx['amount'] for tx in transactions if tx['date'] >= last_paycheck_date and tx['amount'] > 0)
+        # Reuse the scored dashboard window rather than another Plaid call
+        window = get_user_scored_window(uid, range_weeks=range_weeks)
+
+        txns_df = window["scored_df"]
+        if txns_df is None:
+            analysis = {"paychecks": [], "cadence": "unknown", "median_gap_days": None, "regularity": 0.0}
         else:
-            # Handle case where no deposit found
+            # Paychecks are EFFECTIVE_INCOME inflows per the scoring config
+            from paycheck_analyzer import analyze_paychecks
+
+            analysis = analyze_paychecks(txns_df, window["scoring"].cfg)
+
+        paychecks = analysis["paychecks"]
+        if paychecks:
+            last_paycheck = paychecks[-1]
+            last_paycheck_amount = last_paycheck["paycheck_amount"]
+            last_paycheck_date = last_paycheck["paycheck_date"]
+            spent_since_paycheck = last_paycheck["spent"]
+        else:
+            # Handle case where no paycheck found
             last_paycheck_amount = 0.0
             last_paycheck_date = "N/A"
             spent_since_paycheck = 0.0
@@ -337,8 +652,12 @@ def get_paycheck_spending(uid: str):
         return {
             "last_paycheck_amount": last_paycheck_amount,
             "last_paycheck_date": last_paycheck_date,
-            "spent_since_paycheck": spent_since_paycheck
+            "spent_since_paycheck": spent_since_paycheck,
+            "cadence": analysis["cadence"],
+            "pay_periods": paychecks,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -353,29 +672,155 @@ class Transaction(BaseModel):
     pending: bool
 
 @app.get("/plaid/transactions/{uid}")
-def get_user_transactions(uid: str):
+@profiled
+def get_user_transactions(uid: str, request: Request, fields: str = None, since: str = None):
+    """
+    Scored transactions for the last 10 weeks. `fields` limits each transaction
+    to a comma-separated list of keys or a preset ("dashboard"); the body is
+    JSON or MessagePack per Accept and gzip/brotli compressed per Accept-Encoding.
+    Every response carries the window's `version` and an ETag (If-None-Match
+    gets a 304). With `since=<version>` only the transactions added, modified
+    or removed since that version are returned, or the full list with
+    "full": true when that version is no longer known.
+    """
     try:
-        user_ref = db.collection("users").document(uid)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
-            raise HTTPException(status_code=404, detail="User not found in Firestore")
-        
-        access_token = user_doc.to_dict().get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=404, detail="Access token not found for user")
-        
-        end_date_today, start_date = get_time_date_range(range_weeks=10)
+        field_list = parse_fields(fields)
+        window = get_user_scored_window(uid, range_weeks=TRANSACTIONS_RANGE_WEEKS)
+
+        # Persist scores and generate LLM descriptions for newly scored
+        # low-score transactions on the job queue; a newer window for the
+        # same user replaces one that is still waiting
+        if window["scored_df"] is not None and not window.get("from_cache"):
+            try:
+                JOBS.submit("persist_scores", persist_window_scores, uid, window,
+                            user=uid, priority=BACKGROUND, key=f"persist_scores:{uid}")
+                JOBS.submit("descriptions", generate_window_descriptions, uid, window,
+                            user=uid, priority=BACKGROUND, key=f"descriptions:{uid}")
+            except QueueFull as e:
+                print(f"[ERROR] Post-sync jobs dropped for {uid}: {e}")
+
+        version = window["version"]
+        table = window["table"]
+
+        def payload():
+            if since is None:
+                return {"version": version, "transactions": table.records(field_list)}
+            base = TRANSACTION_VERSIONS.get().get(uid, since)
+            if base is None:
+                return {"version": version, "since": since, "full": True,
+                        "transactions": table.records(field_list)}
+            delta = diff_window(base, window["row_digests"])
+            return {
+                "version": version,
+                "since": since,
+                "full": False,
+                "added": table.records(field_list, rows=[table.row_of(tid) for tid in delta["added"]]),
+                "modified": table.records(field_list, rows=[table.row_of(tid) for tid in delta["modified"]]),
+                "removed": delta["removed"],
+            }
+
+        with stage("encode_response") as s:
+            s.rows = len(table)
+            return encoded_response(
+                request,
+                payload,
+                route="transactions",
+                version=representation_version(version, window["scoring"].version, fields, since),
+            )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        scored_txns = get_scored_plaid_transactions(
-            access_token=access_token,
-            start_date=start_date,
-            end_date=end_date_today,
-            count=500,
-        )
+# Largest page of /plaid/scored-transactions
+MAX_PAGE_SIZE = 500
 
-        return {"transactions": scored_txns}
-    
-    except ApiException as e:
+def encode_page_cursor(after):
+    """(date, transaction_id) of a page's last row -> opaque next_cursor."""
+    return base64.urlsafe_b64encode(json.dumps(list(after)).encode()).decode().rstrip("=")
+
+def decode_page_cursor(cursor):
+    try:
+        date_str, tid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(date_str), str(tid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/plaid/scored-transactions/{uid}")
+@profiled
+def get_scored_transactions_page(
+    uid: str,
+    request: Request,
+    limit: int = 50,
+    cursor: str = None,
+    severity: str = None,
+    profile: str = None,
+    cat_id: str = None,
+    fields: str = None,
+):
+    """
+    Stored scored transactions (the whole persisted history, not just the
+    dashboard window), newest first, one page at a time. Pass the response's
+    next_cursor as `cursor` for the next page; it is null on the last page.
+    `severity`, `profile` and `cat_id` (comma-separated CAT_IDs) filter in the
+    Firestore query. Each row carries the stored Plaid fields when the item
+    has been synced; `fields` projects them as on /plaid/transactions.
+    """
+    try:
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        if severity is not None and severity not in SEVERITIES:
+            raise HTTPException(status_code=400, detail=f"severity must be one of {', '.join(SEVERITIES)}")
+        cat_ids = None
+        if cat_id is not None:
+            try:
+                cat_ids = sorted({int(c) for c in cat_id.split(",") if c.strip()})
+            except ValueError:
+                raise HTTPException(status_code=400, detail="cat_id must be comma-separated integers")
+            if not cat_ids or len(cat_ids) > MAX_IN_VALUES:
+                raise HTTPException(status_code=400, detail=f"cat_id takes 1 to {MAX_IN_VALUES} CAT_IDs")
+        field_list = parse_fields(fields)
+        after = decode_page_cursor(cursor) if cursor else None
+
+        with stage("firestore_scores_page", uid=uid) as s:
+            rows, next_after = SCORE_STORE.get().get_scores_page(
+                uid, limit, after=after, severity=severity, profile=profile, cat_ids=cat_ids
+            )
+            s.rows = len(rows)
+
+        # Display fields (name, merchant, ...) come from the synced Plaid transactions
+        with stage("firestore_join_transactions", uid=uid) as s:
+            stored = get_stored_transactions(FIRESTORE.get(), uid, [r["transaction_id"] for r in rows])
+            transactions = [{**stored.get(r["transaction_id"], {}), **r} for r in rows]
+            s.rows = len(stored)
+
+        payload = {
+            "transactions": project(transactions, field_list),
+            "next_cursor": encode_page_cursor(next_after) if next_after else None,
+        }
+        with stage("encode_response") as s:
+            s.rows = len(transactions)
+            return encoded_response(request, payload, route="scored_transactions")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/plaid/score-summary/{uid}")
+@profiled
+def get_score_summary(uid: str):
+    """Precomputed score summary (written after each sync and by the batch job)."""
+    try:
+        with stage("firestore_get_summary", uid=uid):
+            summary = SCORE_STORE.get().get_summary(uid)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="No score summary stored for user")
+        return summary
+    except HTTPException:
+        raise
+    except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Class for 7-day mean spending score over the past month
@@ -384,581 +829,448 @@ class SpendingScore(BaseModel):
     scores: list
 
 @app.get("/plaid/mean-spending-scores-month/{uid}")
-def get_mean_spending_scores_month(uid: str):
-    """Fetch 7-day mean spending scores over the past month for a user."""
+@profiled
+def get_mean_spending_scores_month(uid: str, bucket: str = "week",
+                                   range_weeks: int = Query(10, ge=1, le=MAX_RANGE_WEEKS)):
+    """Fetch mean transaction scores per day/week/month bucket for a user."""
     try:
-        # Fetch user's access token from Firestore
-        access_token = get_access_token_from_uid(uid)
-        
-        if not access_token:
-            raise HTTPException(status_code=404, detail="Access token not found for user")
-        
-        end_date_today, start_date = get_time_date_range(range_weeks=10)
-        
-        # Fetch transactions from Plaid
-        request = TransactionsGetRequest(
-            access_token=access_token,
-            start_date=start_date,
-            end_date=end_date_today
+        if bucket not in BUCKET_SIZES:
+            raise HTTPException(status_code=400, detail=f"bucket must be one of {BUCKET_SIZES}")
+
+        # Same scored window the transactions list is rendered from
+        window = get_user_scored_window(uid, range_weeks=range_weeks)
+
+        from spending_analytics import bucket_mean_scores
+
+        series = bucket_mean_scores(
+            window["scored_df"],
+            window["start_date"],
+            window["end_date"],
+            bucket=bucket,
         )
-        response = plaid_client.transactions_get(request)
-        transactions = response.to_dict().get("transactions", [])
-        
-        # Convert start_date string to datetime for calculations
-        start_date_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        
-        # Group transactions by week and calculate scores
-        weekly_data = defaultdict(lambda: {"total_amount": 0, "count": 0})
-        
-        for txn in transactions:
-            txn_date = datetime.strptime(txn["date"], "%Y-%m-%d")
-            # Calculate week number (0-9) from start_date
-            days_from_start = (txn_date - start_date_dt).days
-            week_num = days_from_start // 7
-            
-            if 0 <= week_num < 10:  # Only include transactions within 10 weeks
-                # Only count positive amounts (spending, not income)
-                amount = txn["amount"]
-                if amount > 0:
-                    weekly_data[week_num]["total_amount"] += amount
-                    weekly_data[week_num]["count"] += 1
-        
-        # Calculate mean scores for each week
-        dates = []
-        scores = []
-        
-        for week in range(10):
-            week_start_date = start_date_dt + timedelta(weeks=week)
-            dates.append(week_start_date.strftime("%Y-%m-%d"))
-            
-            # TODO TODO TODO RESOLVE THIS WITH REAL SCORES
-            if week in weekly_data and weekly_data[week]["count"] > 0:
-                # Calculate a score: higher spending = lower score
-                avg_spending = weekly_data[week]["total_amount"] / weekly_data[week]["count"]
-                # Score formula: 100 - (avg_spending / 10), clamped between 0-100
-                score = max(0, min(100, 100 - (avg_spending / 10)))
-                scores.append(round(score, 2))
-            else:
-                # No transactions this week, assign neutral score
-                scores.append(50.0)
-        
+
         return {
-            "dates": dates,
-            "mean_scores": scores
+            "dates": series["dates"],
+            "mean_scores": series["mean_scores"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-@app.post("/plaid/transaction-score/")
-def score_transaction(transaction: Transaction):
-    """Score a single transaction based on custom logic."""
+# One entry of a batch scoring request: an existing transaction_id from the
+# user's dashboard window, or a hypothetical transaction
+class ScoreCandidate(BaseModel):
+    transaction_id: str = None
+    amount: float = None  # Plaid sign convention: positive = money out
+    date: str = None  # ISO date, defaults to today
+    category_id: int = None  # CAT_ID from the scoring config
+    personal_finance_category: dict = None  # or Plaid's {"primary", "detailed"}
+
+class TransactionScoreRequest(BaseModel):
+    transactions: list[ScoreCandidate]
+    details: bool = False
+
+MAX_SCORE_BATCH = 1000
+
+def window_history(window: dict):
+    """The window's scoreable transactions as a (transaction_id, date, amount, CAT_ID) frame."""
+    import pandas as pd
+
+    if window["scored_df"] is None:
+        return pd.DataFrame({"transaction_id": [], "date": [], "amount": [], "CAT_ID": []})
+    return window["scored_df"][["transaction_id", "date", "amount", "CAT_ID"]]
+
+def score_candidates(window: dict, candidates: list, details: bool = False):
+    """
+    Score candidates against a scored window. Existing transaction_ids get
+    the window's own scores. Each hypothetical is scored on its own as the
+    only new row on top of the window (TransactionScorer.score_candidates,
+    the broadcast what-if path): it counts towards repeat purchases, category
+    totals and the context features, but the other candidates in the batch
+    don't. Returns one result dict per candidate, in order; bad entries get
+    an "error" instead.
+    """
+    import pandas as pd
+
+    scoring = window["scoring"]
+    history = window_history(window)
+    row_by_tid = {tid: i for i, tid in enumerate(history["transaction_id"])}
+
+    pf_map = PF_MAP.get()
+    today = pd.Timestamp(date.today())
+    existing, hypothetical, results = [], [], []
+    for i, c in enumerate(candidates):
+        if c.transaction_id is not None and c.amount is None:
+            row = row_by_tid.get(c.transaction_id)
+            if row is None:
+                results.append({"transaction_id": c.transaction_id, "error": "Transaction not found in the scored window"})
+            else:
+                existing.append((i, row))
+                results.append(None)
+            continue
+
+        cat_id = c.category_id
+        if cat_id is None and c.personal_finance_category:
+            pfc = c.personal_finance_category
+            cat_id = pf_map.get((pfc.get("primary"), pfc.get("detailed")))
+        txn_date = pd.to_datetime(c.date, errors="coerce") if c.date else today
+        if c.amount is None or cat_id is None or pd.isna(txn_date):
+            results.append({
+                "transaction_id": c.transaction_id,
+                "error": "Hypothetical transactions need amount, a valid date and category_id or a known personal_finance_category",
+            })
+            continue
+
+        hypothetical.append((i, c.transaction_id or f"candidate-{i}", txn_date, c.amount, int(cat_id)))
+        results.append(None)
+
+    def json_value(value):
+        # Unscored rows (and config cells left blank) come back as NaN
+        return None if pd.isna(value) else value
+
+    if existing:
+        scored = window["scored_df"]
+        if details:
+            # The stored window was scored without details; the same frame and
+            # context features give the same scores with them
+            scored = scoring.scorer.score_all_transactions(history, window["context_features"], details=True)
+        for i, row in existing:
+            result = {
+                "transaction_id": scored["transaction_id"].iat[row],
+                "hypothetical": False,
+                "score": json_value(float(scored["score"].iat[row])),
+                "is_scored": bool(scored["is_scored"].iat[row]),
+                "profile": json_value(scored["profile"].iat[row]),
+                "severity": json_value(scored["severity"].iat[row]),
+            }
+            if details:
+                result["details"] = scored["score_details"].iat[row]
+                if "context_bucket" in result["details"]:
+                    result["details"]["context_bucket"] = json_value(result["details"]["context_bucket"])
+            results[i] = result
+
+    if hypothetical:
+        _, tids, dates, amounts, cat_ids = zip(*hypothetical)
+        with stage("scoring", scorer_path="candidates") as s:
+            sim = scoring.scorer.score_candidates(
+                history, cat_ids, amounts, dates, window["start_date"], window["end_date"]
+            )
+            s.rows = len(hypothetical)
+        for k, (i, tid, *_) in enumerate(hypothetical):
+            is_scored = bool(sim["is_scored"][k])
+            result = {
+                "transaction_id": tid,
+                "hypothetical": True,
+                "score": json_value(float(sim["score"][k])),
+                "is_scored": is_scored,
+                "profile": sim["profile"][k],
+                "severity": sim["severity"][k] if is_scored else None,
+            }
+            if details:
+                result["details"] = {
+                    "base_score": json_value(float(sim["base_score"][k])),
+                    "pattern_penalty": float(sim["pattern_penalty"][k]),
+                    "context_bucket": json_value(sim["context_bucket"][k]),
+                    "safe_discretionary": float(sim["safe_discretionary"][k]),
+                }
+            results[i] = result
+    return results
+
+@app.post("/plaid/transaction-score/{uid}")
+@profiled
+def score_transactions(uid: str, req: TransactionScoreRequest):
+    """
+    Score a batch of transactions for a user in one round trip: existing ones
+    by transaction_id, hypothetical ones by amount / date / category. The
+    user's context features come from the cached dashboard window.
+    """
     try:
-        # TODO TODO TODO FIX Dummy scoring logic (to be replaced with real logic)
-        score = 100.0 - (transaction.amount / 10.0)  # Placeholder logic
-        
-        # TODO LLM LOGIC HERE (Generating Description/Reccomendations)
-        return {"transaction": transaction, "score": score}
+        if not req.transactions:
+            raise HTTPException(status_code=400, detail="transactions must not be empty")
+        if len(req.transactions) > MAX_SCORE_BATCH:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_SCORE_BATCH} transactions per request")
+
+        window = get_user_scored_window(uid, range_weeks=10)
+        return {
+            "config_version": window["scoring"].version,
+            "results": score_candidates(window, req.transactions, details=req.details),
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+class PurchaseSimulationRequest(BaseModel):
+    category_ids: list[int] = None
+    personal_finance_category: dict = None  # instead of category_ids: Plaid's {"primary", "detailed"}
+    amounts: list[float] = None
+    max_amount: float = None  # instead of amounts: `steps` evenly spaced amounts up to this
+    steps: int = 100
+
+MAX_SIMULATION_POINTS = 50000
+
+@app.post("/plaid/purchase-simulation/{uid}")
+@profiled
+def simulate_purchase(uid: str, req: PurchaseSimulationRequest):
+    """
+    What-if curves for a planned purchase (PurchaseAnalyzer): the score it
+    would get in each category at each amount, given the user's current
+    window, and the amounts at which its severity changes.
+    """
+    try:
+        category_ids = req.category_ids
+        if not category_ids and req.personal_finance_category:
+            pfc = req.personal_finance_category
+            cat_id = PF_MAP.get().get((pfc.get("primary"), pfc.get("detailed")))
+            if cat_id is None:
+                raise HTTPException(status_code=400, detail="Unknown personal_finance_category")
+            category_ids = [cat_id]
+        if not category_ids:
+            raise HTTPException(status_code=400, detail="category_ids or personal_finance_category is required")
+
+        amounts = req.amounts
+        if not amounts and req.max_amount and req.max_amount > 0 and req.steps > 0:
+            amounts = [req.max_amount * (i + 1) / req.steps for i in range(req.steps)]
+        if not amounts:
+            raise HTTPException(status_code=400, detail="amounts or a positive max_amount is required")
+        if len(category_ids) * len(amounts) > MAX_SIMULATION_POINTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_SIMULATION_POINTS} category x amount points")
+
+        import pandas as pd
+
+        window = get_user_scored_window(uid, range_weeks=10)
+        scoring = window["scoring"]
+        with stage("purchase_simulation") as s:
+            sim = scoring.scorer.simulate_purchases(
+                window_history(window), category_ids, amounts, window["start_date"], window["end_date"]
+            )
+            s.rows = sim["score"].size
+
+        curves = []
+        for i, cat_id in enumerate(sim["category_ids"]):
+            profile = sim["profile"][i]
+            curves.append({
+                "category_id": int(cat_id),
+                "profile": None if pd.isna(profile) else profile,
+                "is_scored": bool(sim["is_scored"][i]),
+                "scores": [None if pd.isna(v) else float(v) for v in sim["score"][i]],
+                "severities": list(sim["severity"][i]),
+                "thresholds": sim["thresholds"][i],
+            })
+        return {
+            "config_version": scoring.version,
+            "amounts": sim["amounts"].tolist(),
+            "curves": curves,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 class TransactionDescription(BaseModel):
     transaction: Transaction
     score: float
     description: str  # LLM Generated
     recommendations: list  # LLM Generated
 
-@app.get("/plaid/transaction-description/{uid}/{transaction_id}")
-def get_transaction_description(uid: str, transaction_id: str):
-    """Fetch score and LLM-generated description + recommendations for a transaction."""
-    try:
-        # Fetch user's access token from Firestore
-        user_ref = db.collection("users").document(uid)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
-            raise HTTPException(status_code=404, detail="User not found in Firestore")
-        
-        access_token = user_doc.to_dict().get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=404, detail="Access token not found for user")
-        
-        # Fetch ALL transactions from Plaid
-        request = TransactionsGetRequest(
-            access_token=access_token,
-            start_date="1900-01-01",
-            end_date=date.today().strftime("%Y-%m-%d")
+def describe_transaction_job(uid: str, transaction_id: str):
+    """Job: score the dashboard window and generate one transaction's description."""
+    window = get_user_scored_window(uid, range_weeks=10)
+
+    # Find the specific transaction
+    table = window["table"]
+    row = table.row_of(transaction_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    transaction_data = table.records(rows=[row])[0]
+
+    description_doc = None
+    if window["scored_df"] is not None:
+        description_doc = describe_transaction(
+            FIRESTORE.get(),
+            window["scoring"].scorer,
+            uid,
+            transaction_data,
+            window["scored_df"],
+            window["context_features"],
         )
-        response = plaid_client.transactions_get(request)
-        transactions = response.to_dict().get("transactions", [])
-        
-        # Find the specific transaction
-        transaction_data = next((tx for tx in transactions if tx["transaction_id"] == transaction_id), None)
-        if not transaction_data:
-            raise HTTPException(status_code=404, detail="Transaction not found")
-        
-        # TODO TODO TODO NOTE NOTE NOTE Get score and dummy LLM-generated description and recommendations
-        
-        # Dummy LLM-generated description and recommendations (to be replaced with real LLM calls)
-        description = "This is a sample description generated by an LLM."
-        recommendations = ["Consider reducing spending in this category.", "Look for discounts or alternatives."]
-        
+
+    if description_doc is None:
+        # Not a scoreable category (income, transfers, ...)
         return {
             "transaction": transaction_data,
-            "score": 85.0,  # Placeholder score
-            "description": description,
-            "recommendations": recommendations
+            "score": None,
+            "description": "This transaction isn't scored, so there is nothing to improve here.",
+            "recommendations": [],
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-# backend/main.py - Holds our FastAPI backend endpoints, integrating with Firebase, Plaid, and LLMs
-import os
-from dotenv import load_dotenv
-
-# -----------------------------
-# Load environment variables first
-# -----------------------------
-load_dotenv()
-
-from fastapi import FastAPI, HTTPException, Body
-from fastapi.middleware.cors import CORSMiddleware
-
-import firebase_admin
-from firebase_admin import credentials, auth, firestore
-
-from .resolve_env import get_firebase_creds, get_plaid_secrets, get_hf_token
-from .llm_module import generate_gemini_suggestion, generate_suggestion
-
-import plaid
-from plaid.api import plaid_api
-from plaid.model.products import Products
-from plaid.model.link_token_create_request import LinkTokenCreateRequest
-from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
-from plaid.model.accounts_get_request import AccountsGetRequest
-from plaid.model.transactions_get_request import TransactionsGetRequest
-from plaid.model.country_code import CountryCode
 
-from pydantic import BaseModel
-from datetime import date, datetime, timedelta
-from collections import defaultdict
-
-# -----------------------------
-# Hugging Face token check
-# -----------------------------
-# HF_API_TOKEN = get_hf_token()
-# if not HF_API_TOKEN:
-#     raise ValueError("HF_API_TOKEN not set in environment variables. Add it to your .env file.")
-
-# -----------------------------
-# Firebase setup
-# -----------------------------
-if not firebase_admin._apps:
-    cred_dict = get_firebase_creds()
-    private_key = cred_dict.get("private_key")
-    if not private_key:
-        raise ValueError("Firebase private key missing from credentials")
-    cred_dict["private_key"] = private_key.replace("\\n", "\n")
-    cred = credentials.Certificate(cred_dict)
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
-
-# -----------------------------
-# Plaid client setup
-# -----------------------------
-plaid_secrets = get_plaid_secrets()
-configuration = plaid.Configuration(
-    host=plaid.Environment.Sandbox,
-    api_key={
-        "clientId": plaid_secrets["client_id"],
-        "secret": plaid_secrets["sandbox_secret"]
+    return {
+        "transaction": transaction_data,
+        "score": description_doc["score"],
+        "description": description_doc["description"],
+        "recommendations": description_doc["recommendations"],
     }
-)
-plaid_client = plaid_api.PlaidApi(plaid.ApiClient(configuration))
 
-# -----------------------------
-# FastAPI setup
-# -----------------------------
-app = FastAPI(title="Clarity Cash Backend")
-
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Adjust in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# How long a description request waits for generation before answering 202 + job id
+DESCRIPTION_WAIT_SECONDS = float(os.getenv("DESCRIPTION_WAIT_SECONDS", "15"))
+MAX_DESCRIPTION_WAIT_SECONDS = 60.0
 
-# Helper to get access token from uid from Firestore
-def get_access_token_from_uid(uid: str) -> str:
-    try:
-        user_ref = db.collection("users").document(uid)
-        user_doc = user_ref.get()
-        if user_doc.exists:
-            user_data = user_doc.to_dict()
-            return user_data.get("access_token", "")
-        else:
-            raise ValueError("User not found in Firestore")
-    except Exception as e:
-        raise ValueError(f"Error fetching access token: {str(e)}")
-    
-# Helper to get date ranges in standardized format
-def get_time_date_range(range_weeks: int = 10):
+@app.get("/plaid/transaction-description/{uid}/{transaction_id}")
+@profiled
+def get_transaction_description(uid: str, transaction_id: str, wait: float = DESCRIPTION_WAIT_SECONDS):
     """
-    Returns (end_date, start_date) as datetime.date objects.
-    end_date = today, start_date = end_date - range_weeks
+    Fetch score and LLM-generated description + recommendations for a transaction.
+    When generation takes longer than `wait` seconds, answers 202 with a job
+    to poll at /jobs/{job_id}.
     """
-    end_date = date.today()
-    start_date = end_date - timedelta(weeks=range_weeks)
-    return end_date, start_date
-
-# -----------------------------
-# Basic routes
-# -----------------------------
-@app.get("/")
-def root():
-    return {"message": "FastAPI + Firebase + Plaid backend running!"}
-
-@app.get("/health")
-def health_check():
-    return {"status": "ok"}
-
-# -----------------------------
-# Firebase user endpoint
-# -----------------------------
-@app.get("/users/{uid}")
-def get_user(uid: str):
     try:
-        user = auth.get_user(uid)
-        return {"uid": user.uid, "email": user.email, "display_name": user.display_name}
-    except Exception as e:
-        raise HTTPException(status_code=404, detail=str(e))
-
-# -----------------------------
-# Plaid endpoints
-# -----------------------------
-@app.get("/plaid/link-token")
-def create_sandbox_link_token():
-    try:
-        request = LinkTokenCreateRequest(
-            user={"client_user_id": "test_user"},
-            client_name="Clarity Cash App",
-            products=[Products("transactions")],
-            country_codes=[CountryCode("US")],
-            language="en"
-        )
-        response = plaid_client.link_token_create(request)
-        return {"link_token": response.link_token}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-class TokenExchangeRequest(BaseModel):
-    uid: str
-    public_token: str
-
-@app.post("/plaid/sandbox-exchange-token")
-def exchange_sandbox_public_token(req: TokenExchangeRequest = Body(...)):
-    try:
-        request = ItemPublicTokenExchangeRequest(public_token=req.public_token)
-        response_as_dict = plaid_client.item_public_token_exchange(request).to_dict()
-        access_token = response_as_dict.get("access_token")
-
-        # Store in Firestore
+        # Descriptions for low-score transactions are precomputed after sync;
+        # ones generated under an older scoring config are regenerated
+        cached = get_cached_description(FIRESTORE.get(), uid, transaction_id, current_config_version())
+        if cached:
+            return {
+                "transaction": cached.get("transaction"),
+                "score": cached.get("score"),
+                "description": cached.get("description"),
+                "recommendations": cached.get("recommendations", []),
+            }
+
+        # Cache miss: generate on the job queue at interactive priority and
+        # wait for it; a slow generation hands back a job to poll instead
         try:
-            user_ref = db.collection("users").document(req.uid)
-            user_ref.set({"uid": req.uid, "access_token": access_token}, merge=True)
-        except Exception as firestore_error:
-            print(f"[ERROR] Firestore write failed: {firestore_error}")
-
-        return {"success": True, "access_token": access_token}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@app.get("/plaid/accounts/{access_token}")
-def get_plaid_accounts(access_token: str):
-    try:
-        request = AccountsGetRequest(access_token=access_token)
-        response = plaid_client.accounts_get(request)
-        return response.to_dict()
+            job = JOBS.submit("describe_transaction", describe_transaction_job, uid, transaction_id,
+                              user=uid, priority=INTERACTIVE, key=f"describe:{uid}:{transaction_id}")
+        except QueueFull:
+            raise HTTPException(status_code=503, detail="Too much work queued, try again shortly")
+
+        if not job.wait(min(max(wait, 0.0), MAX_DESCRIPTION_WAIT_SECONDS)):
+            return JSONResponse(status_code=202, content={
+                "job_id": job.id,
+                "state": job.state,
+                "status_url": f"/jobs/{job.id}",
+            })
+        if job.state == "succeeded":
+            return job.result
+        if isinstance(job.exception, HTTPException):
+            raise job.exception
+        raise HTTPException(status_code=500, detail=job.error or f"Description job {job.state}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # -----------------------------
-# Gemini endpoint
+# Background jobs
 # -----------------------------
-class GeminiRequest(BaseModel):
-    transaction_name: str
-    transaction_amount: float
-    category: str
-    user_context: dict = None
-
-@app.post("/gemini-suggestion")
-def gemini_suggestion(request: GeminiRequest):
-    try:
-        suggestion = generate_gemini_suggestion(
-            transaction_name=request.transaction_name,
-            transaction_amount=request.transaction_amount,
-            category=request.category,
-            user_context=request.user_context
-        )
-        return {"suggestion": suggestion}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status (and, once succeeded, result) of a queued job, e.g. a slow description."""
+    status = JOBS.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """Cancel a job: queued jobs never run, running ones stop at their next checkpoint."""
+    status = JOBS.cancel(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
 
 # -----------------------------
-# General LLM endpoint
+# Admin: scoring config
 # -----------------------------
-class LLMRequest(BaseModel):
-    prompt: str
+@app.get("/admin/scoring-config", dependencies=[Depends(require_admin)])
+def get_scoring_config():
+    """Active config version, where it came from and recent reloads in this worker."""
+    return SCORING.get().status()
 
-@app.post("/llm-suggestion")
-def llm_suggestion(request: LLMRequest):
+@app.post("/admin/scoring-config", dependencies=[Depends(require_admin)])
+async def push_scoring_config(request: Request):
+    """
+    Replace the scoring config with the uploaded xlsx (raw request body).
+    This worker swaps immediately; the others pick up the rewritten file on
+    their next poll. An invalid workbook is rejected and nothing changes.
+    """
+    data = await request.body()
+    if not data:
+        raise HTTPException(status_code=400, detail="Request body must be the config .xlsx file")
     try:
-        suggestion = generate_suggestion(request.prompt)
-        return {"suggestion": suggestion}
+        # Parsing + compiling takes a while; keep it off the event loop
+        snapshot = await run_in_threadpool(SCORING.get().load_from_bytes, data)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-# Class for populating paycheck spending graph
-class paycheckSpending(BaseModel):
-    last_paycheck_amount: float
-    last_paycheck_date: str
-    transactions: list
-    
-@app.get("/plaid/paycheck-spending/{uid}")
-def get_paycheck_spending(uid: str):
-    """Fetch paycheck spending data for a user."""
-    try:
-        # Fetch user's access token from Firestore
-        user_ref = db.collection("users").document(uid)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
-            raise HTTPException(status_code=404, detail="User not found in Firestore")
-        
-        access_token = user_doc.to_dict().get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=404, detail="Access token not found for user")
-        
-        # Observe the last 6 weeks of transactions
-        end_date_today, start_date = get_time_date_range(range_weeks=6)
-        
-        # Fetch transactions from Plaid
-        request = TransactionsGetRequest(
-            access_token=access_token,
-            start_date=start_date,          # pass date object
-            end_date=end_date_today         # pass date object
-        )
-        response = plaid_client.transactions_get(request)
-        transactions = response.to_dict().get("transactions", [])
-        
-        # Retrieve the last deposit made to the account as the last paycheck
-        sorted_transactions = sorted(transactions, key=lambda x: x['date'], reverse=True)
-        last_paycheck = None
-        for tx in sorted_transactions:
-            if tx['amount'] < 0:  # Assuming negative amount means deposit/inflow
-                last_paycheck = tx
-                break  # Break at first instance
-        
-        # Calculate spent since last paycheck
-        if last_paycheck:
-            last_paycheck_amount = abs(last_paycheck['amount'])
-            last_paycheck_date = last_paycheck['date']
-            # Calculate spent since paycheck (sum of outflows since that date)
-            spent_since_paycheck = sum(
-                tx['amount']
-                for tx in transactions
-                if tx['date'] >= last_paycheck_date and tx['amount'] > 0
-            )
-            # Cap at 100
-            spent_since_paycheck = min(spent_since_paycheck, 100)
-        else:
-            # Handle case where no deposit found
-            last_paycheck_amount = 0.0
-            last_paycheck_date = "N/A"
-            spent_since_paycheck = 0.0
-
-        return {
-            "last_paycheck_amount": last_paycheck_amount,
-            "last_paycheck_date": last_paycheck_date,
-            "spent_since_paycheck": spent_since_paycheck
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-# Class for each transaction
-class Transaction(BaseModel):
-    transaction_id: str
-    date: str
-    merchant: str
-    category: list
-    amount: float
-    score: float
-    pending: bool
+        raise HTTPException(status_code=400, detail=f"Invalid scoring config: {e}")
+    return {"version": snapshot.version, "source": snapshot.source, "loaded_at": snapshot.loaded_at}
 
-@app.get("/plaid/transactions/{uid}")
-def get_user_transactions(uid: str):
-    # Fetch the user's access token from Firestore
+@app.post("/admin/scoring-config/reload", dependencies=[Depends(require_admin)])
+def reload_scoring_config():
+    """Re-read the config file now instead of waiting for the next poll."""
     try:
-        user_ref = db.collection("users").document(uid)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
-            raise HTTPException(status_code=404, detail="User not found in Firestore")
-        
-        access_token = user_doc.to_dict().get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=404, detail="Access token not found for user")
-        
-        end_date_today, start_date = get_time_date_range(range_weeks=10)
-        
-        # Fetch transactions from Plaid (last 10 weeks as example)
-        request = TransactionsGetRequest(
-            access_token=access_token,
-            start_date=start_date,          # pass date object
-            end_date=end_date_today         # pass date object
-        )
-        response = plaid_client.transactions_get(request)
-        transactions = response.to_dict().get("transactions", [])
-        
-        # TODO FIX WITH REAL SCORES - Add placeholder scores to transactions
-        for txn in transactions:
-            # TODO FIX Placeholder scoring logic: higher amounts get lower scores
-            amount = abs(txn.get("amount", 0))
-            score = max(0, min(100, 100 - (amount / 10)))
-            txn["score"] = round(score, 2)
-        
-        return {"transactions": transactions}
-    
+        snapshot = SCORING.get().load_from_path()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        record_error("scoring_config_reload", e)
+        raise HTTPException(status_code=500, detail=f"Reload failed, keeping {current_config_version()}: {e}")
+    return {"version": snapshot.version, "source": snapshot.source, "loaded_at": snapshot.loaded_at}
 
-# Class for 7-day mean spending score over the past month
-class SpendingScore(BaseModel):
-    dates: list
-    scores: list
+# -----------------------------
+# Admin: background jobs
+# -----------------------------
+@app.get("/admin/jobs", dependencies=[Depends(require_admin)])
+def list_jobs(limit: int = 50):
+    """Job queue depth per kind, outcome counts and this worker's recent jobs."""
+    return {**JOBS.stats(), "jobs": JOBS.recent(limit)}
 
-@app.get("/plaid/mean-spending-scores-month/{uid}")
-def get_mean_spending_scores_month(uid: str):
-    """Fetch 7-day mean spending scores over the past month for a user."""
-    try:
-        # Fetch user's access token from Firestore
-        access_token = get_access_token_from_uid(uid)
-        
-        if not access_token:
-            raise HTTPException(status_code=404, detail="Access token not found for user")
-        
-        end_date_today, start_date = get_time_date_range(range_weeks=10)
-        
-        # Fetch transactions from Plaid
-        request = TransactionsGetRequest(
-            access_token=access_token,
-            start_date=start_date,          # pass date object
-            end_date=end_date_today         # pass date object
-        )
-        response = plaid_client.transactions_get(request)
-        transactions = response.to_dict().get("transactions", [])
-        
-        # Group transactions by week and calculate scores
-        weekly_data = defaultdict(lambda: {"total_amount": 0, "count": 0})
-        
-        for txn in transactions:
-            # Parse transaction date string to date object
-            if isinstance(txn["date"], str):
-                txn_date = datetime.strptime(txn["date"], "%Y-%m-%d").date()
-            else:
-                txn_date = txn["date"]
-            # Calculate week number (0-9) from start_date
-            days_from_start = (txn_date - start_date).days
-            week_num = days_from_start // 7
-            
-            if 0 <= week_num < 10:  # Only include transactions within 10 weeks
-                # Only count positive amounts (spending, not income)
-                amount = txn["amount"]
-                if amount > 0:
-                    weekly_data[week_num]["total_amount"] += amount
-                    weekly_data[week_num]["count"] += 1
-        
-        # Calculate mean scores for each week
-        dates = []
-        scores = []
-        
-        for week in range(10):
-            week_start_date = start_date + timedelta(weeks=week)
-            dates.append(week_start_date.strftime("%Y-%m-%d"))
-            
-            # TODO TODO TODO RESOLVE THIS WITH REAL SCORES
-            if weekly_data[week]["count"] > 0:
-                # Calculate a score: higher spending = lower score
-                avg_spending = weekly_data[week]["total_amount"] / weekly_data[week]["count"]
-                # Score formula: 100 - (avg_spending / 10), clamped between 0-100
-                score = max(0, min(100, 100 - (avg_spending / 10)))
-                scores.append(round(score, 2))
-            else:
-                # No transactions this week, assign neutral score
-                scores.append(50.0)
-        
-        return {
-            "dates": dates,
-            "mean_scores": scores
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-@app.post("/plaid/transaction-score/")
-def score_transaction(transaction: Transaction):
-    """Score a single transaction based on custom logic."""
-    try:
-        # TODO TODO TODO FIX Dummy scoring logic (to be replaced with real logic)
-        score = 100.0 - (transaction.amount / 10.0)  # Placeholder logic
-        
-        # TODO LLM LOGIC HERE (Generating Description/Reccomendations)
-        return {"transaction": transaction, "score": score}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    
-class TransactionDescription(BaseModel):
-    transaction: Transaction
-    score: float
-    description: str  # LLM Generated
-    recommendations: list  # LLM Generated
+# -----------------------------
+# Admin: Plaid rate governor
+# -----------------------------
+@app.get("/admin/plaid-governor", dependencies=[Depends(require_admin)])
+def plaid_governor_status():
+    """This worker's Plaid budgets (current adaptive rates), in-flight calls and waiters."""
+    return GOVERNOR.status()
 
-@app.get("/plaid/transaction-description/{uid}/{transaction_id}")
-def get_transaction_description(uid: str, transaction_id: str):
-    """Fetch score and LLM-generated description + recommendations for a transaction."""
-    try:
-        # Fetch user's access token from Firestore
-        user_ref = db.collection("users").document(uid)
-        user_doc = user_ref.get()
-        if not user_doc.exists:
-            raise HTTPException(status_code=404, detail="User not found in Firestore")
-        
-        access_token = user_doc.to_dict().get("access_token")
-        if not access_token:
-            raise HTTPException(status_code=404, detail="Access token not found for user")
-        
-        # Fetch ALL transactions from Plaid
-        request = TransactionsGetRequest(
-            access_token=access_token,
-            start_date=date(1900, 1, 1),   # use date object, not string
-            end_date=date.today()          # use date object, not string
-        )
-        response = plaid_client.transactions_get(request)
-        transactions = response.to_dict().get("transactions", [])
-        
-        # Find the specific transaction
-        transaction_data = next((tx for tx in transactions if tx["transaction_id"] == transaction_id), None)
-        if not transaction_data:
-            raise HTTPException(status_code=404, detail="Transaction not found")
-        
-        # TODO TODO TODO NOTE NOTE NOTE Get score and dummy LLM-generated description and recommendations
-        
-        # Dummy LLM-generated description and recommendations (to be replaced with real LLM calls)
-        description = "This is a sample description generated by an LLM."
-        recommendations = ["Consider reducing spending in this category.", "Look for discounts or alternatives."]
-        
-        return {
-            "transaction": transaction_data,
-            "score": 85.0,  # Placeholder score
-            "description": description,
-            "recommendations": recommendations
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+# -----------------------------
+# Admin: profiling
+# -----------------------------
+PROFILE_MEDIA_TYPES = {
+    "folded": "text/plain",
+    "pstats": "application/octet-stream",
+    "html": "text/html",
+}
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def list_profiles():
+    """Stored profile captures, newest first."""
+    return {"modes": available_modes(), "captures": CAPTURES.list()}
+
+@app.get("/admin/profiles/{capture_id}", dependencies=[Depends(require_admin)])
+def get_profile(capture_id: str, format: str = "json"):
+    """One capture as json (summary + top functions), folded stacks, .pstats or pyinstrument html."""
+    capture = CAPTURES.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile capture not found")
+    if format not in capture.formats():
+        raise HTTPException(status_code=400, detail=f"format must be one of {capture.formats()}")
+
+    if format == "json":
+        return {**capture.summary(), "stats": capture.stats_text}
+    if format == "folded":
+        content = capture.folded_text()
+    elif format == "pstats":
+        content = capture.pstats_dump
+    else:
+        content = capture.html
+
+    headers = {}
+    if format == "pstats":
+        headers["Content-Disposition"] = f'attachment; filename="{capture.id}.pstats"'
+    return Response(content=content, media_type=PROFILE_MEDIA_TYPES[format], headers=headers)
+
+@app.post("/admin/profile/sample", dependencies=[Depends(require_admin)])
+def sample_profile(seconds: float = 10.0, interval_ms: float = 5.0, requests_only: bool = True):
+    """Sample live request threads for a window; download the result as folded stacks."""
+    if seconds <= 0 or interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="seconds and interval_ms must be positive")
+    capture = sample_window(seconds, interval=interval_ms / 1000.0, requests_only=requests_only)
+    return capture.summary()
@@ -0,0 +1,168 @@
+# backend/paycheck_analyzer.py - Paycheck detection and spend-since-paycheck over a txns frame
+import numpy as np
+import pandas as pd
+
+# Deposits smaller than this fraction of the median income deposit (interest,
+# small refunds, ...) are not treated as paychecks
+MIN_PAYCHECK_FRACTION = 0.5
+
+# (name, typical gap in days), matched against the median gap between paychecks
+CADENCES = (
+    ("weekly", 7),
+    ("biweekly", 14),
+    ("semimonthly", 15.2),
+    ("monthly", 30.4),
+)
+
+# A gap within this many days of the cadence counts as "on schedule"
+CADENCE_TOLERANCE_DAYS = 3
+
+
+def income_cat_ids(cfg):
+    """CAT_IDs whose CONTEXT_BUCKET is EFFECTIVE_INCOME in the scoring config."""
+    return cfg.loc[cfg["CONTEXT_BUCKET"] == "EFFECTIVE_INCOME", "CAT_ID"].astype(int).unique()
+
+
+def detect_cadence(paycheck_days):
+    """
+    Classify the gaps between paycheck days (int day numbers, sorted).
+    Returns {"cadence", "median_gap_days", "regularity"}; regularity is the share
+    of gaps within CADENCE_TOLERANCE_DAYS of the matched cadence.
+    """
+    if len(paycheck_days) < 2:
+        return {"cadence": "unknown", "median_gap_days": None, "regularity": 0.0}
+
+    gaps = np.diff(paycheck_days)
+    median_gap = float(np.median(gaps))
+
+    names = [name for name, _ in CADENCES]
+    periods = np.array([days for _, days in CADENCES])
+    best = int(np.argmin(np.abs(periods - median_gap)))
+
+    if abs(periods[best] - median_gap) > CADENCE_TOLERANCE_DAYS:
+        cadence = "irregular"
+        regularity = 0.0
+    else:
+        cadence = names[best]
+        regularity = float(np.mean(np.abs(gaps - periods[best]) <= CADENCE_TOLERANCE_DAYS))
+
+    return {
+        "cadence": cadence,
+        "median_gap_days": median_gap,
+        "regularity": round(regularity, 2),
+    }
+
+
+def on_cadence(paycheck_days, cadence):
+    """
+    Mask of the paycheck days (sorted int day numbers) that keep to `cadence`
+    (a CADENCES name). After each kept paycheck, the deposit closest to one
+    period later (within CADENCE_TOLERANCE_DAYS) is the next paycheck; other
+    deposits before it are off-cycle (bonuses, refunds, ...) and dropped. With
+    no deposit on schedule (a missed paycheck), the next one is kept unless it
+    came too early. Unknown / irregular cadences keep every day.
+    """
+    period = dict(CADENCES).get(cadence)
+    keep = np.ones(len(paycheck_days), dtype=bool)
+    if period is None:
+        return keep
+
+    keep[1:] = False
+    last, i = paycheck_days[0], 1
+    while i < len(paycheck_days):
+        best, j = None, i
+        while j < len(paycheck_days) and paycheck_days[j] - last <= period + CADENCE_TOLERANCE_DAYS:
+            miss = abs(paycheck_days[j] - last - period)
+            if miss <= CADENCE_TOLERANCE_DAYS and (best is None or miss < abs(paycheck_days[best] - last - period)):
+                best = j
+            j += 1
+        if best is None:
+            best = i
+            if paycheck_days[i] - last < period - CADENCE_TOLERANCE_DAYS:
+                i += 1
+                continue
+        keep[best] = True
+        last, i = paycheck_days[best], best + 1
+    return keep
+
+
+def analyze_paychecks(txns, cfg):
+    """
+    Find paychecks (EFFECTIVE_INCOME inflows) in a txns frame with
+    date / amount / CAT_ID columns and compute spending for every pay period
+    in one pass. Plaid signs inflows negative, outflows positive.
+    """
+    dates = pd.to_datetime(txns["date"]).to_numpy().astype("datetime64[D]")
+    days = dates.astype(np.int64)
+    amounts = txns["amount"].to_numpy(dtype=float)
+    cat_ids = txns["CAT_ID"].to_numpy()
+
+    # 1) Income deposits, merged per day (split direct deposits land together)
+    is_income = np.isin(cat_ids, income_cat_ids(cfg)) & (amounts < 0)
+    income_days, inverse = np.unique(days[is_income], return_inverse=True)
+    income_amounts = np.bincount(inverse, weights=-amounts[is_income]) if len(income_days) else np.zeros(0)
+
+    # 2) Drop small deposits that aren't paychecks
+    if len(income_amounts):
+        keep = income_amounts >= MIN_PAYCHECK_FRACTION * np.median(income_amounts)
+        income_days = income_days[keep]
+        income_amounts = income_amounts[keep]
+
+    # 3) Once the deposits show a regular cadence, drop the off-cycle ones
+    cadence = detect_cadence(income_days)
+    keep = on_cadence(income_days, cadence["cadence"])
+    if not keep.all():
+        income_days = income_days[keep]
+        income_amounts = income_amounts[keep]
+        cadence = detect_cadence(income_days)
+
+    if not len(income_days):
+        return {"paychecks": [], **cadence}
+
+    # 4) Assign every outflow to the pay period of the last paycheck on/before it
+    is_spend = amounts > 0
+    spend_days = days[is_spend]
+    spend_amounts = amounts[is_spend]
+
+    period = np.searchsorted(income_days, spend_days, side="right") - 1
+    in_period = period >= 0
+    period = period[in_period]
+    spend_days = spend_days[in_period]
+    spend_amounts = spend_amounts[in_period]
+
+    n_periods = len(income_days)
+    spent = np.bincount(period, weights=spend_amounts, minlength=n_periods)
+
+    # 5) Cumulative spend per day within each period: sort by (period, day),
+    #    cumsum, then subtract each period's starting offset
+    order = np.lexsort((spend_days, period))
+    period = period[order]
+    spend_days = spend_days[order]
+    running = np.cumsum(spend_amounts[order])
+
+    period_start = np.searchsorted(period, np.arange(n_periods), side="left")
+    offsets = np.concatenate(([0.0], running))[period_start]
+    cumulative = running - offsets[period]
+
+    # Last entry per (period, day) holds that day's cumulative total
+    last_of_day = np.ones(len(period), dtype=bool)
+    if len(period) > 1:
+        last_of_day[:-1] = (period[1:] != period[:-1]) | (spend_days[1:] != spend_days[:-1])
+
+    day_labels = spend_days.astype("datetime64[D]").astype(str)
+    series = [[] for _ in range(n_periods)]
+    for p, d, c in zip(period[last_of_day], day_labels[last_of_day], cumulative[last_of_day]):
+        series[p].append({"date": d, "spent": round(float(c), 2)})
+
+    paycheck_dates = income_days.astype("datetime64[D]").astype(str)
+    paychecks = []
+    for i in range(n_periods):
+        paychecks.append({
+            "paycheck_date": paycheck_dates[i],
+            "paycheck_amount": round(float(income_amounts[i]), 2),
+            "next_paycheck_date": paycheck_dates[i + 1] if i + 1 < n_periods else None,
+            "spent": round(float(spent[i]), 2),
+            "cumulative_spend": series[i],
+        })
+
+    return {"paychecks": paychecks, **cadence}
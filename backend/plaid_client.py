@@ -1,9 +1,15 @@
 import os
-import plaid
-from plaid.api import plaid_api
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
+from plaid_governor import GOVERNOR, GovernedPlaidApi
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is the fallback
+    orjson = None
+
 ROOT_DIR = Path(__file__).resolve().parent.parent
 env_path = ROOT_DIR / ".env"
 load_dotenv(env_path)
@@ -11,13 +17,55 @@ load_dotenv(env_path)
 PLAID_CLIENT_ID = os.getenv("PLAID_CLIENT_ID")
 PLAID_SECRET = os.getenv("PLAID_SANDBOX_SECRET")
 
-configuration = plaid.Configuration(
-    host=plaid.Environment.Sandbox,
-    api_key={
-        "clientId": PLAID_CLIENT_ID,
-        "secret": PLAID_SECRET,
-    },
-)
+# Read large responses as raw JSON instead of building plaid-python models and
+# converting them back with to_dict(); PLAID_RAW_JSON=0 restores the typed path
+PLAID_RAW_JSON = os.getenv("PLAID_RAW_JSON", "1") != "0"
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """
+    The shared PlaidApi client, built on first use (importing plaid is slow).
+    Every call goes through the rate governor (plaid_governor.py).
+    """
+    import plaid
+    from plaid.api import plaid_api
+
+    configuration = plaid.Configuration(
+        host=os.getenv("PLAID_HOST") or plaid.Environment.Sandbox,
+        api_key={
+            "clientId": PLAID_CLIENT_ID,
+            "secret": PLAID_SECRET,
+        },
+    )
+
+    api_client = plaid.ApiClient(configuration)
+    return GovernedPlaidApi(plaid_api.PlaidApi(api_client), GOVERNOR)
+
+
+def _loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    import json
+
+    return json.loads(body)
+
+
+def call_json(operation, request, raw=None):
+    """
+    Call a PlaidApi endpoint (e.g. "transactions_get") and return the response
+    as plain dicts and lists. The raw path still builds and sends the typed
+    request and still raises plaid.ApiException on errors (so the governor's
+    rate-limit retries work), but skips response model deserialization: dates
+    stay ISO strings instead of datetime.date objects.
+    """
+    method = getattr(get_client(), operation)
+    if not (PLAID_RAW_JSON if raw is None else raw):
+        return method(request).to_dict()
 
-api_client = plaid.ApiClient(configuration)
-client = plaid_api.PlaidApi(api_client)
\ No newline at end of file
+    response = method(request, _preload_content=False)
+    try:
+        body = response.data
+    finally:
+        response.release_conn()
+    return _loads(body)
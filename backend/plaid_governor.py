@@ -0,0 +1,338 @@
+# backend/plaid_governor.py - Token-bucket rate limits and a concurrency cap in front of every Plaid API call
+#
+# plaid_client.get_client() hands out the PlaidApi wrapped in GovernedPlaidApi,
+# so every call (transactions_get / _sync, accounts_get, link token, token
+# exchange) first takes a token from
+#   - the client-wide bucket: PLAID_CLIENT_RATE calls/s for the whole client,
+#     split evenly across PLAID_GOVERNOR_PROCESSES worker processes, and
+#   - the item's bucket (keyed by access token): PLAID_ITEM_RATE calls/s,
+# plus one of PLAID_MAX_IN_FLIGHT concurrent-call slots.
+#
+# Callers with a request waiting on them (request threads, INTERACTIVE jobs) go
+# before webhook syncs and background jobs, and PLAID_INTERACTIVE_RESERVE slots
+# are kept for them. A RATE_LIMIT_EXCEEDED response halves the rate of the
+# bucket it concerns (the item's for per-item limits, the client's otherwise)
+# and pauses it; each success wins a little of the rate back. The call is then
+# retried once the pause is over, up to PLAID_RATE_LIMIT_RETRIES times.
+#
+# Item buckets are per process: two workers syncing the same item can overshoot
+# its budget briefly, which the backoff absorbs.
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from instrumentation import observe_plaid_wait, record_plaid_rate_limit, set_plaid_client_rate, track_plaid_waiter
+from job_queue import INTERACTIVE, NORMAL, current_priority
+
+_PROCESSES = max(1, int(os.getenv("PLAID_GOVERNOR_PROCESSES", "1")))
+
+# Plaid's client-wide limits are per endpoint (thousands per minute); one shared
+# budget well under the lowest of them keeps us clear of all of them
+DEFAULT_CLIENT_RATE = float(os.getenv("PLAID_CLIENT_RATE", "40")) / _PROCESSES
+DEFAULT_CLIENT_BURST = max(1.0, float(os.getenv("PLAID_CLIENT_BURST", "40")) / _PROCESSES)
+# Per-item limits are far tighter (e.g. 30/min for /transactions/get)
+DEFAULT_ITEM_RATE = float(os.getenv("PLAID_ITEM_RATE", "0.5"))
+DEFAULT_ITEM_BURST = float(os.getenv("PLAID_ITEM_BURST", "5"))
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("PLAID_MAX_IN_FLIGHT", "8"))
+DEFAULT_INTERACTIVE_RESERVE = int(os.getenv("PLAID_INTERACTIVE_RESERVE", "2"))
+DEFAULT_RATE_LIMIT_RETRIES = int(os.getenv("PLAID_RATE_LIMIT_RETRIES", "2"))
+
+# Longest a call waits for its turn before giving up with PlaidThrottled
+INTERACTIVE_MAX_WAIT_SECONDS = float(os.getenv("PLAID_INTERACTIVE_MAX_WAIT_SECONDS", "10"))
+BACKGROUND_MAX_WAIT_SECONDS = float(os.getenv("PLAID_BACKGROUND_MAX_WAIT_SECONDS", "120"))
+
+# Adaptive backoff: multiplicative decrease on a rate-limit response, additive recovery
+BACKOFF_FACTOR = 0.5
+MIN_RATE_FRACTION = 0.05
+RECOVERY_STEP = 0.05  # of the configured rate, per successful call
+BASE_PAUSE_SECONDS = 1.0
+MAX_PAUSE_SECONDS = 60.0
+
+# Lower-priority callers re-check this often while better ones are waiting
+YIELD_POLL_SECONDS = 0.05
+
+# Item buckets kept in memory (least recently used are dropped)
+MAX_ITEM_BUCKETS = 10000
+
+# RATE_LIMIT_EXCEEDED error codes that are about one item rather than the whole client
+ITEM_RATE_LIMIT_CODES = {
+    "ACCOUNTS_LIMIT",
+    "AUTH_LIMIT",
+    "BALANCE_LIMIT",
+    "IDENTITY_LIMIT",
+    "ITEM_GET_LIMIT",
+    "TRANSACTIONS_LIMIT",
+    "TRANSACTIONS_SYNC_LIMIT",
+}
+
+
+class PlaidThrottled(Exception):
+    """A Plaid call waited longer than its priority allows for a token, or stayed rate limited through its retries."""
+
+
+_priority_override = contextvars.ContextVar("plaid_priority", default=None)
+
+
+@contextmanager
+def plaid_priority(priority):
+    """Run the enclosed Plaid calls at `priority` (e.g. BACKGROUND in the batch scorer)."""
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+def caller_priority():
+    override = _priority_override.get()
+    return current_priority() if override is None else override
+
+
+def priority_class(priority):
+    if priority <= INTERACTIVE:
+        return "interactive"
+    return "normal" if priority <= NORMAL else "background"
+
+
+def rate_limit_details(error):
+    """(scope, retry_after_seconds) for a Plaid RATE_LIMIT_EXCEEDED error, else None."""
+    try:
+        info = json.loads(error.body)
+    except (AttributeError, TypeError, ValueError):
+        info = {}
+    if not isinstance(info, dict):
+        info = {}
+    if info.get("error_type") != "RATE_LIMIT_EXCEEDED" and getattr(error, "status", None) != 429:
+        return None
+
+    retry_after = None
+    headers = getattr(error, "headers", None)
+    if headers:
+        try:
+            retry_after = float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            pass
+    scope = "item" if info.get("error_code") in ITEM_RATE_LIMIT_CODES else "client"
+    return scope, retry_after
+
+
+class TokenBucket:
+    """`rate` tokens per second, up to `burst`; the rate adapts to rate-limit responses."""
+
+    def __init__(self, rate, burst):
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.strikes = 0
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0.0 = now)."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1.0
+
+    def rate_limited(self, now, retry_after=None):
+        self.strikes += 1
+        self.rate = max(self.configured_rate * MIN_RATE_FRACTION, self.rate * BACKOFF_FACTOR)
+        if retry_after is None:
+            retry_after = min(MAX_PAUSE_SECONDS, BASE_PAUSE_SECONDS * 2 ** (self.strikes - 1))
+        # Refill starts again once the pause is over
+        self.paused_until = max(self.paused_until, now + retry_after)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+    def succeeded(self):
+        self.strikes = 0
+        if self.rate < self.configured_rate:
+            self.rate = min(self.configured_rate, self.rate + self.configured_rate * RECOVERY_STEP)
+
+    def status(self, now):
+        return {
+            "rate": round(self.rate, 3),
+            "configured_rate": self.configured_rate,
+            "tokens": round(min(self.burst, self.tokens), 2),
+            "paused_for": round(max(0.0, self.paused_until - now), 2),
+        }
+
+
+class PlaidGovernor:
+    def __init__(self, client_rate=DEFAULT_CLIENT_RATE, client_burst=DEFAULT_CLIENT_BURST,
+                 item_rate=DEFAULT_ITEM_RATE, item_burst=DEFAULT_ITEM_BURST,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, interactive_reserve=DEFAULT_INTERACTIVE_RESERVE,
+                 rate_limit_retries=DEFAULT_RATE_LIMIT_RETRIES):
+        self.client_bucket = TokenBucket(client_rate, client_burst)
+        self.item_rate = item_rate
+        self.item_burst = item_burst
+        self.max_in_flight = max_in_flight
+        self.interactive_reserve = min(interactive_reserve, max_in_flight - 1)
+        self.rate_limit_retries = rate_limit_retries
+
+        self._cond = threading.Condition()
+        self._item_buckets = OrderedDict()
+        self._in_flight = 0
+        self._waiting = {}  # ticket -> (priority, item bucket or None)
+        self.counts = {outcome: 0 for outcome in ("calls", "waited", "rate_limited", "retried", "throttled")}
+        set_plaid_client_rate(self.client_bucket.rate)
+
+    def _item_bucket(self, item):
+        bucket = self._item_buckets.get(item)
+        if bucket is None:
+            bucket = self._item_buckets[item] = TokenBucket(self.item_rate, self.item_burst)
+            while len(self._item_buckets) > MAX_ITEM_BUCKETS:
+                self._item_buckets.popitem(last=False)
+        else:
+            self._item_buckets.move_to_end(item)
+        return bucket
+
+    def _delay(self, priority, bucket, now):
+        """Seconds to wait before this caller may go (0.0 = go), or None to wait for a release."""
+        limit = self.max_in_flight if priority <= INTERACTIVE else self.max_in_flight - self.interactive_reserve
+        if self._in_flight >= limit:
+            return None
+        delay = self.client_bucket.wait_time(now)
+        if bucket is not None:
+            delay = max(delay, bucket.wait_time(now))
+        if delay > 0:
+            return delay
+        # Step aside for better-priority callers whose own item has a token
+        for other_priority, other_bucket in self._waiting.values():
+            if other_priority < priority and (other_bucket is None or other_bucket.wait_time(now) == 0):
+                return YIELD_POLL_SECONDS
+        return 0.0
+
+    def acquire(self, operation, item=None, priority=None):
+        """
+        Block until a call for `item` may go out. Returns the item's bucket (or
+        None), which must be handed back to release(). Raises PlaidThrottled
+        when the caller's priority has waited too long.
+        """
+        priority = caller_priority() if priority is None else priority
+        cls = priority_class(priority)
+        max_wait = INTERACTIVE_MAX_WAIT_SECONDS if priority <= INTERACTIVE else BACKGROUND_MAX_WAIT_SECONDS
+        started = time.monotonic()
+        ticket = object()
+
+        with self._cond:
+            bucket = self._item_bucket(item) if item is not None else None
+            delay = self._delay(priority, bucket, started)
+            if delay != 0.0:
+                self._waiting[ticket] = (priority, bucket)
+                track_plaid_waiter(cls, 1)
+                try:
+                    while delay != 0.0:
+                        remaining = started + max_wait - time.monotonic()
+                        if remaining <= 0:
+                            self.counts["throttled"] += 1
+                            raise PlaidThrottled(f"Plaid {operation} waited {max_wait:g}s for its rate limit")
+                        self._cond.wait(remaining if delay is None else min(delay, remaining))
+                        delay = self._delay(priority, bucket, time.monotonic())
+                finally:
+                    del self._waiting[ticket]
+                    track_plaid_waiter(cls, -1)
+                self.counts["waited"] += 1
+
+            self.client_bucket.take()
+            if bucket is not None:
+                bucket.take()
+            self._in_flight += 1
+            self.counts["calls"] += 1
+
+        observe_plaid_wait(operation, cls, time.monotonic() - started)
+        return bucket
+
+    def release(self, operation, bucket, rate_limit=None):
+        """Hand back a call's slot; rate_limit is rate_limit_details() of its error, if any."""
+        with self._cond:
+            self._in_flight -= 1
+            if rate_limit is None:
+                self.client_bucket.succeeded()
+                if bucket is not None:
+                    bucket.succeeded()
+            else:
+                scope, retry_after = rate_limit
+                target = bucket if scope == "item" and bucket is not None else self.client_bucket
+                target.rate_limited(time.monotonic(), retry_after)
+                self.counts["rate_limited"] += 1
+            set_plaid_client_rate(self.client_bucket.rate)
+            self._cond.notify_all()
+        if rate_limit is not None:
+            record_plaid_rate_limit(operation, rate_limit[0])
+
+    def call(self, operation, fn, *args, item=None, **kwargs):
+        """fn(*args, **kwargs) under the item's and the client's budgets, retrying rate-limited calls."""
+        for attempt in range(self.rate_limit_retries + 1):
+            bucket = self.acquire(operation, item)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                rate_limit = rate_limit_details(e)
+                self.release(operation, bucket, rate_limit)
+                if rate_limit is None:
+                    raise
+                if attempt == self.rate_limit_retries:
+                    raise PlaidThrottled(f"Plaid {operation} still rate limited after {attempt} retries") from e
+                # acquire() waits out the pause rate_limited() just set
+                self.counts["retried"] += 1
+                continue
+            self.release(operation, bucket)
+            return result
+
+    def status(self):
+        now = time.monotonic()
+        with self._cond:
+            waiting = {}
+            for priority, _ in self._waiting.values():
+                cls = priority_class(priority)
+                waiting[cls] = waiting.get(cls, 0) + 1
+            return {
+                "client": self.client_bucket.status(now),
+                "item_rate": self.item_rate,
+                "item_burst": self.item_burst,
+                "items_tracked": len(self._item_buckets),
+                "items_backed_off": sum(1 for b in self._item_buckets.values() if b.rate < b.configured_rate),
+                "max_in_flight": self.max_in_flight,
+                "interactive_reserve": self.interactive_reserve,
+                "in_flight": self._in_flight,
+                "waiting": waiting,
+                "counts": dict(self.counts),
+            }
+
+
+class GovernedPlaidApi:
+    """PlaidApi stand-in that runs every endpoint call through a PlaidGovernor."""
+
+    def __init__(self, api, governor):
+        self._api = api
+        self.governor = governor
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def governed(*args, **kwargs):
+            # Requests that carry an access token count against that item's budget
+            item = getattr(args[0], "access_token", None) if args else None
+            return self.governor.call(name, attr, *args, item=item, **kwargs)
+
+        return governed
+
+
+GOVERNOR = PlaidGovernor()
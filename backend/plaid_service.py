@@ -3,26 +3,41 @@ from typing import List, Dict
 from pathlib import Path
 import pandas as pd
 
-from plaid_client import client
+from plaid_client import call_json
 from plaid.model.transactions_get_request import TransactionsGetRequest
 from plaid.model.transactions_get_request_options import TransactionsGetRequestOptions
+from plaid.model.accounts_get_request import AccountsGetRequest
 
-def fetch_plaid_transactions(access_token, start_date, end_date, count):
-	request = TransactionsGetRequest(
-		access_token=access_token,
-		start_date=start_date,
-		end_date=end_date,
-		options=TransactionsGetRequestOptions(
-			count=count,
-			offset=0,
-			include_personal_finance_category=True,
-		),
-	)
+def fetch_plaid_transactions(access_token, start_date, end_date, count, raw=None):
+	"""
+	Every Plaid transaction dict in the window, fetched `count` (at most 500)
+	per page until total_transactions is reached; raw=None follows
+	PLAID_RAW_JSON (see plaid_client.call_json).
+	"""
+	transactions = []
+	while True:
+		request = TransactionsGetRequest(
+			access_token=access_token,
+			start_date=start_date,
+			end_date=end_date,
+			options=TransactionsGetRequestOptions(
+				count=count,
+				offset=len(transactions),
+				include_personal_finance_category=True,
+			),
+		)
 
-	response = client.transactions_get(request)
-	data = response.to_dict()
+		data = call_json("transactions_get", request, raw=raw)
+		page = data.get("transactions", [])
+		transactions.extend(page)
+		if not page or len(transactions) >= data.get("total_transactions", 0):
+			return transactions
 
-	return data.get("transactions", [])
+def fetch_plaid_accounts(access_token, raw=None):
+	"""Plaid account dicts for one item."""
+	data = call_json("accounts_get", AccountsGetRequest(access_token=access_token), raw=raw)
+
+	return data.get("accounts", [])
 
 def load_pf_taxonomy_map():
 	ROOT_DIR = Path(__file__).resolve().parent
@@ -38,12 +53,10 @@ def load_pf_taxonomy_map():
 	return mapping
 	
 def plaid_to_txns_df(plaid_txns, pf_map):
-    rows = []
+    # Collected column by column rather than as one dict per row
+    tids, dates, amounts, cat_ids = [], [], [], []
 
     for t in plaid_txns:
-        date = t["date"]
-        amount = t["amount"]
-
         pfc = t.get("personal_finance_category") or {}
         primary = pfc.get("primary")
         detailed = pfc.get("detailed")
@@ -53,15 +66,17 @@ def plaid_to_txns_df(plaid_txns, pf_map):
         if cat_id is None:
             continue
 
-        rows.append({
-            "transaction_id": t["transaction_id"],
-            "date": date,
-            "amount": amount,
-            "CAT_ID": cat_id,
-        })
+        tids.append(t["transaction_id"])
+        dates.append(t["date"])
+        amounts.append(t["amount"])
+        cat_ids.append(cat_id)
 
-    df = pd.DataFrame(rows)
-    df["date"] = pd.to_datetime(df["date"])
+    df = pd.DataFrame({
+        "transaction_id": tids,
+        "date": pd.to_datetime(dates),
+        "amount": amounts,
+        "CAT_ID": cat_ids,
+    })
     df["CAT_ID"] = df["CAT_ID"].astype(int)
 
     return df
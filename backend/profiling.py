@@ -0,0 +1,326 @@
+# backend/profiling.py - On-demand request profiling and a windowed sampling profiler (admin only)
+#
+# Per request: send `X-Profile: sample|cprofile|pyinstrument` with a valid
+# X-Admin-Token. The response is unchanged apart from an X-Profile-Id header;
+# fetch the capture from /admin/profiles/{id}.
+#
+# Over a window: POST /admin/profile/sample?seconds=10 samples every thread
+# and attributes stacks to the requests they were serving.
+#
+# "folded" output (frame;frame;frame count per line) feeds flamegraph.pl,
+# inferno or speedscope directly; cProfile captures download as .pstats for
+# snakeviz / gprof2dot.
+import contextvars
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+
+from admin_auth import ADMIN_TOKEN_HEADER, is_admin
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Per-request sampling is fine-grained; window sampling runs alongside live
+# traffic and stays cheap
+REQUEST_SAMPLE_INTERVAL = 0.001
+WINDOW_SAMPLE_INTERVAL = 0.005
+MAX_WINDOW_SECONDS = 60
+
+# Captures kept in memory for download (oldest dropped first)
+MAX_STORED_CAPTURES = 50
+
+# Endpoint kwargs copied into a capture's tags
+TAGGED_KWARGS = ("uid", "transaction_id", "range_weeks", "bucket")
+
+_current_capture = contextvars.ContextVar("profile_capture", default=None)
+
+# thread id -> tags of the request that thread is serving, for window sampling
+_active_requests = {}
+
+
+def _pyinstrument_available():
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_modes():
+    modes = ["sample", "cprofile"]
+    if _pyinstrument_available():
+        modes.append("pyinstrument")
+    return modes
+
+
+class ProfileCapture:
+    def __init__(self, mode, tags=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.tags = dict(tags or {})
+        self.duration_sec = None
+        self.folded = Counter()
+        self.pstats_dump = None
+        self.stats_text = None
+        self.html = None
+
+    def formats(self):
+        formats = ["json"]
+        if self.folded:
+            formats.append("folded")
+        if self.pstats_dump is not None:
+            formats.append("pstats")
+        if self.html is not None:
+            formats.append("html")
+        return formats
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "created_at": self.created_at,
+            "duration_ms": round(self.duration_sec * 1000.0, 2) if self.duration_sec is not None else None,
+            "tags": self.tags,
+            "samples": sum(self.folded.values()) if self.mode == "sample" else None,
+            "formats": self.formats(),
+        }
+
+    def folded_text(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.folded.most_common())
+
+
+class CaptureStore:
+    def __init__(self, maxlen=MAX_STORED_CAPTURES):
+        self._captures = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, capture):
+        with self._lock:
+            self._captures.append(capture)
+
+    def get(self, capture_id):
+        with self._lock:
+            return next((c for c in self._captures if c.id == capture_id), None)
+
+    def list(self):
+        with self._lock:
+            return [c.summary() for c in reversed(self._captures)]
+
+
+CAPTURES = CaptureStore()
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame):
+    """Root-first `a;b;c` for a frame and its callers."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class StackSampler:
+    """
+    Samples Python stacks with sys._current_frames() from a daemon thread.
+    With thread_ids set only those threads are sampled; otherwise every thread
+    but the sampler's own. prefix(thread_id) can return a root label (e.g. the
+    route being served) so flamegraphs group by request; with labelled_only,
+    threads without a label (idle pool workers) are skipped.
+    """
+
+    def __init__(self, interval, thread_ids=None, prefix=None, labelled_only=False):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.prefix = prefix
+        self.labelled_only = labelled_only
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                label = self.prefix(thread_id) if self.prefix else None
+                if label is None and self.labelled_only:
+                    continue
+                stack = fold_stack(frame)
+                self.counts[f"{label};{stack}" if label else stack] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+
+def _folded_from_pyinstrument(frame, prefix=""):
+    """Folded stacks weighted by self time in microseconds."""
+    folded = Counter()
+    label = f"{frame.function} ({os.path.basename(frame.file_path or '?')}:{frame.line_no})"
+    stack = f"{prefix};{label}" if prefix else label
+    self_us = int(frame.total_self_time * 1_000_000)
+    if self_us:
+        folded[stack] += self_us
+    for child in frame.children:
+        folded.update(_folded_from_pyinstrument(child, stack))
+    return folded
+
+
+def _run_captured(capture, fn, args, kwargs):
+    started = time.perf_counter()
+    try:
+        if capture.mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(fn, *args, **kwargs)
+            finally:
+                profiler.create_stats()
+                capture.pstats_dump = marshal.dumps(profiler.stats)
+                text = io.StringIO()
+                pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(40)
+                capture.stats_text = text.getvalue()
+
+        if capture.mode == "pyinstrument":
+            from pyinstrument import Profiler
+
+            profiler = Profiler(interval=REQUEST_SAMPLE_INTERVAL, async_mode="disabled")
+            profiler.start()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                session = profiler.stop()
+                capture.html = profiler.output_html()
+                root = session.root_frame()
+                if root is not None:
+                    capture.folded = _folded_from_pyinstrument(root)
+
+        sampler = StackSampler(REQUEST_SAMPLE_INTERVAL, thread_ids={threading.get_ident()}).start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            capture.folded = sampler.stop()
+    finally:
+        capture.duration_sec = time.perf_counter() - started
+
+
+def profiled(fn):
+    """
+    Endpoint decorator (sync endpoints). Registers the worker thread for window
+    sampling and, when the request asked for a capture, runs the endpoint under
+    the requested profiler in that thread.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        thread_id = threading.get_ident()
+        tags = {"endpoint": fn.__name__, **{k: kwargs[k] for k in TAGGED_KWARGS if k in kwargs}}
+        _active_requests[thread_id] = tags
+        try:
+            capture = _current_capture.get()
+            if capture is None:
+                return fn(*args, **kwargs)
+            capture.tags.update(tags)
+            return _run_captured(capture, fn, args, kwargs)
+        finally:
+            _active_requests.pop(thread_id, None)
+
+    return wrapper
+
+
+def annotate_profile(**tags):
+    """Attach tags (transaction count, scorer path, ...) to the current request's captures."""
+    capture = _current_capture.get()
+    if capture is not None:
+        capture.tags.update(tags)
+    active = _active_requests.get(threading.get_ident())
+    if active is not None:
+        active.update(tags)
+
+
+async def profile_request_middleware(request, call_next):
+    mode = request.headers.get(PROFILE_HEADER)
+    if not mode:
+        return await call_next(request)
+
+    if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        return JSONResponse(status_code=403, content={"detail": "Profiling requires a valid admin token"})
+    if mode not in available_modes():
+        return JSONResponse(status_code=400, content={"detail": f"{PROFILE_HEADER} must be one of {available_modes()}"})
+
+    capture = ProfileCapture(mode, {"method": request.method, "path": request.url.path})
+    token = _current_capture.set(capture)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_capture.reset(token)
+
+    route = request.scope.get("route")
+    if route is not None:
+        capture.tags["route"] = route.path
+    capture.tags["status"] = response.status_code
+    CAPTURES.add(capture)
+    response.headers[PROFILE_ID_HEADER] = capture.id
+    return response
+
+
+def _request_label(thread_id):
+    tags = _active_requests.get(thread_id)
+    if tags is None:
+        return None
+    label = tags["endpoint"]
+    if "uid" in tags:
+        label += f"[uid={tags['uid']}]"
+    return label
+
+
+def sample_window(seconds, interval=WINDOW_SAMPLE_INTERVAL, requests_only=True):
+    """
+    Sample threads for `seconds`; stacks are rooted at the request they were
+    serving. requests_only=False also samples threads outside profiled endpoints.
+    """
+    seconds = min(float(seconds), MAX_WINDOW_SECONDS)
+    capture = ProfileCapture("sample", {
+        "window_sec": seconds,
+        "interval_ms": interval * 1000.0,
+        "requests_only": requests_only,
+    })
+
+    seen = {}
+    started = time.perf_counter()
+
+    def prefix(thread_id):
+        tags = _active_requests.get(thread_id)
+        if tags is not None:
+            seen.setdefault(tags.get("uid") or tags["endpoint"], dict(tags))
+        return _request_label(thread_id)
+
+    sampler = StackSampler(interval, prefix=prefix, labelled_only=requests_only).start()
+    time.sleep(seconds)
+    capture.folded = sampler.stop()
+    capture.duration_sec = time.perf_counter() - started
+    capture.tags["requests"] = list(seen.values())
+
+    CAPTURES.add(capture)
+    return capture
@@ -0,0 +1,214 @@
+# backend/prompt_builder.py - Compact, token-budgeted prompts for the transaction suggestion LLM
+import re
+from functools import lru_cache
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+TOKENIZER_PATH = ROOT_DIR / "clarity_llm" / "tokenizer.json"
+
+# Upper bound on prompt (input) tokens sent per suggestion request
+DEFAULT_PROMPT_TOKEN_BUDGET = 256
+
+# Static instructions go first so the tokenized prefix can be reused across calls
+PROMPT_PREFIX = """You are Clarity Cash AI, a friendly budgeting assistant.
+Generate:
+1. Up to 3 cheaper alternatives (Gemini options) with price and short explanation.
+2. One micro-action to optimize user's spending related to this transaction.
+3. Keep the tone friendly, concise, and playful. Include emoji if appropriate.
+"""
+
+# Scoring-relevant user_context fields, highest priority first. Lower-priority
+# lines are dropped first when the prompt goes over budget.
+#   (field, label, format)
+CONTEXT_FIELDS = (
+    ("score", "Score", "score"),
+    ("severity", "Severity", "text"),
+    ("profile", "Spend profile", "text"),
+    ("effective_income", "Income", "money"),
+    ("safe_discretionary", "Safe discretionary budget", "money"),
+    ("in_distress", "Financial distress", "flag"),
+    ("pct_of_safe_budget", "Share of safe budget", "pct"),
+    ("pct_of_income", "Share of income", "pct"),
+    ("buffer_ratio", "Buffer", "ratio"),
+    ("avoidable_harmful_share", "Harmful spend share", "ratio"),
+    ("avoidable_neutral_share", "Avoidable spend share", "ratio"),
+    ("structural_share", "Fixed costs share", "ratio"),
+    ("core_flex_share", "Core essentials share", "ratio"),
+    ("other_flex_share", "Other essentials share", "ratio"),
+    ("savings_rate", "Savings rate", "ratio"),
+    ("fees_ratio", "Fees share", "ratio"),
+    ("cash_adv_share", "Cash advance share", "ratio"),
+)
+
+# Nested dicts (from TransactionScorer.score_transaction output) that are
+# flattened into the projection
+_NESTED_CONTEXT_KEYS = ("capacity_info", "details")
+
+_FALLBACK_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+class PromptTokenizer:
+    """
+    Wraps the bundled clarity_llm tokenizer. Falls back to a word/punctuation
+    split when `tokenizers` isn't installed or the tokenizer file can't be loaded,
+    which keeps budgets roughly right without the model assets.
+    """
+
+    def __init__(self, path=TOKENIZER_PATH):
+        self._tokenizer = None
+        try:
+            from tokenizers import Tokenizer
+
+            self._tokenizer = Tokenizer.from_file(str(path))
+        except Exception:
+            self._tokenizer = None
+
+    @property
+    def is_fallback(self):
+        return self._tokenizer is None
+
+    def encode(self, text):
+        if self._tokenizer is None:
+            return _FALLBACK_TOKEN.findall(text)
+        return self._tokenizer.encode(text, add_special_tokens=False).ids
+
+    def count(self, text):
+        return len(self.encode(text))
+
+    def truncate(self, text, max_tokens):
+        """The longest prefix of text that is at most max_tokens tokens, cut on a token boundary."""
+        if max_tokens <= 0:
+            return ""
+        if self._tokenizer is None:
+            starts = [m.start() for m in _FALLBACK_TOKEN.finditer(text)]
+        else:
+            starts = [start for start, _ in self._tokenizer.encode(text, add_special_tokens=False).offsets]
+        if len(starts) <= max_tokens:
+            return text
+        # Cut where the first dropped token starts: a character split over
+        # several byte-level tokens is dropped whole
+        return text[: starts[max_tokens]].rstrip()
+
+
+@lru_cache(maxsize=1)
+def get_prompt_tokenizer():
+    return PromptTokenizer()
+
+
+@lru_cache(maxsize=8)
+def _prefix_token_count(prefix):
+    return get_prompt_tokenizer().count(prefix)
+
+
+def project_user_context(user_context):
+    """Flatten user_context down to the scoring-relevant fields in CONTEXT_FIELDS."""
+    if not user_context:
+        return {}
+
+    flat = {}
+    for key in _NESTED_CONTEXT_KEYS:
+        nested = user_context.get(key)
+        if isinstance(nested, dict):
+            flat.update(nested)
+    flat.update({k: v for k, v in user_context.items() if k not in _NESTED_CONTEXT_KEYS})
+
+    return {
+        field: flat[field]
+        for field, _, _ in CONTEXT_FIELDS
+        if flat.get(field) is not None
+    }
+
+
+def _format_value(value, fmt):
+    try:
+        if fmt == "money":
+            return f"${float(value):,.0f}"
+        if fmt == "ratio":
+            return f"{float(value) * 100:.1f}%"
+        if fmt == "pct":
+            return f"{float(value):.1f}%"
+        if fmt == "score":
+            return f"{float(value):.0f}/100"
+        if fmt == "flag":
+            return "yes" if value else "no"
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+def _context_lines(projected):
+    return [
+        f"- {label}: {_format_value(projected[field], fmt)}"
+        for field, label, fmt in CONTEXT_FIELDS
+        if field in projected
+    ]
+
+
+def _transaction_block(transaction_name, transaction_amount, category):
+    return (
+        "\nTransaction:\n"
+        f"- Name: {transaction_name}\n"
+        f"- Amount: ${transaction_amount:,.2f}\n"
+        f"- Category: {category}\n"
+    )
+
+
+def _token_cap(lengths, total):
+    """Largest per-field cap (at least 1) that brings sum(min(n, cap)) down to total."""
+    cap = max(lengths)
+    while cap > 1 and sum(min(n, cap) for n in lengths) > total:
+        cap -= 1
+    return cap
+
+
+def build_gemini_prompt(
+    transaction_name,
+    transaction_amount,
+    category,
+    user_context=None,
+    max_prompt_tokens=DEFAULT_PROMPT_TOKEN_BUDGET,
+):
+    """
+    Build the suggestion prompt within max_prompt_tokens.
+    Returns (prompt, token_count). Only the transaction-specific suffix is
+    tokenized per call; the instruction prefix's token count is cached.
+    """
+    tokenizer = get_prompt_tokenizer()
+    prefix_tokens = _prefix_token_count(PROMPT_PREFIX)
+
+    transaction_name, category = str(transaction_name), str(category)
+    transaction_block = _transaction_block(transaction_name, transaction_amount, category)
+    remaining = max_prompt_tokens - prefix_tokens - tokenizer.count(transaction_block)
+
+    # Very long merchant names or categories: cut them rather than the
+    # instructions, longest first, on token boundaries. A cut field can
+    # tokenize differently inside the block, so re-check until it fits.
+    while remaining < 0:
+        fields = [transaction_name, category]
+        lengths = [tokenizer.count(field) for field in fields]
+        cap = _token_cap(lengths, sum(lengths) + remaining)
+        cut = [tokenizer.truncate(field, cap) for field in fields]
+        if cut == fields:
+            break
+        transaction_name, category = cut
+        transaction_block = _transaction_block(transaction_name, transaction_amount, category)
+        remaining = max_prompt_tokens - prefix_tokens - tokenizer.count(transaction_block)
+
+    # Lines are newline-separated, so per-line counts add up to the block's count
+    context_block = ""
+    lines = _context_lines(project_user_context(user_context))
+    if lines:
+        header = "\nUser context:\n"
+        costs = [tokenizer.count(line + "\n") for line in lines]
+        header_cost = tokenizer.count(header)
+
+        kept = len(lines)
+        while kept and header_cost + sum(costs[:kept]) > remaining:
+            kept -= 1
+
+        if kept:
+            context_block = header + "".join(line + "\n" for line in lines[:kept])
+            remaining -= header_cost + sum(costs[:kept])
+
+    prompt = PROMPT_PREFIX + transaction_block + context_block
+    return prompt, max_prompt_tokens - remaining
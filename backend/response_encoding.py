@@ -0,0 +1,225 @@
+# backend/response_encoding.py - Compact encoding for large list responses: field projection, orjson/msgpack, gzip/brotli
+#
+#     return encoded_response(request, {"transactions": project(txns, fields)}, route="transactions")
+#
+# Content type comes from the Accept header: application/msgpack (or
+# application/x-msgpack) gets MessagePack when msgpack is installed, anything
+# else gets JSON (orjson when installed, the stdlib otherwise). The body is
+# then compressed with the best encoding in Accept-Encoding (br when brotli is
+# installed, else gzip) once it is larger than COMPRESS_MIN_BYTES. Given a
+# version, the response gets a strong ETag and If-None-Match is answered 304.
+import gzip
+import json
+import math
+import os
+from datetime import date, datetime
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from instrumentation import observe_response_size
+from score_store import SCORE_FIELDS
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is the fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; clients then always get JSON
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Smaller bodies go out uncompressed; compression would cost more than it saves
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Named `fields=` presets. "dashboard" is what the transaction list renders.
+FIELD_PRESETS = {
+    "dashboard": (
+        "transaction_id", "date", "name", "merchant_name", "category", "amount", "score", "pending",
+    ),
+}
+
+# Top-level keys of a Plaid transaction (plaid-python's Transaction model)
+PLAID_TRANSACTION_FIELDS = (
+    "account_id", "account_owner", "amount", "authorized_date", "authorized_datetime",
+    "business_finance_category", "category", "category_id", "check_number", "client_customization",
+    "counterparties", "date", "datetime", "iso_currency_code", "location", "logo_url",
+    "merchant_category_code", "merchant_entity_id", "merchant_name", "name", "original_description",
+    "payment_channel", "payment_meta", "pending", "pending_transaction_id", "personal_finance_category",
+    "personal_finance_category_icon_url", "running_balance", "transaction_code", "transaction_id",
+    "transaction_type", "unofficial_currency_code", "website",
+)
+
+# Keys a scored transaction can carry: Plaid's plus what scoring adds (stored
+# scores also keep their CAT_ID)
+KNOWN_FIELDS = frozenset(PLAID_TRANSACTION_FIELDS + SCORE_FIELDS + ("CAT_ID",))
+
+MAX_FIELDS = 50
+
+
+def parse_fields(fields):
+    """
+    `fields=` query value -> tuple of keys (None = every field). Accepts preset
+    names; any other name must be in KNOWN_FIELDS.
+    """
+    if fields is None:
+        return None
+    names = []
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        names.extend(FIELD_PRESETS.get(name, (name,)))
+    if not names:
+        raise HTTPException(status_code=400, detail="fields must name at least one field")
+    if len(names) > MAX_FIELDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_FIELDS} fields")
+    unknown = [name for name in dict.fromkeys(names) if name not in KNOWN_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(names))
+
+
+def project(records, fields):
+    """Keep only `fields` (a parse_fields result) of each record; keys a record lacks are skipped."""
+    if fields is None:
+        return records
+    return [{k: record[k] for k in fields if k in record} for record in records]
+
+
+def _plain(value):
+    # Values neither encoder handles natively (numpy scalars, dates for msgpack, ...)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return _finite(value.item())
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _finite(value):
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+def _clean(value):
+    # stdlib json: NaN -> None (orjson already writes null), everything else to plain types
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clean(v) for v in value]
+    if isinstance(value, float):
+        return _finite(value)
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    return _clean(_plain(value))
+
+
+def encode_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_plain, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_clean(payload), separators=(",", ":")).encode()
+
+
+def encode_msgpack(payload):
+    # Floats go out as msgpack doubles, so a NaN score stays NaN (JSON writes null)
+    return msgpack.packb(payload, default=_plain, use_bin_type=True)
+
+
+def wants_msgpack(accept):
+    if msgpack is None or not accept:
+        return False
+    return any(part.split(";")[0].strip() in MSGPACK_TYPES for part in accept.lower().split(","))
+
+
+def choose_encoding(accept_encoding):
+    """Best supported Content-Encoding for an Accept-Encoding header (None = identity)."""
+    offered = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name.strip()] = q
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if offered.get(encoding, offered.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def negotiate(request):
+    """(media_type, content encoding or None) for this request's Accept / Accept-Encoding headers."""
+    media_type = "application/msgpack" if wants_msgpack(request.headers.get("accept")) else "application/json"
+    return media_type, choose_encoding(request.headers.get("accept-encoding"))
+
+
+def entity_tag(version, media_type, encoding):
+    """Strong ETag for one representation (format + content encoding) of a versioned payload."""
+    return f'"{version}-{media_type.split("/")[1]}-{encoding or "identity"}"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def encoded_response(request, payload, route, status_code=200, version=None):
+    """
+    Encode `payload` for this request's Accept / Accept-Encoding headers.
+    With a `version` (anything that changes whenever the payload does) the
+    response carries an ETag and a matching If-None-Match gets a bodiless 304;
+    `payload` may then be a callable so a 304 never builds it.
+    """
+    media_type, negotiated = negotiate(request)
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    fmt = media_type.split("/")[1]
+
+    if version is not None:
+        etag = entity_tag(version, media_type, negotiated)
+        headers["ETag"] = etag
+        # Let browsers keep the body but revalidate it on every use
+        headers["Cache-Control"] = "private, no-cache"
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            observe_response_size(route, fmt, "not_modified", 0, 0)
+            return Response(status_code=304, headers=headers)
+
+    if callable(payload):
+        payload = payload()
+    body = encode_msgpack(payload) if fmt == "msgpack" else encode_json(payload)
+
+    encoding = negotiated if len(body) >= COMPRESS_MIN_BYTES else None
+    raw_size = len(body)
+    if encoding is not None:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    observe_response_size(route, fmt, encoding or "identity", raw_size, len(body))
+    return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
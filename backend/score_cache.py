@@ -0,0 +1,52 @@
+# backend/score_cache.py - In-process cache of scored transaction windows per user
+import threading
+import time
+from collections import OrderedDict
+
+# How long a scored window is reused before Plaid is queried again
+DEFAULT_WINDOW_TTL_SECONDS = 300
+
+
+class ScoredWindowCache:
+    """
+    Keeps the most recent scored window (TransactionTable + scored frame + context
+    features) per (uid, range_weeks), so endpoints rendering the same dashboard
+    share one Plaid fetch and one scoring pass. At most max_entries windows
+    are kept; the least recently used one is dropped first.
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_WINDOW_TTL_SECONDS, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, uid, range_weeks):
+        key = (uid, range_weeks)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, window = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return window
+
+    def put(self, uid, range_weeks, window):
+        key = (uid, range_weeks)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), window)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, uid):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == uid]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
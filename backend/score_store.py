@@ -0,0 +1,284 @@
+# backend/score_store.py - Persist scored transactions + score summaries to Firestore in batched writes
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Firestore caps a batched write at 500 operations
+FIRESTORE_BATCH_LIMIT = 500
+
+# Subcollections under users/{uid}
+SCORED_COLLECTION = "scored_transactions"
+SUMMARY_COLLECTION = "score_summaries"
+SUMMARY_DOC_ID = "latest"
+
+# A stored row is rewritten only when one of these changed (a new config
+# version rewrites every row, so stored scores always name their config)
+SCORE_FIELDS = ("score", "profile", "severity", "config_version")
+
+SEVERITIES = ("very_low", "low", "moderate", "high", "very_high")
+
+# Firestore allows at most 30 values in an "in" filter
+MAX_IN_VALUES = 30
+
+# How long remembered score keys are trusted before being read back from
+# Firestore (another worker or the batch job may have rewritten the rows)
+DEFAULT_KNOWN_TTL_SECONDS = 900
+
+
+def _none_if_nan(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def scored_rows(scored_df):
+    """Flatten a scored frame into the Firestore documents stored per transaction."""
+    return [
+        {
+            "transaction_id": tid,
+            "date": d.strftime("%Y-%m-%d"),
+            "amount": float(amount),
+            "CAT_ID": int(cat_id),
+            "score": _none_if_nan(score),
+            "profile": _none_if_nan(profile),
+            "severity": severity,
+            "config_version": version,
+        }
+        for tid, d, amount, cat_id, score, profile, severity, version in zip(
+            scored_df["transaction_id"],
+            scored_df["date"],
+            scored_df["amount"],
+            scored_df["CAT_ID"],
+            scored_df["score"],
+            scored_df["profile"],
+            scored_df["severity"],
+            scored_df["config_version"],
+        )
+    ]
+
+
+def _score_key(row):
+    return tuple(row.get(field) for field in SCORE_FIELDS)
+
+
+class BatchedWriter:
+    """
+    Accumulates set/delete operations and commits them in WriteBatches of at
+    most batch_limit operations. Use as a context manager to flush on exit.
+    """
+
+    def __init__(self, db, batch_limit=FIRESTORE_BATCH_LIMIT):
+        self.db = db
+        self.batch_limit = batch_limit
+        self.batch = db.batch()
+        self.pending = 0
+        self.committed = 0
+
+    def set(self, ref, data, merge=False):
+        self.batch.set(ref, data, merge=merge)
+        self._count()
+
+    def delete(self, ref):
+        self.batch.delete(ref)
+        self._count()
+
+    def _count(self):
+        self.pending += 1
+        if self.pending >= self.batch_limit:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.batch.commit()
+            self.committed += self.pending
+            self.batch = self.db.batch()
+            self.pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+
+class ScoreStore:
+    """
+    Writes per-transaction scores and per-user summaries, skipping rows whose
+    score / profile / severity haven't changed since the last write. The last
+    written score keys are remembered for the max_users most recently used
+    users, for up to ttl_seconds, so repeat syncs don't need a read-back;
+    otherwise they are read once from Firestore.
+    """
+
+    def __init__(self, db, batch_limit=FIRESTORE_BATCH_LIMIT, max_users=1024,
+                 ttl_seconds=DEFAULT_KNOWN_TTL_SECONDS):
+        self.db = db
+        self.batch_limit = batch_limit
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._known = OrderedDict()  # uid -> (loaded_at, {transaction_id: score key})
+        self._lock = threading.Lock()
+
+    def _user_ref(self, uid):
+        return self.db.collection("users").document(uid)
+
+    def _cached(self, uid):
+        # Caller holds self._lock
+        entry = self._known.get(uid)
+        if entry is None:
+            return None
+        loaded_at, known = entry
+        if time.monotonic() - loaded_at > self.ttl_seconds:
+            del self._known[uid]
+            return None
+        self._known.move_to_end(uid)
+        return known
+
+    def load_score_keys(self, uid):
+        """{transaction_id: (score, profile, severity)} as currently stored."""
+        with self._lock:
+            known = self._cached(uid)
+        if known is not None:
+            return known
+
+        docs = self._user_ref(uid).collection(SCORED_COLLECTION).select(list(SCORE_FIELDS)).stream()
+        known = {doc.id: _score_key(doc.to_dict() or {}) for doc in docs}
+        with self._lock:
+            self._known[uid] = (time.monotonic(), known)
+            self._known.move_to_end(uid)
+            while len(self._known) > self.max_users:
+                self._known.popitem(last=False)
+        return known
+
+    def changed_rows(self, uid, rows):
+        known = self.load_score_keys(uid)
+        return [row for row in rows if known.get(row["transaction_id"]) != _score_key(row)]
+
+    def write_scores(self, uid, rows, writer=None):
+        """Write rows whose score changed. Returns the number of documents written."""
+        changed = self.changed_rows(uid, rows)
+        if not changed:
+            return 0
+
+        scored_ref = self._user_ref(uid).collection(SCORED_COLLECTION)
+        if writer is None:
+            with BatchedWriter(self.db, self.batch_limit) as own_writer:
+                for row in changed:
+                    own_writer.set(scored_ref.document(row["transaction_id"]), row)
+        else:
+            for row in changed:
+                writer.set(scored_ref.document(row["transaction_id"]), row)
+
+        with self._lock:
+            known = self._cached(uid)
+            if known is not None:
+                for row in changed:
+                    known[row["transaction_id"]] = _score_key(row)
+        return len(changed)
+
+    def write_summary(self, uid, summary, writer=None):
+        doc = {**summary, "updated_at": datetime.now(timezone.utc)}
+        ref = self._user_ref(uid).collection(SUMMARY_COLLECTION).document(SUMMARY_DOC_ID)
+        if writer is None:
+            ref.set(doc)
+        else:
+            writer.set(ref, doc)
+
+    def get_summary(self, uid):
+        doc = self._user_ref(uid).collection(SUMMARY_COLLECTION).document(SUMMARY_DOC_ID).get()
+        return doc.to_dict() if doc.exists else None
+
+    def get_scores(self, uid):
+        """All stored scored transactions for a user."""
+        docs = self._user_ref(uid).collection(SCORED_COLLECTION).stream()
+        return [doc.to_dict() for doc in docs]
+
+    def get_scores_page(self, uid, limit, after=None, severity=None, profile=None, cat_ids=None):
+        """
+        One page of stored scores, newest first, ordered by (date, transaction_id)
+        descending. `after` is the (date, transaction_id) of the previous page's
+        last row. Filters are equality / "in" clauses served by the composite
+        indexes in firestore.indexes.json, so only the page itself is read.
+        Returns (rows, next_after); next_after is None on the last page.
+        """
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        scored_ref = self._user_ref(uid).collection(SCORED_COLLECTION)
+        query = scored_ref
+        if severity is not None:
+            query = query.where("severity", "==", severity)
+        if profile is not None:
+            query = query.where("profile", "==", profile)
+        if cat_ids:
+            query = query.where("CAT_ID", "in", list(cat_ids))
+        query = query.order_by("date", direction="DESCENDING").order_by(
+            FieldPath.document_id(), direction="DESCENDING"
+        )
+        if after is not None:
+            date, tid = after
+            query = query.start_after({"date": date, FieldPath.document_id(): scored_ref.document(tid)})
+
+        # One extra row tells whether another page follows
+        rows = [doc.to_dict() for doc in query.limit(limit + 1).stream()]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1]["date"], rows[-1]["transaction_id"])
+
+    def persist(self, uid, scored_df, summary=None):
+        """Persist one user's scored frame (+ summary). Returns rows written."""
+        try:
+            with BatchedWriter(self.db, self.batch_limit) as writer:
+                written = self.write_scores(uid, scored_rows(scored_df), writer=writer)
+                if summary is not None and written:
+                    self.write_summary(uid, summary, writer=writer)
+        except Exception:
+            # The remembered keys may be ahead of what was committed
+            self.forget(uid)
+            raise
+        return written
+
+    def persist_many(self, results):
+        """
+        Persist [(uid, rows, summary), ...] for many users, sharing batches
+        across users. Returns total rows written.
+        """
+        total = 0
+        try:
+            with BatchedWriter(self.db, self.batch_limit) as writer:
+                for uid, rows, summary in results:
+                    written = self.write_scores(uid, rows, writer=writer)
+                    total += written
+                    if summary is not None and written:
+                        self.write_summary(uid, summary, writer=writer)
+        except Exception:
+            for uid, _, _ in results:
+                self.forget(uid)
+            raise
+        return total
+
+    def delete_scores(self, uid, transaction_ids):
+        """Drop stored scores for transactions Plaid removed. Returns documents deleted."""
+        if not transaction_ids:
+            return 0
+        scored_ref = self._user_ref(uid).collection(SCORED_COLLECTION)
+        with BatchedWriter(self.db, self.batch_limit) as writer:
+            for tid in transaction_ids:
+                writer.delete(scored_ref.document(tid))
+
+        with self._lock:
+            known = self._cached(uid)
+            if known is not None:
+                for tid in transaction_ids:
+                    known.pop(tid, None)
+        return len(transaction_ids)
+
+    def forget(self, uid):
+        with self._lock:
+            self._known.pop(uid, None)
@@ -1,7 +1,14 @@
 import pandas as pd
+import numpy as np
+import hashlib
 import math
 from datetime import datetime
 
+# SPEND_PROFILE values handled by TransactionScorer, in code order.
+# Scored categories with any other profile get PROFILE_OTHER.
+SPEND_PROFILES = ("DISCRETIONARY_WANT", "SAVINGS_POSITIVE", "FLEX_ESSENTIAL", "NEGATIVE_EVENTS")
+PROFILE_OTHER = len(SPEND_PROFILES)
+
 def load_category_config(path):
 	xlsx = pd.ExcelFile(path)
 
@@ -21,6 +28,58 @@ def load_category_config(path):
 
 	return cfg
 
+def config_version(cfg):
+	"""
+	Short content hash of the merged config. Identical configs give the same
+	version in every process, so workers can be checked against each other.
+	"""
+	digest = hashlib.sha256()
+	digest.update("|".join(map(str, cfg.columns)).encode())
+	digest.update(pd.util.hash_pandas_object(cfg, index=True).to_numpy().tobytes())
+	return digest.hexdigest()[:12]
+
+def compile_category_config(cfg):
+	"""
+	Flatten the merged config into lookup arrays indexed by CAT_ID, so scoring a
+	whole frame is a handful of array gathers instead of per-row dict lookups.
+	Later rows win for duplicated CAT_IDs, same as dict(zip(...)).
+	"""
+	cat_ids = cfg["CAT_ID"].astype(int).to_numpy()
+	size = int(cat_ids.max()) + 1 if len(cat_ids) else 1
+
+	is_scored = np.zeros(size, dtype=bool)
+	profile_code = np.full(size, PROFILE_OTHER, dtype=np.int8)
+	profile_name = np.full(size, None, dtype=object)
+	context_bucket = np.full(size, None, dtype=object)
+	is_savings_cat = np.zeros(size, dtype=bool)
+	is_negative_cat = np.zeros(size, dtype=bool)
+
+	codes = {name: i for i, name in enumerate(SPEND_PROFILES)}
+
+	for cat, scored, profile, bucket in zip(
+		cat_ids, cfg["IS_SCORED"], cfg["SPEND_PROFILE"], cfg["CONTEXT_BUCKET"]
+	):
+		# Truthiness matches TransactionScorer.score_transaction (NaN counts as scored)
+		is_scored[cat] = bool(scored)
+		profile_code[cat] = codes.get(profile, PROFILE_OTHER)
+		profile_name[cat] = profile
+		context_bucket[cat] = bucket
+		if scored == 1 and profile == "SAVINGS_POSITIVE":
+			is_savings_cat[cat] = True
+		if scored == 1 and profile == "NEGATIVE_EVENTS":
+			is_negative_cat[cat] = True
+
+	return {
+		"size": size,
+		"is_scored": is_scored,
+		"profile_code": profile_code,
+		"profile_name": profile_name,
+		"context_bucket": context_bucket,
+		"is_harmful": context_bucket == "AVOIDABLE_HARMFUL",
+		"is_savings_cat": is_savings_cat,
+		"is_negative_cat": is_negative_cat,
+	}
+
 def compute_context_features(txns, cfg, start_date, end_date):
 	txns = txns.copy()
 	txns['date'] = pd.to_datetime(txns['date'])
@@ -0,0 +1,267 @@
+# backend/scoring_kernels.py - Per-row scoring formulas for TransactionScorer.score_arrays: NumPy, or one fused Numba pass
+#
+# score_arrays does the frame-wide work (CAT_ID lookups, capacity, per-category
+# counts and totals, the 30-day savings windows) and hands the per-row maths
+# to a kernel:
+#
+#   base, pattern_penalty, final, severity_code, metric, frequency, severity_index = score_rows(...)
+#
+# "numpy" evaluates each profile's formula over masked arrays (several
+# temporaries per profile). "numba" compiles a single loop that dispatches on
+# the profile, applies the formula, the distress adjustment, the clipping and
+# the severity banding row by row. Numba is optional: SCORING_KERNEL=auto (the
+# default) uses it when it is installed and falls back to NumPy otherwise. It
+# is only imported (and the loop compiled) once the numba kernel is selected.
+import importlib.util
+import os
+import threading
+
+import numpy as np
+
+# severity_code -> name; -1 (not banded) is "unknown"
+SEVERITY_NAMES = np.array(["very_low", "low", "moderate", "high", "very_high", "unknown"], dtype=object)
+
+KERNELS = ("numpy", "numba")
+
+
+def numba_installed():
+    return importlib.util.find_spec("numba") is not None
+
+
+def available_kernels():
+    return [k for k in KERNELS if k != "numba" or numba_installed()]
+
+
+def default_kernel():
+    """SCORING_KERNEL (auto / numpy / numba); auto prefers numba when it is installed."""
+    requested = os.getenv("SCORING_KERNEL", "auto")
+    if requested == "auto":
+        return "numba" if numba_installed() else "numpy"
+    if requested not in available_kernels():
+        print(f"[ERROR] SCORING_KERNEL={requested} is not available, using numpy")
+        return "numpy"
+    return requested
+
+
+def severity_codes(base):
+    return np.select([base >= 90, base >= 70, base >= 50, base >= 30], [0, 1, 2, 3], default=4).astype(np.int8)
+
+
+def score_rows_numpy(profile, is_harmful, txn_amount, same_cat_count, same_cat_total, window_savings,
+                     negative_count, income, safe_budget, harmful_share, neutral_share, in_distress,
+                     fees_ratio, cash_adv_share, recommended_savings_rate, profile_other):
+    n = len(profile)
+    base = np.full(n, 50.0)
+    metric = np.full(n, np.nan)
+    frequency = np.zeros(n, dtype=np.int64)
+    severity_index = np.full(n, np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # DISCRETIONARY_WANT
+        m = profile == 0
+        if m.any():
+            if safe_budget <= 0:
+                base[m] = 5.0
+            else:
+                ratio = txn_amount[m] / safe_budget
+                decay = np.where(
+                    ratio <= 0, 1.0, 1.0 / (1.0 + (ratio / 0.25) ** 1.4)
+                )
+                b = 100.0 * decay
+
+                harm_factor = max(0.4, 1.0 - min(0.5, harmful_share * 2.0))
+                neutral_factor = 1.0 - min(0.15, neutral_share * 0.5)
+                b *= np.where(is_harmful[m], harm_factor, neutral_factor)
+
+                if in_distress:
+                    distress_index = min(1.2, fees_ratio / 0.05 + cash_adv_share * 2.0)
+                    b *= (1.0 - 0.25 * distress_index)
+
+                base[m] = np.clip(b, 0.0, 100.0)
+                metric[m] = ratio * 100.0
+
+        # SAVINGS_POSITIVE
+        m = profile == 1
+        if m.any() and income > 0:
+            savings_rate_30d = window_savings[m] / income
+            rel = savings_rate_30d / recommended_savings_rate
+            b = 100.0 * np.exp(-((rel - 1.0) ** 2) / 0.6)
+
+            if in_distress:
+                distress_index = min(1.0, (cash_adv_share * 2.5) + (fees_ratio / 0.05))
+                b *= (1.0 - 0.7 * distress_index)
+
+            base[m] = np.clip(b, 0.0, 100.0)
+            metric[m] = savings_rate_30d * 100.0
+
+        # FLEX_ESSENTIAL
+        m = profile == 2
+        if m.any() and income > 0:
+            share = same_cat_total[m] / income
+            b = np.where(
+                share <= 0, 100.0, 100.0 / (1.0 + ((share / 0.15) / 2.0) ** 2)
+            )
+            if in_distress:
+                b *= 0.9
+            base[m] = np.clip(b, 0.0, 100.0)
+            metric[m] = share * 100.0
+
+        # NEGATIVE_EVENTS
+        m = profile == 3
+        if m.any():
+            if income <= 0:
+                severity_pct = np.full(int(m.sum()), 100.0)
+            else:
+                severity_pct = (txn_amount[m] / income) * 100.0
+
+            freq = max(1, negative_count)
+            idx = severity_pct * np.sqrt(freq)
+            b = 100.0 / (1.0 + np.power(idx, 0.8))
+            if in_distress:
+                b *= 0.7
+
+            base[m] = np.clip(b, 0.0, 100.0)
+            metric[m] = severity_pct
+            frequency[m] = freq
+            severity_index[m] = idx
+
+    # Repeat-purchase penalty, DISCRETIONARY_WANT only
+    excess = np.maximum(0, same_cat_count - 3)
+    pattern_penalty = np.where(
+        (profile == 0) & (excess > 0), 20.0 * (1.0 - np.exp(-0.3 * excess)), 0.0
+    )
+
+    final = np.clip(base - pattern_penalty, 0.0, 100.0)
+    severity_code = np.where((profile >= 0) & (profile < profile_other), severity_codes(base), -1)
+
+    return base, pattern_penalty, final, severity_code, metric, frequency, severity_index
+
+
+def _score_rows_loop(profile, is_harmful, txn_amount, same_cat_count, same_cat_total, window_savings,
+                     negative_count, income, safe_budget, harmful_share, neutral_share, in_distress,
+                     fees_ratio, cash_adv_share, recommended_savings_rate, profile_other):
+    # Same maths as score_rows_numpy, one row at a time; compiled by Numba
+    n = profile.shape[0]
+    base = np.empty(n)
+    pattern_penalty = np.empty(n)
+    final = np.empty(n)
+    severity_code = np.empty(n, dtype=np.int8)
+    metric = np.full(n, np.nan)
+    frequency = np.zeros(n, dtype=np.int64)
+    severity_index = np.full(n, np.nan)
+
+    harm_factor = max(0.4, 1.0 - min(0.5, harmful_share * 2.0))
+    neutral_factor = 1.0 - min(0.15, neutral_share * 0.5)
+    want_distress = 1.0 - 0.25 * min(1.2, fees_ratio / 0.05 + cash_adv_share * 2.0)
+    savings_distress = 1.0 - 0.7 * min(1.0, (cash_adv_share * 2.5) + (fees_ratio / 0.05))
+    negative_freq = max(1, negative_count)
+
+    for i in range(n):
+        p = profile[i]
+        b = 50.0
+        if p == 0:
+            if safe_budget <= 0:
+                b = 5.0
+            else:
+                ratio = txn_amount[i] / safe_budget
+                if ratio <= 0:
+                    b = 100.0 * 1.0
+                else:
+                    b = 100.0 * (1.0 / (1.0 + (ratio / 0.25) ** 1.4))
+                b *= harm_factor if is_harmful[i] else neutral_factor
+                if in_distress:
+                    b *= want_distress
+                b = min(max(b, 0.0), 100.0)
+                metric[i] = ratio * 100.0
+        elif p == 1:
+            if income > 0:
+                savings_rate_30d = window_savings[i] / income
+                rel = savings_rate_30d / recommended_savings_rate
+                b = 100.0 * np.exp(-((rel - 1.0) ** 2) / 0.6)
+                if in_distress:
+                    b *= savings_distress
+                b = min(max(b, 0.0), 100.0)
+                metric[i] = savings_rate_30d * 100.0
+        elif p == 2:
+            if income > 0:
+                share = same_cat_total[i] / income
+                if share <= 0:
+                    b = 100.0
+                else:
+                    b = 100.0 / (1.0 + ((share / 0.15) / 2.0) ** 2)
+                if in_distress:
+                    b *= 0.9
+                b = min(max(b, 0.0), 100.0)
+                metric[i] = share * 100.0
+        elif p == 3:
+            if income <= 0:
+                severity_pct = 100.0
+            else:
+                severity_pct = (txn_amount[i] / income) * 100.0
+            idx = severity_pct * np.sqrt(negative_freq)
+            b = 100.0 / (1.0 + idx ** 0.8)
+            if in_distress:
+                b *= 0.7
+            b = min(max(b, 0.0), 100.0)
+            metric[i] = severity_pct
+            frequency[i] = negative_freq
+            severity_index[i] = idx
+
+        penalty = 0.0
+        if p == 0 and same_cat_count[i] > 3:
+            penalty = 20.0 * (1.0 - np.exp(-0.3 * (same_cat_count[i] - 3)))
+
+        base[i] = b
+        pattern_penalty[i] = penalty
+        final[i] = min(max(b - penalty, 0.0), 100.0)
+
+        if p < 0 or p >= profile_other:
+            severity_code[i] = -1
+        elif b >= 90:
+            severity_code[i] = 0
+        elif b >= 70:
+            severity_code[i] = 1
+        elif b >= 50:
+            severity_code[i] = 2
+        elif b >= 30:
+            severity_code[i] = 3
+        else:
+            severity_code[i] = 4
+
+    return base, pattern_penalty, final, severity_code, metric, frequency, severity_index
+
+
+_numba_kernel = None
+_numba_lock = threading.Lock()
+
+
+def numba_kernel():
+    """_score_rows_loop compiled by Numba (imported on first use)."""
+    global _numba_kernel
+    if _numba_kernel is None:
+        with _numba_lock:
+            if _numba_kernel is None:
+                import numba
+
+                _numba_kernel = numba.njit(cache=True, nogil=True)(_score_rows_loop)
+    return _numba_kernel
+
+
+def score_rows(kernel, *args):
+    if kernel == "numba":
+        return numba_kernel()(*args)
+    return score_rows_numpy(*args)
+
+
+def compile_kernels(kernel=None):
+    """
+    Compile the selected kernel (default_kernel() unless given) now, e.g. in
+    the preforking master or a worker's warm-up, instead of on the first
+    scoring request. A no-op for the NumPy kernel.
+    """
+    if (kernel or default_kernel()) != "numba":
+        return
+    numba_kernel()(
+        np.zeros(1, dtype=np.int8), np.zeros(1, dtype=bool), np.ones(1), np.zeros(1, dtype=np.int64),
+        np.zeros(1), np.zeros(1), 0, 1.0, 1.0, 0.0, 0.0, False, 0.0, 0.0, 0.15, 4,
+    )
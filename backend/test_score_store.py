@@ -0,0 +1,81 @@
+import os
+import pandas as pd
+
+from firebase_config import get_firestore_client
+from score_store import ScoreStore, SCORED_COLLECTION
+from scoring_config import load_category_config, compute_context_features
+from transaction_scorer import TransactionScorer
+
+# Run against the Firestore emulator:
+#   firebase emulators:start --only firestore
+#   FIRESTORE_EMULATOR_HOST=localhost:8080 python test_score_store.py
+
+
+def make_txns(n_restaurants):
+    rows = [
+        {'transaction_id': 'pay-1', 'date': '2025-10-01', 'amount': -3000.00, 'CAT_ID': 506},
+        {'transaction_id': 'groc-1', 'date': '2025-10-05', 'amount': 120.00, 'CAT_ID': 540},
+        {'transaction_id': 'fee-1', 'date': '2025-10-05', 'amount': 35.00, 'CAT_ID': 525},
+    ]
+    for i in range(n_restaurants):
+        rows.append({'transaction_id': f'rest-{i}', 'date': f'2025-10-{i % 28 + 1:02d}', 'amount': 40.0, 'CAT_ID': 531})
+
+    df = pd.DataFrame(rows)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def score(scorer, cfg, txns):
+    ctx = compute_context_features(txns, cfg, pd.Timestamp('2025-10-01'), pd.Timestamp('2025-10-31'))
+    scored = scorer.score_all_transactions(txns, ctx, details=False)
+    return scored, scorer.get_score_summary(scored)
+
+
+def main():
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        print("FIRESTORE_EMULATOR_HOST is not set - start the emulator first (see top of file).")
+        return
+
+    db = get_firestore_client()
+    uid = "score-store-test-user"
+    scored_ref = db.collection("users").document(uid).collection(SCORED_COLLECTION)
+    for doc in scored_ref.stream():
+        doc.reference.delete()
+
+    cfg = load_category_config("data/category_scoring_config.xlsx")
+    scorer = TransactionScorer(cfg)
+
+    # 600 rows forces more than one 500-op batch
+    txns = make_txns(597)
+    scored, summary = score(scorer, cfg, txns)
+
+    store = ScoreStore(db)
+    written = store.persist(uid, scored, summary)
+    print(f"First write:  {written} rows (expected {len(scored)})")
+    assert written == len(scored)
+
+    # Same data again: nothing changed, nothing written
+    written = store.persist(uid, scored, summary)
+    print(f"Rewrite:      {written} rows (expected 0)")
+    assert written == 0
+
+    # A fresh store has to read the stored keys back from Firestore
+    cold_store = ScoreStore(db)
+    written = cold_store.persist(uid, scored, summary)
+    print(f"Cold rewrite: {written} rows (expected 0)")
+    assert written == 0
+
+    # One more restaurant visit: the penalty is already saturated, so only the new row is written
+    txns = make_txns(598)
+    scored, summary = score(scorer, cfg, txns)
+    written = store.persist(uid, scored, summary)
+    print(f"After change: {written} rows (expected 1)")
+    assert written == 1
+
+    stored = store.get_scores(uid)
+    print(f"Stored rows:  {len(stored)}")
+    print(f"Summary:      {store.get_summary(uid)['average_score']}")
+
+
+if __name__ == "__main__":
+    main()
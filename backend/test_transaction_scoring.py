@@ -1,7 +1,6 @@
 import pandas as pd
 from datetime import datetime, date
-import sys
-sys.path.append('/mnt/user-data/uploads')
+from pathlib import Path
 
 from scoring_config import load_category_config, compute_context_features
 from transaction_scorer import TransactionScorer
@@ -152,12 +151,44 @@ def main():
         print(f"   → $35 overdraft on $3k income = {35/3000*100:.2f}% of income")
         print(f"   → High severity = low score")
     
+    print("\n\n" + "=" * 80)
+    print("WHAT-IF: PLANNING ANOTHER RESTAURANT MEAL")
+    print("=" * 80)
+    amounts = [10, 25, 50, 100, 200, 400]
+    sim_a = scorer.simulate_purchases(txns_a, [531], amounts, start_date, end_date)
+    sim_b = scorer.simulate_purchases(txns_b, [531], amounts, start_date, end_date)
+    print(f"\n{'Amount':>10} {'Person A':>12} {'Person B':>12}")
+    print("-" * 40)
+    for amount, score_a, score_b in zip(sim_a['amounts'], sim_a['score'][0], sim_b['score'][0]):
+        print(f"${amount:>9.2f} {score_a:>12.1f} {score_b:>12.1f}")
+    for name, sim in (("Person A", sim_a), ("Person B", sim_b)):
+        changes = ", ".join(
+            f"{t['to_severity']} from ${t['amount']:.2f}" for t in sim['thresholds'][0]
+        )
+        print(f"   {name} severity: {changes or 'unchanged'}")
+
+    print("\n\n" + "=" * 80)
+    print("BATCH SCORING: EACH CANDIDATE IS SCORED ON ITS OWN")
+    print("=" * 80)
+    when = pd.Timestamp('2025-10-20')
+    alone = scorer.score_candidates(txns_a, [531], [55.0], [when], start_date, end_date)
+    batch = scorer.score_candidates(txns_a, [531] * 30, [55.0] * 30, [when] * 30, start_date, end_date)
+    single = scorer.simulate_purchases(txns_a, [531], [55.0], start_date, end_date, purchase_date=when)
+    print(f"\n$55 restaurant alone: {alone['score'][0]:.2f}, in a batch of 30: "
+          f"{batch['score'].min():.2f}..{batch['score'].max():.2f}, what-if: {single['score'][0][0]:.2f}")
+    assert (batch['score'] == alone['score'][0]).all(), "candidate score depends on the rest of the batch"
+    assert alone['score'][0] == single['score'][0][0], "candidate score differs from simulate_purchases"
+    print("   → independent of the other candidates, same as simulate_purchases")
+
     print("\n\n" + "=" * 80)
     print("SAVING OUTPUTS")
     print("=" * 80)
     
-    scored_a.to_csv('C:/Users/anye forti/Desktop/person_a_scored.csv', index=False)
-    scored_b.to_csv('C:/Users/anye forti/Desktop/person_b_scored.csv', index=False)
+    output_dir = Path(__file__).resolve().parent / "output"
+    output_dir.mkdir(exist_ok=True)
+    scored_a.to_csv(output_dir / 'person_a_scored.csv', index=False)
+    scored_b.to_csv(output_dir / 'person_b_scored.csv', index=False)
+    print(f"\nScored transactions written to {output_dir}")
     
     print("\n" + "=" * 80)
     print("Risk-based scoring complete!")
@@ -0,0 +1,194 @@
+# backend/transaction_insights.py - LLM descriptions + recommendations for scored transactions
+import re
+from datetime import datetime, timezone
+
+from instrumentation import record_error, stage
+from llm_module import generate_gemini_suggestion
+
+# Transactions scoring below this get a description generated right after sync
+# (covers the "high" and "very_high" severities).
+DESCRIPTION_SCORE_THRESHOLD = 50.0
+
+# Firestore subcollection under users/{uid} holding one document per transaction_id
+DESCRIPTIONS_COLLECTION = "transaction_descriptions"
+
+# Plaid transaction fields kept alongside the description so a cache hit
+# can answer without going back to Plaid
+TRANSACTION_SNAPSHOT_FIELDS = (
+    "transaction_id",
+    "date",
+    "name",
+    "merchant_name",
+    "amount",
+    "pending",
+    "personal_finance_category",
+)
+
+_LIST_ITEM = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s+")
+
+
+def _descriptions_ref(db, uid):
+    return db.collection("users").document(uid).collection(DESCRIPTIONS_COLLECTION)
+
+
+def _to_firestore_value(value):
+    # Plaid's to_dict() hands back datetime.date objects, which Firestore rejects
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _to_firestore_value(v) for k, v in value.items()}
+    return value
+
+
+def snapshot_transaction(plaid_txn):
+    return {
+        field: _to_firestore_value(plaid_txn.get(field))
+        for field in TRANSACTION_SNAPSHOT_FIELDS
+    }
+
+
+def build_description_context(score_result):
+    """
+    Turn TransactionScorer.score_transaction output into the user_context
+    handed to the LLM prompt.
+    """
+    capacity = score_result.get("capacity_info") or {}
+    details = score_result.get("details") or {}
+
+    return {
+        "score": score_result.get("score"),
+        "base_score": score_result.get("base_score"),
+        "pattern_penalty": score_result.get("pattern_penalty"),
+        "severity": details.get("severity"),
+        "profile": score_result.get("profile"),
+        "context_bucket": score_result.get("context_bucket"),
+        "effective_income": capacity.get("effective_income"),
+        "safe_discretionary": capacity.get("safe_discretionary"),
+        "buffer_ratio": capacity.get("buffer_ratio"),
+        "in_distress": capacity.get("in_distress"),
+        "details": {k: v for k, v in details.items() if k not in ("score", "severity")},
+    }
+
+
+def parse_suggestion(text):
+    """
+    Split raw LLM output into a short description and a list of recommendations.
+    Numbered / bulleted lines are treated as recommendations, everything else
+    is the description.
+    """
+    description_lines = []
+    recommendations = []
+
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if _LIST_ITEM.match(line):
+            recommendations.append(_LIST_ITEM.sub("", line))
+        elif recommendations:
+            # Continuation of the previous list item
+            recommendations[-1] = f"{recommendations[-1]} {line}"
+        else:
+            description_lines.append(line)
+
+    return " ".join(description_lines), recommendations
+
+
+def generate_transaction_description(plaid_txn, score_result, config_version=None):
+    """Generate the description document for one scored Plaid transaction."""
+    pfc = plaid_txn.get("personal_finance_category") or {}
+
+    with stage("llm_suggestion"):
+        suggestion = generate_gemini_suggestion(
+            transaction_name=plaid_txn.get("merchant_name") or plaid_txn.get("name") or "",
+            transaction_amount=abs(float(plaid_txn.get("amount", 0.0))),
+            category=pfc.get("detailed") or pfc.get("primary") or "UNKNOWN",
+            user_context=build_description_context(score_result),
+        )
+    description, recommendations = parse_suggestion(suggestion)
+
+    return {
+        "transaction": snapshot_transaction(plaid_txn),
+        "score": score_result.get("score"),
+        "severity": (score_result.get("details") or {}).get("severity"),
+        "description": description,
+        "recommendations": recommendations,
+        "config_version": config_version,
+        "generated_at": datetime.now(timezone.utc),
+    }
+
+
+def get_cached_description(db, uid, transaction_id, config_version=None):
+    """Stored description, or None when missing or (given config_version) scored under another config."""
+    doc = _descriptions_ref(db, uid).document(transaction_id).get()
+    if not doc.exists:
+        return None
+    description_doc = doc.to_dict()
+    if config_version is not None and description_doc.get("config_version") != config_version:
+        return None
+    return description_doc
+
+
+def store_description(db, uid, transaction_id, description_doc):
+    _descriptions_ref(db, uid).document(transaction_id).set(description_doc)
+
+
+def describe_transaction(db, scorer, uid, plaid_txn, scored_df, context_features):
+    """
+    Score a single transaction with the real scorer, generate its description
+    and store it. Used for cache misses on the description endpoint.
+    """
+    tid = plaid_txn["transaction_id"]
+    row = scored_df.loc[scored_df["transaction_id"] == tid]
+    if row.empty:
+        return None
+
+    score_result = scorer.score_transaction(row.iloc[0], scored_df, context_features)
+    if not score_result.get("is_scored"):
+        return None
+
+    description_doc = generate_transaction_description(plaid_txn, score_result, scorer.config_version)
+    store_description(db, uid, tid, description_doc)
+    return description_doc
+
+
+def precompute_transaction_descriptions(db, scorer, uid, plaid_txns, scored_df, context_features, should_stop=None):
+    """
+    Background job run after a sync: generate descriptions for low-score
+    transactions that don't have one stored yet for the scorer's config.
+    should_stop() is checked before each LLM call so the job can be cancelled.
+    """
+    low = scored_df[
+        (scored_df["is_scored"] == True)
+        & (scored_df["score"] < DESCRIPTION_SCORE_THRESHOLD)
+    ]
+    if low.empty:
+        return 0
+
+    collection = _descriptions_ref(db, uid)
+    refs = [collection.document(tid) for tid in low["transaction_id"]]
+    existing = {
+        snap.id
+        for snap in db.get_all(refs)
+        if snap.exists and snap.to_dict().get("config_version") == scorer.config_version
+    }
+
+    plaid_by_tid = {t["transaction_id"]: t for t in plaid_txns}
+    generated = 0
+
+    for _, row in low.iterrows():
+        tid = row["transaction_id"]
+        if tid in existing or tid not in plaid_by_tid:
+            continue
+        if should_stop is not None and should_stop():
+            break
+        try:
+            score_result = scorer.score_transaction(row, scored_df, context_features)
+            description_doc = generate_transaction_description(plaid_by_tid[tid], score_result, scorer.config_version)
+            store_description(db, uid, tid, description_doc)
+            generated += 1
+        except Exception as e:
+            record_error("precompute_transaction_descriptions", e)
+            print(f"[ERROR] Description generation failed for {uid}/{tid}: {e}")
+
+    return generated
@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from scoring_config import compile_category_config, config_version, PROFILE_OTHER
+
 
 class TransactionScorer:
     RECOMMENDED_SAVINGS_RATE = 0.15
@@ -13,6 +15,15 @@ class TransactionScorer:
         self.cat_to_scored = dict(zip(cfg["CAT_ID"], cfg["IS_SCORED"]))
         self.cat_to_context = dict(zip(cfg["CAT_ID"], cfg["CONTEXT_BUCKET"]))
 
+        # CAT_ID-indexed lookup arrays used by the vectorized path
+        self.compiled = compile_category_config(cfg)
+        self.config_version = config_version(cfg)
+
+        # Per-row scoring backend for score_arrays: "numba" when installed, else "numpy"
+        from scoring_kernels import default_kernel
+
+        self.kernel = default_kernel()
+
     def calculate_financial_capacity(self, context_features):
         effective_income = context_features.get("effective_income", 0.0)
 
@@ -312,7 +323,36 @@ class TransactionScorer:
         else:
             return "very_high"
 
-    def score_all_transactions(self, txns, context_features):
+    def score_all_transactions(self, txns, context_features, details=True, kernel=None):
+        """
+        Score every row of txns in one vectorized pass. Produces the same
+        columns as score_all_transactions_reference; score_details (one
+        score_transaction-style dict per row) is only built when details=True.
+        """
+        arrays = self.score_arrays(
+            txns["CAT_ID"].to_numpy(),
+            txns["amount"].to_numpy(dtype=float),
+            pd.to_datetime(txns["date"]).to_numpy(),
+            context_features,
+            kernel=kernel,
+        )
+
+        scored_df = txns.copy()
+        scored_df["score"] = arrays["score"]
+        scored_df["is_scored"] = arrays["is_scored"]
+        scored_df["base_score"] = arrays["base_score"]
+        scored_df["pattern_penalty"] = arrays["pattern_penalty"]
+        scored_df["profile"] = arrays["profile"]
+        scored_df["severity"] = arrays["severity"]
+        # Which config produced these scores (changes on hot reload)
+        scored_df["config_version"] = self.config_version
+        if details:
+            scored_df["score_details"] = self._details_from_arrays(arrays)
+
+        return scored_df
+
+    def score_all_transactions_reference(self, txns, context_features):
+        """Row-by-row scoring through score_transaction; the reference for the vectorized path."""
         results = []
         for _, row in txns.iterrows():
             results.append(
@@ -330,10 +370,387 @@ class TransactionScorer:
         scored_df["severity"] = [
             r.get("details", {}).get("severity", "unknown") for r in results
         ]
+        scored_df["config_version"] = self.config_version
         scored_df["score_details"] = results
 
         return scored_df
 
+    def score_arrays(self, cat_ids, amounts, dates, context_features, kernel=None):
+        """
+        Vectorized equivalent of score_transaction over parallel arrays
+        (CAT_ID, signed amount, datetime64 date). The same arrays are the
+        all_txns context, so frequencies, category totals and the 30-day
+        savings window are computed over them. kernel picks the per-row
+        backend ("numpy" / "numba", see scoring_kernels.py); default self.kernel.
+        """
+        from scoring_kernels import SEVERITY_NAMES, score_rows
+
+        c = self.compiled
+        n = len(cat_ids)
+        cat = np.asarray(cat_ids, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=float)
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+
+        known = (cat >= 0) & (cat < c["size"])
+        lookup = np.where(known, cat, 0)
+        is_scored = known & c["is_scored"][lookup]
+        profile = np.where(is_scored, c["profile_code"][lookup], -1)
+
+        capacity = self.calculate_financial_capacity(context_features)
+        income = capacity["effective_income"]
+        in_distress = capacity["in_distress"]
+        fees_ratio = capacity["fees_ratio"]
+        cash_adv_share = context_features.get("cash_adv_share", 0.0)
+
+        # Occurrences / signed totals per CAT_ID across the whole frame
+        _, cat_inverse, cat_counts = np.unique(cat, return_inverse=True, return_counts=True)
+        cat_inverse = cat_inverse.reshape(-1)
+        same_cat_count = cat_counts[cat_inverse]
+        same_cat_total = np.bincount(cat_inverse, weights=amounts)[cat_inverse]
+
+        # Savings in the 30 days up to each SAVINGS_POSITIVE row
+        window_savings = np.zeros(n)
+        m = profile == 1
+        if m.any() and income > 0:
+            savings = known & c["is_savings_cat"][lookup]
+            order = np.argsort(dates[savings], kind="stable")
+            savings_dates = dates[savings][order]
+            running = np.concatenate(([0.0], np.cumsum(amounts[savings][order])))
+
+            tx_dates = dates[m]
+            hi = np.searchsorted(savings_dates, tx_dates, side="right")
+            lo = np.searchsorted(
+                savings_dates, tx_dates - np.timedelta64(30, "D"), side="left"
+            )
+            window_savings[m] = np.maximum(0.0, running[hi] - running[lo])
+
+        # Per-row formulas, distress adjustments and severity bands (scoring_kernels.py)
+        base, pattern_penalty, final, severity_code, metric, frequency, severity_index = score_rows(
+            kernel or self.kernel,
+            profile.astype(np.int8, copy=False),
+            c["is_harmful"][lookup],
+            np.abs(amounts),
+            same_cat_count,
+            same_cat_total,
+            window_savings,
+            int((known & c["is_negative_cat"][lookup]).sum()),
+            float(income),
+            float(capacity["safe_discretionary"]),
+            float(context_features.get("avoidable_harmful_share", 0.0)),
+            float(context_features.get("avoidable_neutral_share", 0.0)),
+            bool(in_distress),
+            float(fees_ratio),
+            float(cash_adv_share),
+            self.RECOMMENDED_SAVINGS_RATE,
+            PROFILE_OTHER,
+        )
+        severity = SEVERITY_NAMES[severity_code]
+
+        return {
+            "score": np.where(is_scored, np.round(final, 2), np.nan),
+            "is_scored": is_scored,
+            "base_score": np.where(is_scored, np.round(base, 2), np.nan),
+            "pattern_penalty": np.round(pattern_penalty, 2),
+            "profile": np.where(is_scored, c["profile_name"][lookup], None),
+            "profile_code": profile,
+            "context_bucket": np.where(is_scored, c["context_bucket"][lookup], None),
+            "severity": severity,
+            "unrounded_base": base,
+            "metric": metric,
+            "frequency": frequency,
+            "severity_index": severity_index,
+            "capacity": capacity,
+        }
+
+    @staticmethod
+    def _classify_severity_array(scores):
+        return np.select(
+            [scores >= 90, scores >= 70, scores >= 50, scores >= 30],
+            ["very_low", "low", "moderate", "high"],
+            default="very_high",
+        )
+
+    def _details_from_arrays(self, arrays):
+        """Rebuild score_transaction-shaped result dicts from score_arrays output."""
+        capacity = arrays["capacity"]
+        metric_keys = {
+            0: "pct_of_safe_budget",
+            1: "savings_pct",
+            2: "pct_of_income",
+            3: "severity_pct",
+        }
+
+        results = []
+        for i, code in enumerate(arrays["profile_code"]):
+            if code < 0:
+                results.append({
+                    "score": None,
+                    "is_scored": False,
+                    "reason": "Category not scoreable (income / structural / non-behavioral)",
+                })
+                continue
+
+            base = float(arrays["unrounded_base"][i])
+            metric = arrays["metric"][i]
+            if code in metric_keys:
+                result = {
+                    "score": base,
+                    metric_keys[code]: None if np.isnan(metric) else float(metric),
+                    "severity": arrays["severity"][i],
+                }
+                if code == 3:
+                    result["frequency"] = int(arrays["frequency"][i])
+                    result["severity_index"] = float(arrays["severity_index"][i])
+                elif code == 0 and np.isnan(metric):
+                    result["reason"] = "No safe discretionary budget available"
+            else:
+                result = {
+                    "score": 50.0,
+                    "severity": "unknown",
+                    "reason": f"Unknown SPEND_PROFILE: {arrays['profile'][i]}",
+                }
+
+            results.append({
+                "score": float(arrays["score"][i]),
+                "is_scored": True,
+                "profile": arrays["profile"][i],
+                "context_bucket": arrays["context_bucket"][i],
+                "base_score": float(arrays["base_score"][i]),
+                "pattern_penalty": float(arrays["pattern_penalty"][i]),
+                "capacity_info": capacity,
+                "details": result,
+            })
+
+        return results
+
+    # ---- what-if simulation ----
+
+    # Context buckets compute_context_features sums, in the order features use them
+    SIMULATED_BUCKETS = (
+        "EFFECTIVE_INCOME",
+        "SAVINGS_CONTENT",
+        "EMERGENCY_BORROWING",
+        "FEES_CONTEXT",
+        "STRUCTURAL_UNAVOIDABLE",
+        "FLEX_CORE_ESSENTIAL",
+        "FLEX_OTHER_ESSENTIAL",
+        "AVOIDABLE_HARMFUL",
+        "AVOIDABLE_NEUTRAL",
+    )
+
+    # Points evaluated inside each bracket when locating a severity threshold
+    THRESHOLD_REFINE_POINTS = 64
+
+    def simulate_purchases(self, history, category_ids, amounts, start_date, end_date, purchase_date=None):
+        """
+        What-if scores for one planned purchase. Every category in
+        category_ids x every amount in amounts is scored as the only new
+        transaction on top of history (CAT_ID, amount, date), with the
+        window's context features and capacity recomputed to include it, all
+        in one broadcast pass. Each scenario matches appending the row,
+        rerunning compute_context_features over start_date..end_date and
+        scoring the frame with score_all_transactions.
+
+        Returns the sorted amounts, (categories x amounts) arrays score,
+        base_score, pattern_penalty, severity and safe_discretionary, each
+        category's profile / is_scored, and per category the amounts where
+        the severity changes along the curve.
+        """
+        category_ids = np.atleast_1d(np.asarray(category_ids, dtype=np.int64))
+        amounts = np.sort(np.atleast_1d(np.asarray(amounts, dtype=float)))
+        stats = self._simulation_stats(history, start_date, end_date, purchase_date)
+
+        curve = self._simulate(stats, category_ids[:, None], amounts[None, :])
+
+        # Severity changes between neighbouring amounts; every bracket is then
+        # re-evaluated on a fine grid (all in one pass) to place the change
+        severity = curve["severity"]
+        rows, cols = np.nonzero(severity[:, 1:] != severity[:, :-1])
+        cols = cols + 1
+        thresholds = [[] for _ in category_ids]
+        if len(rows):
+            lo, hi = amounts[cols - 1], amounts[cols]
+            steps = np.linspace(0.0, 1.0, self.THRESHOLD_REFINE_POINTS)
+            grid = lo[:, None] + (hi - lo)[:, None] * steps[None, :]
+            fine = self._simulate(stats, category_ids[rows][:, None], grid)["severity"]
+            first_new = np.argmax(fine != fine[:, :1], axis=1)
+            for i, (row, col) in enumerate(zip(rows, cols)):
+                thresholds[row].append({
+                    "amount": round(float(grid[i, first_new[i]]), 2),
+                    "from_severity": severity[row, col - 1],
+                    "to_severity": severity[row, col],
+                })
+
+        c = self.compiled
+        known = (category_ids >= 0) & (category_ids < c["size"])
+        lookup = np.where(known, category_ids, 0)
+        return {
+            "category_ids": category_ids,
+            "amounts": amounts,
+            "profile": np.where(known, c["profile_name"][lookup], None),
+            "is_scored": known & c["is_scored"][lookup],
+            "score": curve["score"],
+            "base_score": curve["base_score"],
+            "pattern_penalty": curve["pattern_penalty"],
+            "severity": curve["severity"],
+            "safe_discretionary": curve["safe_discretionary"],
+            "thresholds": thresholds,
+        }
+
+    def score_candidates(self, history, category_ids, amounts, dates, start_date, end_date):
+        """
+        Scores for independent hypothetical transactions (parallel CAT_ID /
+        amount / date arrays). Each one is scored as the only new row on top
+        of history, like simulate_purchases, so a candidate's score never
+        depends on the other candidates in the batch. Returns arrays score,
+        base_score, pattern_penalty, severity, safe_discretionary, profile,
+        context_bucket and is_scored, one entry per candidate.
+        """
+        category_ids = np.asarray(category_ids, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=float)
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]")
+
+        out = {
+            "score": np.full(len(category_ids), np.nan),
+            "base_score": np.full(len(category_ids), np.nan),
+            "pattern_penalty": np.zeros(len(category_ids)),
+            "severity": np.empty(len(category_ids), dtype=object),
+            "safe_discretionary": np.zeros(len(category_ids)),
+        }
+        # Only the purchase date changes the history aggregates; one pass per distinct date
+        for when in np.unique(dates):
+            rows = np.flatnonzero(dates == when)
+            stats = self._simulation_stats(history, start_date, end_date, purchase_date=when)
+            sim = self._simulate(stats, category_ids[rows], amounts[rows])
+            for name, values in sim.items():
+                out[name][rows] = values
+
+        c = self.compiled
+        known = (category_ids >= 0) & (category_ids < c["size"])
+        lookup = np.where(known, category_ids, 0)
+        out["is_scored"] = known & c["is_scored"][lookup]
+        out["profile"] = np.where(out["is_scored"], c["profile_name"][lookup], None)
+        out["context_bucket"] = np.where(out["is_scored"], c["context_bucket"][lookup], None)
+        return out
+
+    def _simulation_stats(self, history, start_date, end_date, purchase_date=None):
+        """History aggregates a simulated purchase is scored against."""
+        c = self.compiled
+        cat = history["CAT_ID"].to_numpy(dtype=np.int64)
+        amounts = history["amount"].to_numpy(dtype=float)
+        dates = pd.to_datetime(history["date"]).to_numpy(dtype="datetime64[ns]")
+        start = np.datetime64(pd.Timestamp(start_date), "ns")
+        end = np.datetime64(pd.Timestamp(end_date), "ns")
+        when = np.datetime64(pd.Timestamp(purchase_date if purchase_date is not None else end_date), "ns")
+
+        known = (cat >= 0) & (cat < c["size"])
+        lookup = np.where(known, cat, 0)
+        bucket = np.where(known, c["context_bucket"][lookup], None)
+        in_window = (dates >= start) & (dates <= end)
+
+        # Savings in the 30 days up to the purchase, same window as score_arrays
+        savings = known & c["is_savings_cat"][lookup]
+        recent = (dates >= when - np.timedelta64(30, "D")) & (dates <= when)
+
+        return {
+            "bucket_totals": {
+                name: float(amounts[in_window & (bucket == name)].sum())
+                for name in self.SIMULATED_BUCKETS
+            },
+            "purchase_in_window": bool(start <= when <= end),
+            "cat_count": np.bincount(cat[known], minlength=c["size"]),
+            "cat_total": np.bincount(cat[known], weights=amounts[known], minlength=c["size"]),
+            "negative_count": int((known & c["is_negative_cat"][lookup]).sum()),
+            "recent_savings": float(amounts[savings & recent].sum()),
+        }
+
+    def _simulate(self, stats, cats, amounts):
+        """Broadcast score_arrays' maths for the new row over cats x amounts."""
+        c = self.compiled
+        cats, amounts = np.broadcast_arrays(cats, amounts)
+        known = (cats >= 0) & (cats < c["size"])
+        lookup = np.where(known, cats, 0)
+        is_scored = known & c["is_scored"][lookup]
+        profile = np.where(is_scored, c["profile_code"][lookup], -1)
+        bucket = np.where(known, c["context_bucket"][lookup], None)
+        counted = amounts if stats["purchase_in_window"] else np.zeros_like(amounts)
+
+        def total(name):
+            return stats["bucket_totals"][name] + np.where(bucket == name, counted, 0.0)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            # compute_context_features with the purchase added
+            income = -total("EFFECTIVE_INCOME")
+            income = np.where(income <= 0, 1e-6, income)
+            cash_adv_share = np.maximum(0.0, -total("EMERGENCY_BORROWING")) / income
+            fees_ratio = np.maximum(0.0, total("FEES_CONTEXT")) / income
+            structural_share = np.maximum(0.0, total("STRUCTURAL_UNAVOIDABLE")) / income
+            core_flex_share = np.maximum(0.0, total("FLEX_CORE_ESSENTIAL")) / income
+            other_flex_share = np.maximum(0.0, total("FLEX_OTHER_ESSENTIAL")) / income
+            harmful_share = np.maximum(0.0, total("AVOIDABLE_HARMFUL")) / income
+            neutral_share = np.maximum(0.0, total("AVOIDABLE_NEUTRAL")) / income
+
+            # calculate_financial_capacity
+            necessary = structural_share * income + core_flex_share * income + other_flex_share * income
+            safe_budget = np.maximum(0.0, income - necessary - income * self.RECOMMENDED_SAVINGS_RATE)
+            in_distress = (cash_adv_share > 0) | (fees_ratio > 0.02)
+
+            txn_amount = np.abs(amounts)
+            base = np.full(amounts.shape, 50.0)
+
+            # DISCRETIONARY_WANT
+            ratio = txn_amount / safe_budget
+            b = 100.0 * np.where(ratio <= 0, 1.0, 1.0 / (1.0 + (ratio / 0.25) ** 1.4))
+            harm_factor = np.maximum(0.4, 1.0 - np.minimum(0.5, harmful_share * 2.0))
+            neutral_factor = 1.0 - np.minimum(0.15, neutral_share * 0.5)
+            b *= np.where(c["is_harmful"][lookup], harm_factor, neutral_factor)
+            distress_index = np.minimum(1.2, fees_ratio / 0.05 + cash_adv_share * 2.0)
+            b = np.where(in_distress, b * (1.0 - 0.25 * distress_index), b)
+            b = np.where(safe_budget <= 0, 5.0, np.clip(b, 0.0, 100.0))
+            base = np.where(profile == 0, b, base)
+
+            # SAVINGS_POSITIVE (the purchase itself lands in its 30-day window)
+            window_savings = stats["recent_savings"] + np.where(c["is_savings_cat"][lookup], amounts, 0.0)
+            rel = (np.maximum(0.0, window_savings) / income) / self.RECOMMENDED_SAVINGS_RATE
+            b = 100.0 * np.exp(-((rel - 1.0) ** 2) / 0.6)
+            distress_index = np.minimum(1.0, cash_adv_share * 2.5 + fees_ratio / 0.05)
+            b = np.where(in_distress, b * (1.0 - 0.7 * distress_index), b)
+            base = np.where(profile == 1, np.clip(b, 0.0, 100.0), base)
+
+            # FLEX_ESSENTIAL
+            share = (stats["cat_total"][lookup] + amounts) / income
+            b = np.where(share <= 0, 100.0, 100.0 / (1.0 + ((share / 0.15) / 2.0) ** 2))
+            b = np.where(in_distress, b * 0.9, b)
+            base = np.where(profile == 2, np.clip(b, 0.0, 100.0), base)
+
+            # NEGATIVE_EVENTS
+            freq = np.maximum(1, stats["negative_count"] + c["is_negative_cat"][lookup])
+            idx = (txn_amount / income) * 100.0 * np.sqrt(freq)
+            b = 100.0 / (1.0 + np.power(idx, 0.8))
+            b = np.where(in_distress, b * 0.7, b)
+            base = np.where(profile == 3, np.clip(b, 0.0, 100.0), base)
+
+        # Repeat-purchase penalty, counting the purchase itself
+        excess = np.maximum(0, stats["cat_count"][lookup] + 1 - 3)
+        pattern_penalty = np.where(
+            (profile == 0) & (excess > 0), 20.0 * (1.0 - np.exp(-0.3 * excess)), 0.0
+        )
+        final = np.clip(base - pattern_penalty, 0.0, 100.0)
+
+        severity = np.where(
+            (profile >= 0) & (profile < PROFILE_OTHER),
+            self._classify_severity_array(base),
+            "unknown",
+        ).astype(object)
+
+        return {
+            "score": np.where(is_scored, np.round(final, 2), np.nan),
+            "base_score": np.where(is_scored, np.round(base, 2), np.nan),
+            "pattern_penalty": np.round(pattern_penalty, 2),
+            "severity": severity,
+            "safe_discretionary": safe_budget,
+        }
+
     def get_score_summary(self, scored_df):
         scoreable = scored_df[scored_df["is_scored"] == True]
         if len(scoreable) == 0:
@@ -351,4 +768,5 @@ class TransactionScorer:
             .agg(["mean", "count"])
             .to_dict(),
             "severity_distribution": scoreable["severity"].value_counts().to_dict(),
+            "config_version": self.config_version,
         }
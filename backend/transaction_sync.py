@@ -0,0 +1,214 @@
+# backend/transaction_sync.py - Incremental Plaid /transactions/sync pulls into Firestore, then rescoring of the stored window
+#
+# Firestore layout:
+#   plaid_items/{item_id}            uid, access_token, sync cursor (written at token exchange)
+#   users/{uid}/transactions/{tid}   Plaid-shaped transactions as of the last sync
+#
+# sync_item() is what the /plaid/webhook handler runs for an item: pull every
+# change since the stored cursor, apply it, rescore the user's window and write
+# only the score rows that changed. The cursor is saved last, so a sync that
+# fails part-way is simply replayed from the old cursor (every write is idempotent).
+import json
+from datetime import date, datetime, timedelta, timezone
+
+from instrumentation import stage
+from score_store import BatchedWriter
+
+ITEMS_COLLECTION = "plaid_items"
+TRANSACTIONS_COLLECTION = "transactions"
+
+# Plaid's maximum page size for /transactions/sync
+SYNC_PAGE_SIZE = 500
+
+# Restarts allowed when Plaid reports the item changed while we were paging
+SYNC_RESTART_LIMIT = 3
+MUTATION_DURING_PAGINATION = "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION"
+
+# Same window the dashboard scores
+DEFAULT_RANGE_WEEKS = 10
+
+
+def _to_firestore_value(value):
+    # Plaid's to_dict() hands back datetime.date objects, which Firestore rejects
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _to_firestore_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_firestore_value(v) for v in value]
+    return value
+
+
+def _items_ref(db):
+    return db.collection(ITEMS_COLLECTION)
+
+
+def _transactions_ref(db, uid):
+    return db.collection("users").document(uid).collection(TRANSACTIONS_COLLECTION)
+
+
+def register_item(db, item_id, uid, access_token):
+    """Remember which user an item belongs to so its webhooks can be routed."""
+    _items_ref(db).document(item_id).set({"uid": uid, "access_token": access_token}, merge=True)
+
+
+def get_item(db, item_id):
+    doc = _items_ref(db).document(item_id).get()
+    return doc.to_dict() if doc.exists else None
+
+
+def _plaid_error_code(error):
+    try:
+        return json.loads(error.body).get("error_code")
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def fetch_sync_delta(access_token, cursor=None, page_size=SYNC_PAGE_SIZE):
+    """
+    Every added / modified / removed transaction since cursor (None = full
+    history), following has_more. Returns a dict with those three lists
+    (Plaid dicts; removed holds transaction ids) and next_cursor.
+    """
+    import plaid
+    from plaid.model.transactions_sync_request import TransactionsSyncRequest
+    from plaid.model.transactions_sync_request_options import TransactionsSyncRequestOptions
+
+    from plaid_client import call_json
+
+    for _ in range(SYNC_RESTART_LIMIT + 1):
+        added, modified, removed = [], [], []
+        next_cursor = cursor
+        try:
+            while True:
+                request = TransactionsSyncRequest(
+                    access_token=access_token,
+                    count=page_size,
+                    options=TransactionsSyncRequestOptions(include_personal_finance_category=True),
+                )
+                if next_cursor:
+                    request.cursor = next_cursor
+                page = call_json("transactions_sync", request)
+
+                added.extend(page["added"])
+                modified.extend(page["modified"])
+                removed.extend(r["transaction_id"] for r in page["removed"])
+                next_cursor = page["next_cursor"]
+                if not page["has_more"]:
+                    return {"added": added, "modified": modified, "removed": removed, "next_cursor": next_cursor}
+        except plaid.ApiException as e:
+            # Plaid wants the whole pagination restarted from the original cursor
+            if _plaid_error_code(e) != MUTATION_DURING_PAGINATION:
+                raise
+
+    raise RuntimeError(f"Transactions changed during pagination {SYNC_RESTART_LIMIT + 1} times in a row")
+
+
+def apply_delta(db, uid, delta):
+    """Write added / modified transactions and delete removed ones. Returns documents touched."""
+    transactions = _transactions_ref(db, uid)
+    with BatchedWriter(db) as writer:
+        for txn in delta["added"] + delta["modified"]:
+            writer.set(transactions.document(txn["transaction_id"]), _to_firestore_value(txn))
+        for tid in delta["removed"]:
+            writer.delete(transactions.document(tid))
+    return len(delta["added"]) + len(delta["modified"]) + len(delta["removed"])
+
+
+def read_stored_window(db, uid, start_date, end_date=None):
+    """Stored transactions dated on or after start_date (and on or before end_date, if given)."""
+    query = _transactions_ref(db, uid).where("date", ">=", start_date.isoformat())
+    if end_date is not None:
+        query = query.where("date", "<=", end_date.isoformat())
+    return [doc.to_dict() for doc in query.stream()]
+
+
+def get_stored_transactions(db, uid, transaction_ids):
+    """{transaction_id: stored Plaid transaction} for the given ids (missing ones are left out)."""
+    if not transaction_ids:
+        return {}
+    transactions = _transactions_ref(db, uid)
+    docs = db.get_all([transactions.document(tid) for tid in transaction_ids])
+    return {doc.id: doc.to_dict() for doc in docs if doc.exists}
+
+
+def rescore_stored_window(db, uid, scoring, pf_map, score_store, range_weeks=DEFAULT_RANGE_WEEKS):
+    """
+    Score the user's stored window with one config snapshot and persist it.
+    Scores depend on the whole window (income, category totals, repeat
+    purchases), so the vectorized pass covers every row, but ScoreStore only
+    writes the rows whose score actually changed.
+    Returns (stored_txns, scored_df, context_features, rows_written); scored_df
+    is None when nothing in the window can be scored.
+    """
+    import pandas as pd
+
+    from plaid_service import plaid_to_txns_df
+    from scoring_config import compute_context_features
+
+    end_date = date.today()
+    start_date = end_date - timedelta(weeks=range_weeks)
+
+    with stage("firestore_read_window", uid=uid) as s:
+        stored = read_stored_window(db, uid, start_date)
+        s.rows = len(stored)
+    if not stored:
+        return stored, None, None, 0
+
+    txns_df = plaid_to_txns_df(stored, pf_map)
+    if txns_df.empty:
+        return stored, None, None, 0
+
+    context_features = compute_context_features(
+        txns_df, scoring.cfg, pd.Timestamp(start_date), pd.Timestamp(end_date)
+    )
+    with stage("scoring", scorer_path="sync") as s:
+        scored_df = scoring.scorer.score_all_transactions(txns_df, context_features, details=False)
+        s.rows = len(scored_df)
+
+    with stage("firestore_persist_scores", uid=uid) as s:
+        s.rows = score_store.persist(uid, scored_df, scoring.scorer.get_score_summary(scored_df))
+    return stored, scored_df, context_features, s.rows
+
+
+def sync_item(db, item_id, scoring, pf_map, score_store, range_weeks=DEFAULT_RANGE_WEEKS):
+    """
+    Pull the item's delta, store it, rescore and advance the cursor.
+    Returns a summary dict; "affected" holds the added / modified Plaid
+    transactions and "scored_df" / "context_features" the rescored window.
+    """
+    item = get_item(db, item_id)
+    if item is None:
+        raise LookupError(f"Unknown Plaid item {item_id}")
+    uid = item["uid"]
+
+    with stage("plaid_sync", item_id=item_id) as s:
+        delta = fetch_sync_delta(item["access_token"], item.get("cursor"))
+        s.rows = len(delta["added"]) + len(delta["modified"]) + len(delta["removed"])
+
+    result = {
+        "item_id": item_id,
+        "uid": uid,
+        "added": len(delta["added"]),
+        "modified": len(delta["modified"]),
+        "removed": len(delta["removed"]),
+        "scores_written": 0,
+        "affected": delta["added"] + delta["modified"],
+        "scored_df": None,
+        "context_features": None,
+    }
+
+    if s.rows:
+        with stage("firestore_apply_delta", uid=uid) as s:
+            s.rows = apply_delta(db, uid, delta)
+        score_store.delete_scores(uid, delta["removed"])
+        _, scored_df, context_features, written = rescore_stored_window(
+            db, uid, scoring, pf_map, score_store, range_weeks
+        )
+        result.update(scored_df=scored_df, context_features=context_features, scores_written=written)
+
+    _items_ref(db).document(item_id).set(
+        {"cursor": delta["next_cursor"], "last_synced_at": datetime.now(timezone.utc)},
+        merge=True,
+    )
+    return result
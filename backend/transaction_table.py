@@ -0,0 +1,195 @@
+# backend/transaction_table.py - Columnar, interned storage for a window's Plaid transactions and their scores
+#
+# A scored window used to hold every Plaid transaction as a full dict (nested
+# location / payment_meta / counterparties dicts included), with score,
+# profile and severity merged into each one through three lookup dicts.
+# TransactionTable keeps the same data per column instead:
+#
+#   transaction_id, date, name, merchant_name   object arrays of (interned) str
+#   amount / pending / CAT_ID                   float64 / bool / int32 (-1 = no CAT_ID)
+#   category, personal_finance_category         interned tuples, shared across rows
+#   score / profile / severity                  float64 (NaN = unscored) / interned str
+#   everything else                             one compact JSON bytes object per row
+#
+#   table = TransactionTable.from_plaid(plaid_txns, pf_map)
+#   scored_df = scorer.score_all_transactions(table.to_txns_df(), ctx, details=False)
+#   table.attach_scores(scored_df, config_version)
+#   table.records(fields=("transaction_id", "amount", "score"))   # Plaid-shaped dicts again
+#
+# records() only decodes the per-row JSON when a requested field lives there,
+# so the dashboard's field set is built straight from the columns.
+import hashlib
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json is the fallback
+    orjson = None
+
+# Plaid fields held as columns; every other field goes to the per-row JSON
+COLUMN_FIELDS = (
+    "transaction_id", "date", "name", "merchant_name", "amount", "pending",
+    "category", "personal_finance_category",
+)
+SCORE_FIELDS = ("score", "profile", "severity", "config_version")
+
+
+def _dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+
+def _loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _iso_date(value):
+    # Raw JSON gives ISO strings, the typed Plaid client datetime.date
+    return sys.intern(value if isinstance(value, str) else value.isoformat())
+
+
+class TransactionTable:
+    """The transactions of one window, column by column (see the module header)."""
+
+    __slots__ = (
+        "transaction_id", "date", "name", "merchant_name", "amount", "pending", "cat_id",
+        "category", "pfc", "extras", "score", "profile", "severity", "config_version", "_row_by_tid",
+    )
+
+    def __init__(self, n=0):
+        self.transaction_id = np.empty(n, dtype=object)
+        self.date = np.empty(n, dtype=object)
+        self.name = np.empty(n, dtype=object)
+        self.merchant_name = np.empty(n, dtype=object)
+        self.amount = np.zeros(n)
+        self.pending = np.zeros(n, dtype=bool)
+        self.cat_id = np.full(n, -1, dtype=np.int32)
+        self.category = np.empty(n, dtype=object)
+        self.pfc = np.empty(n, dtype=object)
+        self.extras = np.empty(n, dtype=object)
+        self.score = np.full(n, np.nan)
+        self.profile = np.empty(n, dtype=object)
+        self.severity = np.empty(n, dtype=object)
+        self.config_version = None
+        self._row_by_tid = None
+
+    @classmethod
+    def from_plaid(cls, plaid_txns, pf_map):
+        """Build from Plaid transaction dicts (raw JSON or to_dict()), mapping CAT_IDs with pf_map."""
+        table = cls(len(plaid_txns))
+        # One shared tuple per distinct category / personal_finance_category
+        shared = {}
+
+        for i, t in enumerate(plaid_txns):
+            table.transaction_id[i] = t["transaction_id"]
+            table.date[i] = _iso_date(t["date"])
+            table.name[i] = _intern(t.get("name"))
+            table.merchant_name[i] = _intern(t.get("merchant_name"))
+            table.amount[i] = t["amount"]
+            table.pending[i] = bool(t.get("pending"))
+
+            category = t.get("category")
+            if category is not None:
+                category = tuple(_intern(c) for c in category)
+                category = shared.setdefault(("category", category), category)
+            table.category[i] = category
+
+            pfc = t.get("personal_finance_category")
+            if pfc is not None:
+                items = tuple((_intern(k), _intern(v)) for k, v in pfc.items())
+                table.pfc[i] = shared.setdefault(("pfc", items), items)
+                cat_id = pf_map.get((pfc.get("primary"), pfc.get("detailed")))
+                if cat_id is not None:
+                    table.cat_id[i] = cat_id
+
+            table.extras[i] = _dumps({k: v for k, v in t.items() if k not in COLUMN_FIELDS and k not in SCORE_FIELDS})
+
+        return table
+
+    def __len__(self):
+        return len(self.transaction_id)
+
+    def scoreable_rows(self):
+        """Row positions with a CAT_ID, in order (the rows of to_txns_df())."""
+        return np.flatnonzero(self.cat_id >= 0)
+
+    def to_txns_df(self):
+        """The scorer's (transaction_id, date, amount, CAT_ID) frame: one row per scoreable transaction."""
+        rows = self.scoreable_rows()
+        return pd.DataFrame({
+            "transaction_id": self.transaction_id[rows],
+            "date": pd.to_datetime(self.date[rows]),
+            "amount": self.amount[rows],
+            "CAT_ID": self.cat_id[rows].astype(int),
+        })
+
+    def attach_scores(self, scored_df, config_version):
+        """Take score / profile / severity from score_all_transactions(to_txns_df(), ...) output."""
+        self.config_version = config_version
+        if scored_df is None:
+            return
+        rows = self.scoreable_rows()
+        score = scored_df["score"].to_numpy(dtype=float)
+        scored = ~np.isnan(score)
+        self.score[rows] = score
+        # Unscored rows (and transactions without a CAT_ID) carry no profile / severity
+        self.profile[rows[scored]] = [_intern(p) for p in scored_df["profile"].to_numpy()[scored]]
+        self.severity[rows[scored]] = [_intern(s) for s in scored_df["severity"].to_numpy()[scored]]
+
+    def row_of(self, transaction_id):
+        """Row position of a transaction_id, or None."""
+        if self._row_by_tid is None:
+            self._row_by_tid = {tid: i for i, tid in enumerate(self.transaction_id)}
+        return self._row_by_tid.get(transaction_id)
+
+    def _column(self, field, rows):
+        if field == "category":
+            return [None if c is None else list(c) for c in self.category[rows]]
+        if field == "personal_finance_category":
+            return [None if p is None else dict(p) for p in self.pfc[rows]]
+        if field == "score":
+            return [None if s != s else s for s in self.score[rows].tolist()]
+        if field == "config_version":
+            return [self.config_version] * len(rows)
+        return getattr(self, field)[rows].tolist()
+
+    def records(self, fields=None, rows=None):
+        """
+        Plaid-shaped dicts (with score, profile, severity, config_version) for
+        `rows` (default all), keeping only `fields` when given. Fields that are
+        not columns are read from the per-row JSON.
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.intp)
+        wanted = COLUMN_FIELDS + SCORE_FIELDS if fields is None else fields
+        columns = [f for f in wanted if f in COLUMN_FIELDS or f in SCORE_FIELDS]
+        values = [self._column(f, rows) for f in columns]
+        out = [dict(zip(columns, row)) for row in zip(*values)] if columns else [{} for _ in rows]
+
+        other = [f for f in wanted if f not in columns]
+        if fields is None or other:
+            for record, body in zip(out, self.extras[rows]):
+                extra = _loads(body)
+                if fields is None:
+                    record.update(extra)
+                else:
+                    record.update({k: extra[k] for k in other if k in extra})
+        return out
+
+    def row_digests(self):
+        """{transaction_id: digest} over every field of each row, scores included."""
+        values = [self._column(f, np.arange(len(self))) for f in COLUMN_FIELDS + SCORE_FIELDS]
+        return {
+            row[0]: hashlib.blake2b(_dumps(row) + extras, digest_size=8).hexdigest()
+            for row, extras in zip(zip(*values), self.extras)
+        }
@@ -0,0 +1,137 @@
+# backend/transaction_versions.py - Content versions of a user's scored window, for ETags and since= deltas
+#
+# A window's data version is a digest of every scored transaction in it (Plaid
+# fields plus score / profile / severity / config_version, digested per row by
+# TransactionTable.row_digests), so it changes exactly when the response would.
+# Each version's per-transaction digests are kept so a client holding an older
+# version can be sent only what changed:
+#
+#   digests = window["table"].row_digests()
+#   version = window_version(digests)
+#   VERSIONS.record(uid, version, digests)
+#   ...
+#   base = VERSIONS.get(uid, since)          # None when that version is unknown
+#   delta = diff_window(base, digests)       # transaction ids
+#
+# Recent versions live in memory and in users/{uid}/transaction_versions/recent,
+# so a delta can be answered by any worker, not only the one that served the
+# previous response.
+import hashlib
+import threading
+from collections import OrderedDict
+
+VERSIONS_COLLECTION = "transaction_versions"
+VERSIONS_DOC_ID = "recent"
+
+# Versions kept per user; a since= older than these gets the full list again
+DEFAULT_VERSIONS_KEPT = 4
+
+
+def window_version(digests):
+    """Version of a window from its {transaction_id: digest} row digests."""
+    h = hashlib.blake2b(digest_size=8)
+    for tid in sorted(digests):
+        h.update(tid.encode())
+        h.update(digests[tid].encode())
+    return h.hexdigest()
+
+
+def representation_version(data_version, config_version, *params):
+    """ETag version for one view of a window: data + scoring config + request params (fields, since, ...)."""
+    parts = [data_version, config_version]
+    if any(p is not None for p in params):
+        parts.append(hashlib.blake2b(repr(params).encode(), digest_size=4).hexdigest())
+    return "-".join(parts)
+
+
+def diff_window(base, digests):
+    """Added / modified / removed transaction ids going from `base` digests to the current ones."""
+    added, modified = [], []
+    for tid, digest in digests.items():
+        old = base.get(tid)
+        if old is None:
+            added.append(tid)
+        elif old != digest:
+            modified.append(tid)
+    removed = [tid for tid in base if tid not in digests]
+    return {"added": added, "modified": modified, "removed": removed}
+
+
+class VersionLog:
+    """
+    The last few window versions per user ({transaction_id: digest} each), in
+    memory and in Firestore. Persisting is best effort: when it fails the
+    version is only known to this worker and other workers answer since= with
+    the full list.
+    """
+
+    def __init__(self, db, versions_kept=DEFAULT_VERSIONS_KEPT, max_users=1024):
+        self.db = db
+        self.versions_kept = versions_kept
+        self.max_users = max_users
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _doc_ref(self, uid):
+        return self.db.collection("users").document(uid).collection(VERSIONS_COLLECTION).document(VERSIONS_DOC_ID)
+
+    def _remember(self, uid, versions):
+        with self._lock:
+            self._users[uid] = versions
+            self._users.move_to_end(uid)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def _cached(self, uid):
+        with self._lock:
+            return self._users.get(uid)
+
+    def _load(self, uid):
+        doc = self._doc_ref(uid).get()
+        entries = (doc.to_dict() or {}).get("versions", []) if doc.exists else []
+        versions = OrderedDict(
+            (entry["version"], dict(zip(entry["transaction_ids"], entry["digests"]))) for entry in entries
+        )
+        self._remember(uid, versions)
+        return versions
+
+    def record(self, uid, version, digests):
+        """Remember a window version (no-op when it is already known)."""
+        versions = self._cached(uid)
+        if versions is not None and version in versions:
+            return
+        try:
+            versions = self._load(uid)
+            if version in versions:
+                return
+            versions = OrderedDict(versions)
+            versions[version] = digests
+            while len(versions) > self.versions_kept:
+                versions.popitem(last=False)
+            self._remember(uid, versions)
+            self._doc_ref(uid).set({
+                "versions": [
+                    {"version": v, "transaction_ids": list(d), "digests": list(d.values())}
+                    for v, d in versions.items()
+                ],
+            })
+        except Exception as e:
+            print(f"[ERROR] Could not record transaction version for {uid}: {e}")
+            versions = OrderedDict(self._cached(uid) or {})
+            versions[version] = digests
+            self._remember(uid, versions)
+
+    def get(self, uid, version):
+        """{transaction_id: digest} of an earlier version, or None when it is not kept."""
+        versions = self._cached(uid)
+        if versions is None or version not in versions:
+            try:
+                versions = self._load(uid)
+            except Exception as e:
+                print(f"[ERROR] Could not load transaction versions for {uid}: {e}")
+                return None
+        return versions.get(version)
+
+    def forget(self, uid):
+        with self._lock:
+            self._users.pop(uid, None)
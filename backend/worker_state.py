@@ -0,0 +1,105 @@
+# backend/worker_state.py - Per-worker state files so any worker can report on all of them
+#
+# Under the preforked entrypoint (gunicorn.conf.py) the master points
+# WORKER_STATE_DIR at a fresh directory. The master writes master.json with the
+# config version it preloaded; each worker writes <pid>.json once it is warm
+# and again after every scoring-config reload.
+# Outside that entrypoint there is no directory and only the current process
+# is reported.
+import json
+import os
+import tempfile
+import time
+
+WORKER_STATE_DIR_ENV = "WORKER_STATE_DIR"
+MASTER_STATE_FILE = "master.json"
+
+
+def get_state_dir():
+    return os.getenv(WORKER_STATE_DIR_ENV)
+
+
+def _write_json(path, data):
+    # Write-then-rename so readers never see a half-written file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def publish_master_state(**fields):
+    state_dir = get_state_dir()
+    if not state_dir:
+        return
+    _write_json(os.path.join(state_dir, MASTER_STATE_FILE), {"pid": os.getpid(), "updated_at": time.time(), **fields})
+
+
+def publish_worker_state(**fields):
+    state_dir = get_state_dir()
+    if not state_dir:
+        return
+    _write_json(os.path.join(state_dir, f"{os.getpid()}.json"), {"pid": os.getpid(), "updated_at": time.time(), **fields})
+
+
+def read_states():
+    """(master_state or None, [worker_state, ...]) for live processes; dead workers' files are removed."""
+    state_dir = get_state_dir()
+    if not state_dir or not os.path.isdir(state_dir):
+        return None, []
+
+    master = None
+    workers = []
+    for name in sorted(os.listdir(state_dir)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(state_dir, name)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        if name == MASTER_STATE_FILE:
+            master = state
+        elif _pid_alive(state["pid"]):
+            workers.append(state)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return master, workers
+
+
+def check_config_consistency(current_version):
+    """
+    Compare every live worker's config_version with this process's. The
+    master's preloaded version is reported too but not enforced: a hot reload
+    (config_registry.py) legitimately moves every worker past it.
+    Returns a JSON-ready report.
+    """
+    master, workers = read_states()
+    expected = current_version
+
+    if not workers:
+        workers = [{"pid": os.getpid(), "config_version": current_version, "updated_at": time.time()}]
+
+    mismatched = [w["pid"] for w in workers if w.get("config_version") != expected]
+    return {
+        "consistent": not mismatched,
+        "expected_version": expected,
+        "master_pid": (master or {}).get("pid"),
+        "preloaded_version": (master or {}).get("config_version"),
+        "workers": workers,
+        "mismatched_pids": mismatched,
+    }
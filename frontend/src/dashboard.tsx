@@ -66,7 +66,7 @@ function Dashboard() {
     // ---- FETCH TRANSACTIONS ----
     const loadTransactions = async () => {
       try {
-        const r = await fetch(`/api/plaid/transactions/${uid}`)
+        const r = await fetch(`/api/plaid/transactions/${uid}?fields=dashboard`)
         if (!r.ok) throw new Error("Transaction fetch error")
         const d = await r.json()
 